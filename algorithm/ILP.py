@@ -16,17 +16,33 @@ from algorithm.utils import (
     get_team_id,   
     get_team_code       
 )
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
+from algorithm.ilpMatrix import MatrixModel, solve_pulp_cbc
+from algorithm.deadline import Deadline
+
+
+BUILDERS = ("matrix", "pulp")
 
 
 class ILPScheduler:
-    def __init__(self, vacations_rows, minimuns_rows, employees, maxTime, year=2025, shifts=2):
+    def __init__(self, vacations_rows, minimuns_rows, employees, maxTime, year=2025, shifts=2, seed=None,
+                 deadline=None, builder="matrix"):
+        if builder not in BUILDERS:
+            raise ValueError(f"Unknown ILP builder '{builder}', expected one of {BUILDERS}.")
+        self.builder = builder
         self.year = year
+        self.seed = seed
         self.maxTime_sec = int(maxTime) * 60 if maxTime is not None else None
+        self.deadline = deadline  # algorithm.deadline.Deadline (task budget / cancellation)
+
+        # Parsed templates, shared with the other solvers
+        inst = self.inst = get_instance(vacations_rows, minimuns_rows, employees, year, shifts)
 
         # Calendar
-        self.dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31").to_list()
-        self.num_days = len(self.dates)
-        self.dias_ano, _sundays = build_calendar(self.year)  # (not strictly needed here, but consistent)
+        self.dates = list(inst.dates)
+        self.num_days = inst.num_days
+        self.dias_ano = inst.dates
 
         # Employees
         self.employees = list(range(len(employees)))  # indices 0..n-1
@@ -64,13 +80,12 @@ class ILPScheduler:
                 self.teams.setdefault(code, set()).add(idx)
 
         # Holidays (PT) + Sundays
-        feriados_pt = holidays.country_holidays("PT", years=[year])
         self.sundays_holidays = [
-            d for d in self.dates if d.weekday() == 6 or d.date() in feriados_pt
+            d for day, d in enumerate(self.dates, start=1) if day in inst.special_days
         ]
 
         # Vacations: rows -> dict -> sets of pd.Timestamp
-        vacs_dict = rows_to_vac_dict(vacations_rows)
+        vacs_dict = inst.vacs
         self.vacations_dates = {
             e_idx: {
                 self.dates[day - 1] for day in vacs_dict.get(e_idx + 1, []) if 1 <= day <= self.num_days
@@ -79,7 +94,7 @@ class ILPScheduler:
         }
 
         # Minimum + Ideal requirements
-        mins, ideals = rows_to_req_dicts(minimuns_rows)
+        mins, ideals = inst.mins, inst.ideals
 
         # Convert both into (date, team_code, shift)
         self.minimos = {}
@@ -104,15 +119,97 @@ class ILPScheduler:
         self.y = None
         self.model = None
         self.status = None
+        self.values = None     # column values of the matrix model after solve()
+        self.mip_start = None  # optional column values passed to CBC as a MIP start
 
         # Export-friendly attributes
         self.assignment = defaultdict(list)  # emp_id(1-based) -> list[(day, shift, team_id)]
-        self.vacs_1based = {i + 1: sorted([self.dates.index(d) + 1 for d in self.vacations_dates[i]])
+        self.vacs_1based = {i + 1: sorted(day for day in vacs_dict.get(i + 1, []) if 1 <= day <= self.num_days)
                             for i in self.employees}
 
     # ------------ model building ------------
 
+    @instrumentation.span("build")
     def build_model(self):
+        if self.builder == "matrix":
+            self.build_matrix_model()
+        else:
+            self.build_pulp_model()
+
+    def build_matrix_model(self):
+        """
+        Same model as build_pulp_model, built as a sparse matrix (algorithm.ilpMatrix):
+          self.x[f]  column indices, shape (days, 1 + shifts, allowed teams of f); shift 0 = off
+          self.y     shortage columns, shape (days, shifts, teams), in self.team_codes order
+        One team per shift is implied by one shift per day and is not added again.
+        """
+        D, S = self.num_days, self.shifts
+        model = MatrixModel("Escala_Trabalho_ILP")
+        self.team_codes = list(self.teams.keys())
+        self.emp_team_slots = {f: list(dict.fromkeys(self.emp_allowed_teams[f])) for f in self.employees}
+
+        # --- Decision variables ---
+        self.x = {f: model.add_vars((D, S + 1, len(self.emp_team_slots[f]))) for f in self.employees}
+        self.y = model.add_vars((D, S, len(self.team_codes)), ub=None, integer=False, cost=1.0)
+
+        # shortages: y + coverage >= minimo
+        self.add_shortage_rows(model, self.y, self.requirements_array(self.inst.mins))
+
+        special_idx = np.array(sorted(d - 1 for d in self.inst.special_days if 1 <= d <= D), dtype=int)
+        for f in self.employees:
+            x = self.x[f]
+            worked = x[:, 1:, :].reshape(D, -1)  # (days, shifts * teams)
+
+            # one shift per day (off included)
+            model.add_rows(x.reshape(D, -1), "==", 1)
+            # total working days = 223, Sundays+holidays <= 22
+            model.add_rows(worked.ravel(), "==", 223)
+            model.add_rows(worked[special_idx].ravel(), "<=", 22)
+            # no more than 5 worked days in any 6
+            if D > 5:
+                windows = np.lib.stride_tricks.sliding_window_view(worked, 6, axis=0)
+                model.add_rows(windows.reshape(D - 5, -1), "<=", 5)
+            # no earlier shift on the next day
+            for s_prev in range(1, S + 1):
+                for s_next in range(1, s_prev):
+                    model.add_rows(np.hstack([x[:-1, s_prev, :], x[1:, s_next, :]]), "<=", 1)
+            # vacations -> off
+            vac_idx = np.array(sorted(d - 1 for d in self.vacs_1based[f + 1]), dtype=int)
+            if len(vac_idx):
+                model.add_rows(x[vac_idx, 0, :], "==", 1)
+
+        self.model = model
+
+    def _cover_cols(self, team_code, s):
+        """x columns of everyone working shift s for team_code, shape (days, members)."""
+        members = sorted(self.teams[team_code])
+        return np.column_stack([self.x[f][:, s, self.emp_team_slots[f].index(team_code)] for f in members])
+
+    def add_shortage_rows(self, model, shortage, reqs):
+        """shortage[d, s, team] + coverage >= reqs[d, s, team] for every day, shift and team."""
+        for k, team_code in enumerate(self.team_codes):
+            for s in range(1, self.shifts + 1):
+                cols = np.column_stack([shortage[:, s - 1, k], self._cover_cols(team_code, s)])
+                model.add_rows(cols, ">=", reqs[:, s - 1, k])
+
+    def coverage(self, values):
+        """Workers per (day, shift, team) in a solution (column values), like requirements_array."""
+        out = np.zeros((self.num_days, self.shifts, len(self.team_codes)))
+        for k, team_code in enumerate(self.team_codes):
+            for s in range(1, self.shifts + 1):
+                out[:, s - 1, k] = values[self._cover_cols(team_code, s)].sum(axis=1)
+        return out
+
+    def requirements_array(self, reqs):
+        """{(day, shift, team_id): n} -> array (days, shifts, teams) in self.team_codes order."""
+        out = np.zeros((self.num_days, self.shifts, len(self.team_codes)))
+        slot = {get_team_id(code): k for k, code in enumerate(self.team_codes)}
+        for (day, shift, team_id), val in reqs.items():
+            if 1 <= day <= self.num_days and 1 <= shift <= self.shifts and team_id in slot:
+                out[day - 1, shift - 1, slot[team_id]] = int(val)
+        return out
+
+    def build_pulp_model(self):
         funcionarios = self.employees
         dias = self.dates
         t_range = range(1, self.shifts + 1)        # working shifts
@@ -235,19 +332,30 @@ class ILPScheduler:
 
     # ------------ solve + extract ------------
 
-    def solve(self, gap_rel=0.005):
+    def solve(self, gap_rel=0.005, preprocess=True):
+        """CBC on the model; preprocess=False lets CBC keep the MIP start (matrix builder, see MatrixModel.solve_cbc)."""
         if self.model is None:
             self.build_model()
 
-        solver = pulp.PULP_CBC_CMD(
-            msg=True,
-            timeLimit=(self.maxTime_sec if self.maxTime_sec is not None else 8 * 3600),
-            gapRel=gap_rel,
-        )
-        self.status = self.model.solve(solver)
+        # time limit from the task deadline, which also terminates CBC on cancellation
+        time_limit = max(1, int(Deadline.budget(self.maxTime_sec, self.deadline)))
+
+        if isinstance(self.model, MatrixModel):
+            with instrumentation.span("solve"):
+                self.status, self.values = self.model.solve_cbc(time_limit=time_limit, gap_rel=gap_rel,
+                                                                seed=self.seed, mip_start=self.mip_start,
+                                                                deadline=self.deadline, preprocess=preprocess)
+            print(f"[ILP] CBC status: {pulp.LpStatus[self.status]}, objective={self.model.objective_value}")
+            self._extract_assignments()
+            return
+
+        with instrumentation.span("solve"):
+            self.status = solve_pulp_cbc(self.model, time_limit=time_limit, gap_rel=gap_rel, seed=self.seed,
+                                         deadline=self.deadline)
         # Build assignments for export
         self._extract_assignments()
 
+    @instrumentation.span("extract")
     def _extract_assignments(self):
         """
         Fill self.assignment as: emp_id(1-based) -> [(day, shift, team_id)]
@@ -256,6 +364,19 @@ class ILPScheduler:
         if self.x is None:
             return
 
+        if isinstance(self.model, MatrixModel):
+            for f in self.employees:
+                vals = self.values[self.x[f][:, 1:, :]]  # (days, shifts, teams)
+                if vals.size == 0:
+                    continue
+                flat = vals.reshape(self.num_days, -1)
+                best = flat.argmax(axis=1)
+                for day_idx in np.flatnonzero(flat.max(axis=1) > 0.5):
+                    s, k = divmod(int(best[day_idx]), vals.shape[2])
+                    team_id = get_team_id(self.emp_team_slots[f][k])
+                    self.assignment[f + 1].append((int(day_idx) + 1, s + 1, team_id))
+            return
+
         for f in self.employees:
             emp_id = f + 1
 
@@ -280,6 +401,14 @@ class ILPScheduler:
 
 
 
+    def min_shortage(self):
+        """Total shortage below the minimums in the solution (the phase 1 optimum of ILPv2)."""
+        if isinstance(self.model, MatrixModel):
+            return float(self.values[self.y].sum())
+        return pulp.value(pulp.lpSum(
+            var for name, var in self.model.variablesDict().items() if name.startswith("y_")
+        ))
+
     # ------------ export / table ------------
 
     def export_csv(self, filename="calendario4.csv"):
@@ -290,6 +419,7 @@ class ILPScheduler:
         v.assignment = self.assignment
         export_schedule_to_csv(v, filename=filename, num_days=self.num_days)
 
+    @instrumentation.span("schedule_to_table")
     def to_table(self):
         header = ["funcionario"] + [f"Dia {i}" for i in range(1, self.num_days + 1)]
         rows = [header]
@@ -310,14 +440,18 @@ class ILPScheduler:
         return rows
 
 
-def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None):
+def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None, builder="matrix"):
     ilp = ILPScheduler(
         vacations_rows=vacations,
         minimuns_rows=minimuns,
         employees=employees,
         maxTime=maxTime,
         year=year,
-        shifts=shifts
+        shifts=shifts,
+        seed=seed,
+        deadline=deadline,
+        builder=builder,
     )
     ilp.build_model()
     ilp.solve(gap_rel=0.005)
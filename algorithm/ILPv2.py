@@ -8,6 +8,11 @@ Phase 2 (ILPScheduler2):
 
 Core binary variable:
     x_{i,d,t,e} = 1 if employee i works on day d, shift t, in team e; 0 otherwise.
+
+With the matrix builder phase 2 extends the phase 1 model (ILPScheduler2.from_phase1):
+only the z variables, the ideal shortage rows and the y_opt bound are added, and the
+phase 1 schedule is passed to CBC as a MIP start (kept by CBC only with
+solve(preprocess=False), see MatrixModel.solve_cbc).
 """
 
 import csv
@@ -28,19 +33,63 @@ from algorithm.utils import (
     get_team_code
 )
 from algorithm.ILP import ILPScheduler
+from algorithm.ilpMatrix import MatrixModel
 
 
 class ILPScheduler2(ILPScheduler):
     def __init__(self, vacations_rows, minimuns_rows, employees,
-                 maxTime, year=2025, shifts=2, y_opt=None):
+                 maxTime, year=2025, shifts=2, y_opt=None, seed=None, deadline=None, builder="matrix"):
 
-        super().__init__(vacations_rows, minimuns_rows, employees, maxTime, year, shifts)
+        super().__init__(vacations_rows, minimuns_rows, employees, maxTime, year, shifts, seed, deadline, builder)
         self.y_opt = y_opt  # From ILP1 – ensures we do not violate minimum feasibility
 
+    @classmethod
+    def from_phase1(cls, ilp1, y_opt):
+        """
+        Phase 2 on top of a solved matrix-built ILPScheduler: shares its parsed
+        inputs and model (which build_model extends in place) and starts CBC
+        from its schedule.
+        """
+        if not isinstance(ilp1.model, MatrixModel):
+            raise ValueError("from_phase1 needs a phase 1 built with builder='matrix'.")
+        ilp2 = cls.__new__(cls)
+        ilp2.__dict__.update(ilp1.__dict__)
+        ilp2.y_opt = y_opt
+        ilp2.status = None
+        ilp2.assignment = defaultdict(list)
+        return ilp2
+
     # ---------------------------------------------------------------------
     # MODEL CREATION (ILP2)
     # ---------------------------------------------------------------------
-    def build_model(self):
+    def build_matrix_model(self):
+        """
+        Phase 1 model (reused when it is already built) plus:
+          z     shortage below the ideals, same shape as y: z + coverage >= ideal
+          sum(y) <= y_opt
+          objective: minimize sum(z)
+        A phase 1 solution in self.values becomes the MIP start.
+        """
+        if self.model is None:
+            super().build_matrix_model()
+        model = self.model
+        ideais = self.requirements_array(self.inst.ideals)
+
+        self.z = model.add_vars(self.y.shape, ub=None, integer=False)
+        self.add_shortage_rows(model, self.z, ideais)
+        if self.y_opt is not None:
+            model.add_rows(self.y.ravel(), "<=", self.y_opt)
+        model.clear_objective()
+        model.set_cost(self.z, 1.0)
+
+        if self.values is not None:
+            start = np.zeros(model.num_cols)
+            start[:len(self.values)] = self.values
+            start[self.z] = np.maximum(0.0, ideais - self.coverage(self.values))
+            self.mip_start = start
+        self.values = None
+
+    def build_pulp_model(self):
         funcionarios = self.employees
         dias = self.dates
         t_range = range(1, self.shifts + 1)   # 1..N → working shifts 
@@ -221,25 +270,29 @@ class ILPScheduler2(ILPScheduler):
 # -------------------------------------------------------------------------
 # Solve ILP1 + ILP2 sequentially
 # -------------------------------------------------------------------------
-def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None):
+def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None, builder="matrix"):
     """
     Runs both ILP phases:
         1. ILP1: minimize shortages below MINIMUMS
         2. ILP2: minimize shortages below IDEALS (keeping ILP1’s minimum result)
+    With builder="matrix" phase 2 reuses the phase 1 model and solution.
     """
 
     # ------------------ Phase 1 ------------------
-    ilp1 = ILPScheduler(vacations, minimuns, employees, maxTime, year, shifts)
+    ilp1 = ILPScheduler(vacations, minimuns, employees, maxTime, year, shifts, seed, deadline, builder)
     ilp1.build_model()
     ilp1.solve()
 
     # Compute y_OPT (total minimum shortage from ILP1)
-    y_opt = pulp.value(pulp.lpSum(
-        var for name, var in ilp1.model.variablesDict().items() if name.startswith("y_")
-    ))
+    y_opt = ilp1.min_shortage()
 
     # ------------------ Phase 2 ------------------
-    ilp2 = ILPScheduler2(vacations, minimuns, employees, maxTime, year, shifts, y_opt=y_opt)
+    if builder == "matrix":
+        ilp2 = ILPScheduler2.from_phase1(ilp1, y_opt)
+    else:
+        ilp2 = ILPScheduler2(vacations, minimuns, employees, maxTime, year, shifts, y_opt=y_opt, seed=seed,
+                             deadline=deadline, builder=builder)
     ilp2.build_model()
     ilp2.solve()
     ilp2.export_csv("calendario_ilp2.csv")
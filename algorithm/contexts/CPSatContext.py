@@ -13,7 +13,7 @@ class CPSatContext:
         self.num_days = num_days
         self.shifts = shifts
         self.off = off                
-        self.shift_id = shift_id      
+        self.shift_id = shift_id      # None in the compact formulation
         self.y = y                    
         self.vac_mask = vac_mask      
         self.allowed_teams_per_emp = allowed_teams_per_emp  
@@ -0,0 +1,103 @@
+class EmployeeState:
+    """
+    Compact schedule state of one employee for greedy feasibility checks.
+    Days and shifts are 1-based, shift 0 means off.
+
+      worked / worked_rev: bitmaps of worked days (bit d, and bit num_days+1-d),
+                           so the run of worked days on either side of a day
+                           is a trailing-ones count instead of a scan
+      shift_of:            day -> shift, padded with an off day at both ends;
+                           the earliest one when a day holds several shifts
+      shift_mask:          day -> bit s-1 set for every shift held that day
+      special_worked:      worked Sundays/holidays
+      days_worked:         worked days
+    """
+
+    __slots__ = ("num_days", "special", "worked", "worked_rev", "shift_of",
+                 "shift_mask", "special_worked", "days_worked")
+
+    def __init__(self, num_days, special_days):
+        self.num_days = int(num_days)
+        self.special = bytearray(self.num_days + 2)
+        for day in special_days:
+            if 1 <= day <= self.num_days:
+                self.special[day] = 1
+        self.worked = 0
+        self.worked_rev = 0
+        self.shift_of = bytearray(self.num_days + 2)
+        self.shift_mask = bytearray(self.num_days + 2)
+        self.special_worked = 0
+        self.days_worked = 0
+
+    @classmethod
+    def from_assignments(cls, num_days, special_days, assignments):
+        """Builds the state from [(day, shift, team)] entries."""
+        state = cls(num_days, special_days)
+        for (d, s, _t) in assignments:
+            state.assign(d, s)
+        return state
+
+    # ---------- updates ----------
+
+    def assign(self, d, s):
+        self.shift_mask[d] |= 1 << (s - 1)
+        if self.shift_of[d]:
+            self.shift_of[d] = min(self.shift_of[d], s)  # keep the earliest shift of the day
+            return
+        self.shift_of[d] = s
+        self.worked |= 1 << d
+        self.worked_rev |= 1 << (self.num_days + 1 - d)
+        self.days_worked += 1
+        self.special_worked += self.special[d]
+
+    def unassign(self, d, s):
+        """Drops shift s of day d; the day only becomes off once none of its shifts is left."""
+        mask = self.shift_mask[d] & ~(1 << (s - 1))
+        if mask == self.shift_mask[d]:
+            return
+        self.shift_mask[d] = mask
+        if mask:
+            self.shift_of[d] = (mask & -mask).bit_length()  # earliest remaining shift
+            return
+        self.shift_of[d] = 0
+        self.worked &= ~(1 << d)
+        self.worked_rev &= ~(1 << (self.num_days + 1 - d))
+        self.days_worked -= 1
+        self.special_worked -= self.special[d]
+
+    # ---------- queries ----------
+
+    @staticmethod
+    def _trailing_ones(x):
+        return (x ^ (x + 1)).bit_length() - 1
+
+    def is_worked(self, d):
+        return self.shift_of[d] != 0
+
+    def get_shift(self, d):
+        """Shift worked on day d, None when off (or outside the year)."""
+        if 0 <= d < len(self.shift_of):
+            return self.shift_of[d] or None
+        return None
+
+    def get_days_worked(self):
+        return [d for d in range(1, self.num_days + 1) if self.shift_of[d]]
+
+    def run_length_with(self, d):
+        """Length of the run of worked days through d if d were worked."""
+        right = self._trailing_ones(self.worked >> (d + 1))
+        left = self._trailing_ones(self.worked_rev >> (self.num_days + 2 - d))
+        return left + 1 + right
+
+    def special_worked_with(self, d):
+        """Worked Sundays/holidays if d were worked."""
+        return self.special_worked + (0 if self.shift_of[d] else self.special[d])
+
+    def days_worked_with(self, d):
+        return self.days_worked + (0 if self.shift_of[d] else 1)
+
+    def breaks_shift_order(self, d, s):
+        """True if working shift s on day d is earlier than the previous day's shift or later than the next day's."""
+        prev_s = self.shift_of[d - 1] if d >= 1 else 0
+        next_s = self.shift_of[d + 1] if d + 1 < len(self.shift_of) else 0
+        return bool(prev_s and s < prev_s) or bool(next_s and next_s < s)
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from typing import Dict, List, Tuple, Set, Callable, Optional
 import numpy as np
 
+from algorithm.contexts.EmployeeState import EmployeeState
+
 @dataclass
 class GreedyContext:
     """
@@ -14,7 +16,7 @@ class GreedyContext:
                  min_required, ideal_required,
                  special_days, cover_count,
                  e=None, d=None, s=None, t=None,
-                 assignment=None):
+                 assignment=None, states=None):
         self.Employees = Employees
         self.num_days = num_days
         self.shifts = shifts
@@ -25,19 +27,25 @@ class GreedyContext:
         self.special_days = special_days
         self.cover_count = cover_count
         self.assignment = assignment or {}
+        # emp -> EmployeeState; built from assignment on first use when not given
+        self.states = states if states is not None else {}
 
         self.e, self.d, self.s, self.t = e, d, s, t
 
         self.score = 0
 
+    def state(self, e):
+        st = self.states.get(e)
+        if st is None:
+            st = EmployeeState.from_assignments(self.num_days, self.special_days, self.assignment.get(e, []))
+            self.states[e] = st
+        return st
+
     def get_days_worked(self, e):
-        return [day for (day, _s, _t) in self.assignment.get(e, [])]
+        return self.state(e).get_days_worked()
 
     def get_shift(self, e, day):
-        for (d, s, _t) in self.assignment.get(e, []):
-            if d == day:
-                return s
-        return None
+        return self.state(e).get_shift(day)
 
     def add_score(self, value):
         self.score += value
@@ -0,0 +1,297 @@
+import math
+import os
+from collections import defaultdict
+
+from ortools.sat.python import cp_model
+
+from algorithm import instrumentation
+from algorithm.utils import schedule_to_table
+
+
+FORMULATIONS = ("classic", "compact")
+
+
+def add_assignment_vars(m, Employees, D, S, vac_mask, allowed_teams_per_emp, formulation="classic"):
+    """
+    Decision variables of the shift models, with exactly one choice per (employee, day):
+      off[(e, day)]          employee is off (the only choice on vacation days)
+      y[(e, day, s, t)]      employee works shift s for team t
+      shift_id[(e, day)]     "classic": IntVar = s when working, 0 when off, channeled
+                             from off/y with OnlyEnforceIf; None in "compact", where
+                             constraints work on the y literals directly
+    Returns (off, shift_id, y).
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown CP-SAT formulation '{formulation}', expected one of {FORMULATIONS}.")
+    compact = formulation == "compact"
+
+    off, y = {}, {}
+    shift_id = None if compact else {}
+    for e in Employees:
+        for day in D:
+            off[(e, day)] = m.NewBoolVar(f"off_{e}_{day}")
+            if not compact:
+                shift_id[(e, day)] = m.NewIntVar(0, max(S), f"shift_{e}_{day}")
+            if not vac_mask[(e, day)]:
+                for s in S:
+                    for t in allowed_teams_per_emp[e]:
+                        y[(e, day, s, t)] = m.NewBoolVar(f"y_{e}_{day}_{s}_{t}")
+
+    for e in Employees:
+        for day in D:
+            choices = [off[(e, day)]]
+            if not vac_mask[(e, day)]:
+                choices += [y[(e, day, s, t)] for s in S for t in allowed_teams_per_emp[e]]
+            if compact:
+                m.AddExactlyOne(choices)
+            else:
+                m.Add(sum(choices) == 1)
+
+    if not compact:
+        # off -> shift_id = 0, y[e, day, s, t] -> shift_id = s
+        for e in Employees:
+            for day in D:
+                m.Add(shift_id[(e, day)] == 0).OnlyEnforceIf(off[(e, day)])
+                if not vac_mask[(e, day)]:
+                    for s in S:
+                        for t in allowed_teams_per_emp[e]:
+                            m.Add(shift_id[(e, day)] == s).OnlyEnforceIf(y[(e, day, s, t)])
+    return off, shift_id, y
+
+
+def add_no_earlier_shift(m, Employees, D, S, off, shift_id, y, allowed_teams_per_emp):
+    """
+    No earlier shift on the day after a worked day (no T->M, N->M, N->T), for consecutive days of D.
+    classic: shift_id[d + 1] >= shift_id[d] when both days are worked
+    compact: one at-most-one clause per (e, day, s) over shift s today and
+             every earlier shift tomorrow
+    """
+    if shift_id is not None:
+        for e in Employees:
+            for day in D[:-1]:
+                m.Add(shift_id[(e, day + 1)] >= shift_id[(e, day)]).OnlyEnforceIf(
+                    [off[(e, day)].Not(), off[(e, day + 1)].Not()]
+                )
+        return
+
+    for e in Employees:
+        teams = allowed_teams_per_emp[e]
+        for day in D[:-1]:
+            for s in S:
+                today = [y[(e, day, s, t)] for t in teams if (e, day, s, t) in y]
+                earlier = [y[(e, day + 1, s2, t)] for s2 in S if s2 < s for t in teams if (e, day + 1, s2, t) in y]
+                if today and earlier:
+                    m.AddAtMostOne(today + earlier)
+
+
+@instrumentation.span("extract")
+def extract_assignment(value, y):
+    """
+    emp_id(1-based) -> [(day, shift, team_id)] from a CP-SAT solution.
+    value is solver.Value or a solution callback's Value.
+    """
+    assign = defaultdict(list)
+    for (e, day, s, t), v in y.items():
+        if value(v):
+            assign[e + 1].append((day, s, t))
+    for entries in assign.values():
+        entries.sort()
+    return assign
+
+
+class SolutionCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Records every improving CP-SAT solution as (seconds, objective, best bound)
+    in `improvements` and forwards it to an optional ProgressReporter.
+      terms:   {name: linear expression} reported as the criteria breakdown
+      extract: value -> assignment (see extract_assignment), used for snapshots
+      table:   assignment -> schedule table
+    """
+
+    def __init__(self, progress=None, terms=None, extract=None, table=None):
+        super().__init__()
+        self.progress = progress
+        self.terms = terms or {}
+        self.extract = extract
+        self.table = table
+        self.improvements = []
+
+    def on_solution_callback(self):
+        self.improvements.append((round(self.WallTime(), 2), self.ObjectiveValue(), self.BestObjectiveBound()))
+        if self.progress is None:
+            return
+        schedule = None
+        if self.extract is not None and self.table is not None:
+            schedule = lambda: self.table(self.extract(self.Value))
+        self.progress.update(
+            len(self.improvements),
+            self.ObjectiveValue(),
+            lambda: {name: self.Value(expr) for name, expr in self.terms.items()},
+            schedule,
+        )
+
+    def summary(self):
+        if not self.improvements:
+            return "no solution found"
+        first_t, first_obj, _ = self.improvements[0]
+        last_t, last_obj, bound = self.improvements[-1]
+        return (f"{len(self.improvements)} improving solutions, first at {first_t}s (obj={first_obj}), "
+                f"best at {last_t}s (obj={last_obj}, bound={bound})")
+
+
+def add_schedule_hint(m, assignment, Employees, D, off, shift_id, y):
+    """
+    Hints every off / shift_id / y variable from an existing schedule
+    (emp_id(1-based) -> [(day, shift, team_id)], e.g. from the greedy solvers).
+    Cells without an entry are hinted as off; shift_id is None in the compact formulation.
+    """
+    chosen = {}  # (e, day) -> (shift, team), first usable entry per day
+    for e in Employees:
+        for (d, s, t) in assignment.get(e + 1, []):
+            if (e, d, s, t) in y:  # skip cells outside the model (vacation, team not allowed)
+                chosen.setdefault((e, d), (s, t))
+    for e in Employees:
+        for day in D:
+            s_t = chosen.get((e, day))
+            m.AddHint(off[(e, day)], s_t is None)
+            if shift_id is not None:
+                m.AddHint(shift_id[(e, day)], s_t[0] if s_t else 0)
+    for (e, day, s, t), var in y.items():
+        m.AddHint(var, chosen.get((e, day)) == (s, t))
+
+
+WARM_STARTS = ("greedy", "grhc")
+
+
+@instrumentation.span("warm_start")
+def warm_start_assignment(kind, vacations, minimuns, employees, year, shifts, seed=None, seconds=30.0,
+                          deadline=None):
+    """
+    Fast schedule used as a CP-SAT hint:
+      "greedy": GreedyRandomized construction
+      "grhc":   greedy construction + a short hill climbing (GreedyClimbing)
+    Both get at most `seconds`, within the task deadline (and stop on its cancellation).
+    Returns emp_id(1-based) -> [(day, shift, team_id)].
+    """
+    from algorithm.problemInstance import get_instance
+    from algorithm.deadline import Deadline
+
+    if kind not in WARM_STARTS:
+        raise ValueError(f"Unknown warm start '{kind}', expected one of {WARM_STARTS}.")
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    deadline = deadline.sub(seconds) if deadline is not None else Deadline(seconds)
+    common = dict(
+        employees=list(inst.emp_ids), num_days=inst.num_days, holidays_set=inst.holiday_dates,
+        vacs=inst.vacs, mins=inst.mins, ideals=inst.ideals, teams=inst.teams, num_iter=10,
+        year=inst.year, shifts=shifts, seed=seed, deadline=deadline,
+    )
+    if kind == "greedy":
+        from algorithm.greedyRandomized import GreedyRandomized
+        scheduler = GreedyRandomized(**common)
+        scheduler.build_schedule()
+    else:
+        from algorithm.greedyClimbing import GreedyClimbing
+        scheduler = GreedyClimbing(**common)
+        scheduler.build_schedule()
+        scheduler.hill_climbing(maxTime=None)  # bounded by the deadline
+    return scheduler.assignment
+
+
+def warm_start_budget(solver, deadline=None, share=0.1, cap=30.0):
+    """Seconds for the warm start: a share of the CP-SAT time limit, at most cap."""
+    limit = solver.parameters.max_time_in_seconds
+    if deadline is not None:
+        limit = deadline.limit(limit if limit < float("inf") else None) or float("inf")
+    return min(cap, share * limit)
+
+
+# --------------------------
+# Solver profiles
+# --------------------------
+SOLVER_PROFILES = {
+    # first good schedule fast: no LP relaxation, no symmetry detection, stop within 5% of the bound
+    "fast-feasible": {"linearization_level": 0, "symmetry_level": 0, "relative_gap_limit": 0.05},
+    # CP-SAT defaults
+    "balanced": {"linearization_level": 1, "symmetry_level": 2, "relative_gap_limit": 0.0},
+    # prove optimality: full LP relaxation and symmetry breaking
+    "optimal": {"linearization_level": 2, "symmetry_level": 4, "relative_gap_limit": 0.0},
+}
+DEFAULT_PROFILE = "balanced"
+# a single worker runs plain sequential search without the LNS / feasibility-jump
+# portfolio, which was far slower to a first schedule even on a one-core container
+MIN_WORKERS = 2
+
+
+def _cgroup_cpu_quota():
+    """CPU quota of the container in cores (cgroup v2 cpu.max or v1 cfs quota), None if unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_workers():
+    """Search workers this process can keep busy: its CPU affinity, capped by the cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on every platform
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def resolve_profile(name=None, workers=None):
+    """Parameters of a named profile plus the worker count, as recorded in the schedule metadata."""
+    name = name or DEFAULT_PROFILE
+    if name not in SOLVER_PROFILES:
+        raise ValueError(f"Unknown solver profile '{name}', expected one of {tuple(SOLVER_PROFILES)}.")
+    workers = max(MIN_WORKERS, int(workers or available_workers()))
+    return {"name": name, "num_workers": workers, **SOLVER_PROFILES[name]}
+
+
+def apply_profile(solver, name=None, workers=None):
+    """Sets the CP-SAT parameters of a solver profile; returns them."""
+    profile = resolve_profile(name, workers)
+    solver.parameters.num_workers = profile["num_workers"]
+    solver.parameters.linearization_level = profile["linearization_level"]
+    solver.parameters.symmetry_level = profile["symmetry_level"]
+    solver.parameters.relative_gap_limit = profile["relative_gap_limit"]
+    print(f"[CP-SAT] Solver profile: {profile}")
+    return profile
+
+
+@instrumentation.span("solve")
+def solve_model(solver, m, deadline=None, callback=None):
+    """
+    solver.Solve(m) under the task deadline: the time limit is capped to the time
+    left and the search is stopped if the task is cancelled.
+    """
+    if deadline is not None:
+        current = solver.parameters.max_time_in_seconds
+        limit = deadline.limit(current if current < float("inf") else None)
+        if limit is not None:
+            solver.parameters.max_time_in_seconds = float(limit)
+        with deadline.watch(solver.StopSearch):
+            return solver.Solve(m, callback)
+    return solver.Solve(m, callback)
+
+
+def table_for(employees, vacs, num_days, shifts):
+    """assignment -> schedule table for the given employees/vacations."""
+    return lambda assignment: schedule_to_table(
+        employees=employees, vacs=vacs, assignment=assignment, num_days=num_days, shifts=int(shifts)
+    )
@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag for one task.
+    Backed by a threading.Event by default; pass a multiprocessing (Manager)
+    Event when the token has to reach a solver running in another process.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Deadline:
+    """
+    Time budget of one solver run, optionally tied to a CancellationToken.
+    Local search polls expired(); CP-SAT/CBC get remaining() as their time
+    limit and watch() to stop the search on cancellation.
+    Times are wall-clock (time.time) so a Deadline can be sent to another process.
+    """
+
+    POLL_INTERVAL = 0.2  # seconds between token reads (a Manager event is an IPC call)
+    DEFAULT_SECONDS = 600.0  # run budget when neither maxTime nor the task sets a time limit
+
+    def __init__(self, seconds=None, token=None):
+        self.end = time.time() + float(seconds) if seconds is not None else None
+        self.token = token
+        self._cancelled = False
+        self._next_poll = 0.0
+
+    @classmethod
+    def from_minutes(cls, minutes, token=None):
+        """Task maxTime is given in minutes; None/0 means no time limit."""
+        return cls(float(minutes) * 60 if minutes else None, token)
+
+    @classmethod
+    def until(cls, end, token=None):
+        """Deadline at wall-clock time `end` (None = no time limit), e.g. another Deadline's end."""
+        deadline = cls(None, token)
+        deadline.end = end
+        return deadline
+
+    def sub(self, seconds):
+        """Deadline of one phase of the run: at most `seconds`, never past this one, same token."""
+        return Deadline(self.limit(seconds), self.token)
+
+    @property
+    def cancelled(self):
+        if not self._cancelled and self.token is not None:
+            now = time.time()
+            if now >= self._next_poll:
+                self._next_poll = now + self.POLL_INTERVAL
+                self._cancelled = self.token.cancelled
+        return self._cancelled
+
+    def remaining(self):
+        """Seconds left, None without a time limit, 0 once cancelled."""
+        if self.cancelled:
+            return 0.0
+        if self.end is None:
+            return None
+        return max(0.0, self.end - time.time())
+
+    def expired(self):
+        return self.cancelled or (self.end is not None and time.time() >= self.end)
+
+    def limit(self, seconds):
+        """The smaller of a solver's own limit (None = unlimited) and the time left."""
+        left = self.remaining()
+        if left is None:
+            return seconds
+        return left if seconds is None else min(seconds, left)
+
+    @staticmethod
+    def budget(seconds=None, deadline=None):
+        """Seconds of a solver run: its own limit capped by the task deadline, DEFAULT_SECONDS if neither has one."""
+        if deadline is not None:
+            seconds = deadline.limit(seconds)
+        return Deadline.DEFAULT_SECONDS if seconds is None else seconds
+
+    @contextmanager
+    def watch(self, stop, interval=0.5):
+        """Calls stop() from a helper thread if the run is cancelled while the block runs."""
+        if self.token is None:
+            yield
+            return
+        done = threading.Event()
+
+        def poll():
+            while not done.wait(interval):
+                if self.token.cancelled:
+                    self._cancelled = True
+                    stop()
+                    return
+
+        watcher = threading.Thread(target=poll, daemon=True)
+        watcher.start()
+        try:
+            yield
+        finally:
+            done.set()
+            watcher.join()
+
+
+
+# --------------------------
+# Cancellation in pool workers
+# --------------------------
+_worker_token = None
+
+
+def _set_worker_token(token):
+    global _worker_token
+    _worker_token = token
+
+
+def worker_token():
+    """CancellationToken of the task in a cancellable_pool worker (None elsewhere)."""
+    return _worker_token
+
+
+@contextmanager
+def cancellable_pool(max_workers, deadline=None):
+    """
+    ProcessPoolExecutor whose workers see the task's cancellation: build their
+    Deadline(seconds, worker_token()). A Manager token (TaskExecutor process mode)
+    is handed over as is; a thread-mode token is mirrored into a multiprocessing
+    Event while the block runs. The caller shuts the pool down (wait=False on cancel:
+    the running jobs stop on the token).
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    token = deadline.token if deadline is not None else None
+    mirrored = token is not None and isinstance(token._event, threading.Event)
+    if mirrored:
+        token = CancellationToken(multiprocessing.Event())
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_set_worker_token, initargs=(token,))
+    if mirrored:
+        with deadline.watch(token.cancel, interval=Deadline.POLL_INTERVAL):
+            yield pool
+    else:
+        yield pool
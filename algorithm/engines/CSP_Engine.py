@@ -12,25 +12,26 @@ from algorithm.utils import (
     build_calendar,
     schedule_to_table,
 )
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
+from algorithm.cpsatTools import (
+    apply_profile,
+    add_assignment_vars,
+    extract_assignment,
+    SolutionCallback,
+    solve_model,
+    table_for,
+    add_schedule_hint,
+    warm_start_assignment,
+    warm_start_budget,
+)
 
 from algorithm.engines.rules_engine import RuleEngine, register_default_handlers
 from algorithm.contexts.CPSatContext import CPSatContext
 
-def _build_allowed_teams(employees):
-    """
-    Convert employee 'teams' labels to internal numeric team IDs.
-    Fallback to team 'A' when none provided.
-    """
-    allowed = []
-    for emp in employees:
-        codes = [get_team_code(t) for t in emp.get("teams", []) if t]
-        ids = [get_team_id(c) for c in codes if c]
-        if not ids:
-            ids = [get_team_id("A")]
-        allowed.append(ids)
-    return allowed
-
-def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None):
+def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None, progress=None, warm_start=None,
+          formulation="classic", solver_profile=None):
 
     num_days = 365
     n_employees = len(employees)
@@ -38,11 +39,12 @@ def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,
     Employees = range(n_employees)           # 0-based internal
     D = range(1, num_days + 1)               # 1-based days for model indexing
 
-    allowed_teams_per_emp = _build_allowed_teams(employees)
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    allowed_teams_per_emp = inst.allowed_teams
 
     # Inputs → dictionaries
-    vacs_dict = rows_to_vac_dict(vacations)                      # {emp_id(1b): [days]}
-    mins_raw, _ideals_raw = rows_to_req_dicts(minimuns)          # {(day,shift,team_id): req}
+    vacs_dict = inst.vacs                                        # {emp_id(1b): [days]}
+    mins_raw, _ideals_raw = inst.mins, inst.ideals               # {(day,shift,team_id): req}
 
     # Normalize mins to CP-SAT domain / filter by shift range
     min_required = {}
@@ -56,12 +58,7 @@ def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,
                 min_required[(d, s, t)] = req
 
     # Special days (PT holidays + Sundays)
-    year = int(year) if year is not None else 2025
-    dias_ano, sundays_1based = build_calendar(year)
-    pt_holidays = hl.country_holidays("PT", years=[year])
-    start_date = dias_ano[0].date()
-    special_days = {(d - start_date).days + 1 for d in pt_holidays}
-    special_days |= set(sundays_1based)
+    special_days = set(inst.special_days)
 
     # Vacation mask (0-based employees, 1-based days)
     vac_mask = {(i, d): False for i in Employees for d in D}
@@ -71,19 +68,6 @@ def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,
             if 1 <= d <= num_days:
                 vac_mask[(i, d)] = True
 
-    m = cp_model.CpModel()
-
-    # Vars
-    y, off, shift_id = {}, {}, {}
-    for e in Employees:
-        for day in D:
-            off[(e, day)] = m.NewBoolVar(f"off_{e}_{day}")
-            shift_id[(e, day)] = m.NewIntVar(0, int(shifts), f"shift_{e}_{day}")
-            if not vac_mask[(e, day)]:
-                for s in S:
-                    for t in allowed_teams_per_emp[e]:
-                        y[(e, day, s, t)] = m.NewBoolVar(f"y_{e}_{day}_{s}_{t}")
-
     # Build rule engine (1-based IDs for metadata)
     teams_map = {i + 1: allowed_teams_per_emp[i] for i in Employees}
     engine = RuleEngine(
@@ -102,67 +86,66 @@ def solve(*, vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,
     if not engine.has_vac_block:
         vac_mask = {(e, d): False for e in Employees for d in D}
 
-    # Exactly-one choice per (employee, day)
-    for e in Employees:
-        for day in D:
-            choices = [off[(e, day)]]
-            if not vac_mask[(e, day)]:
-                choices += [y[(e, day, s, t)] for s in S for t in allowed_teams_per_emp[e]]
-            m.Add(sum(choices) == 1)
-
-    # Channeling shift_id ↔ off/y
-    for e in Employees:
-        for day in D:
-            m.Add(shift_id[(e, day)] == 0).OnlyEnforceIf(off[(e, day)])
-            if not vac_mask[(e, day)]:
-                for s in S:
-                    for t in allowed_teams_per_emp[e]:
-                        v = y.get((e, day, s, t))
-                        if v is not None:
-                            m.Add(shift_id[(e, day)] == s).OnlyEnforceIf(v)
-
-    # Apply rules via handlers
-    ctx = CPSatContext(
-        m=m, Employees=Employees, D=D, S=S, num_days=num_days, shifts=int(shifts),
-        off=off, shift_id=shift_id, y=y,
-        vac_mask=vac_mask,
-        allowed_teams_per_emp=allowed_teams_per_emp,
-        min_required=min_required,
-        special_days=special_days,
-    )
-    engine.apply_cp_sat(ctx)
-
-    # Objective (handlers contribute terms)
-    if ctx.obj_terms:
-        m.Minimize(sum(ctx.obj_terms))
-    else:
-        m.Minimize(0)
+    with instrumentation.span("build"):
+        m = cp_model.CpModel()
+
+        # Vars + exactly-one choice per (employee, day) (+ shift_id channeling in the classic formulation)
+        off, shift_id, y = add_assignment_vars(m, Employees, D, S, vac_mask, allowed_teams_per_emp, formulation)
+
+        # Apply rules via handlers
+        ctx = CPSatContext(
+            m=m, Employees=Employees, D=D, S=S, num_days=num_days, shifts=int(shifts),
+            off=off, shift_id=shift_id, y=y,
+            vac_mask=vac_mask,
+            allowed_teams_per_emp=allowed_teams_per_emp,
+            min_required=min_required,
+            special_days=special_days,
+        )
+        engine.apply_cp_sat(ctx)
+        instrumentation.count("rule_handler_calls", engine.handler_calls)
+
+        # Objective (handlers contribute terms)
+        if ctx.obj_terms:
+            m.Minimize(sum(ctx.obj_terms))
+        else:
+            m.Minimize(0)
 
     # ----- Solve -----
     solver = cp_model.CpSolver()
     if maxTime is not None:
         solver.parameters.max_time_in_seconds = float(int(maxTime) * 60)
-    solver.parameters.num_search_workers = 8
-
-    status = solver.Solve(m)
+    # workers from the available cores, search parameters from the profile
+    profile = apply_profile(solver, solver_profile)
+    if progress is not None:
+        progress.solver_profile(profile)
+    if seed is not None:
+        solver.parameters.random_seed = int(seed) % 2**31
+
+    # optional hint from a fast greedy ("greedy") or greedy + hill climbing ("grhc") schedule
+    if warm_start:
+        hint = warm_start_assignment(warm_start, vacations, minimuns, employees, year, shifts, seed,
+                                     seconds=warm_start_budget(solver, deadline), deadline=deadline)
+        add_schedule_hint(m, hint, Employees, D, off, shift_id, y)
+
+    def extract(value):
+        return extract_assignment(value, y)
+
+    # improving solutions are timestamped and go to the progress channel (criteria breakdown + snapshots)
+    callback = SolutionCallback(
+        progress,
+        extract=extract,
+        table=table_for(
+            list(range(1, n_employees + 1)),
+            {emp_id: vacs_dict.get(emp_id, []) for emp_id in range(1, n_employees + 1)},
+            num_days, shifts,
+        ),
+    )
+    status = solve_model(solver, m, deadline, callback)
+    # on a time limit or cancellation the solver keeps the best solution found so far (FEASIBLE)
+    print(f"[CP-SAT] {solver.StatusName(status)}: {callback.summary()}")
 
     # ----- Extract solution -----
-    assign = defaultdict(list)  # emp_id(1b) -> [(day, shift, team_id)]
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for e in Employees:
-            emp_id = e + 1
-            for day in D:
-                if solver.Value(off[(e, day)]) == 0:
-                    s_val = solver.Value(shift_id[(e, day)])
-                    if s_val > 0:
-                        team_val = None
-                        for t in allowed_teams_per_emp[e]:
-                            v = y.get((e, day, s_val, t))
-                            if v is not None and solver.Value(v) == 1:
-                                team_val = t
-                                break
-                        if team_val is not None:
-                            assign[emp_id].append((day, s_val, team_val))
+    assign = extract(solver.Value) if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else defaultdict(list)
 
     # Export CSV
     class View: pass
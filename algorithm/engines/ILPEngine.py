@@ -3,6 +3,10 @@ import pandas as pd
 import holidays
 from algorithm.engines.rules_engine import RuleEngine, register_default_ilp_handlers
 from algorithm.contexts.ILPContext import ILPContext
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
+from algorithm.ilpMatrix import solve_pulp_cbc
+from algorithm.deadline import Deadline
 from algorithm.utils import (
     rows_to_req_dicts,
     rows_to_vac_dict,
@@ -58,6 +62,7 @@ class ILPEngine:
         register_default_ilp_handlers(self.engine)
         print(f"[DEBUG] ILPEngine rule handlers registered ({len(self.engine.rules)} rules).")
 
+    @instrumentation.span("build")
     def build(self):
         """Applies all ILP rule handlers to build the model constraints."""
         ctx = ILPContext(
@@ -73,9 +78,10 @@ class ILPEngine:
             min_required=self.min_required,
         )
 
-        from algorithm.rules.handlers.rules_handlers_ilp import i_one_shift_per_day
+        from algorithm.handlers.rules_handlers_ilp import i_one_shift_per_day
         i_one_shift_per_day(None, ctx) 
         self.engine.apply_ilp(ctx)
+        instrumentation.count("rule_handler_calls", self.engine.handler_calls)
 
         # Assemble objective once from accumulated penalties
         if ctx.objective_terms:
@@ -84,17 +90,19 @@ class ILPEngine:
         print(f"[DEBUG] ILP model built: {len(self.model.constraints)} constraints.")
         return ctx
 
-    def solve(self, max_seconds=3600, gap_rel=0.005):
-        """Runs PuLP solver and extracts assignments."""
+    def solve(self, max_seconds=None, gap_rel=0.005, seed=None, deadline=None):
+        """Runs CBC on the PuLP model (stopped by a task cancellation) and extracts assignments."""
+        max_seconds = max(1, int(Deadline.budget(max_seconds, deadline)))
         print(f"[DEBUG] Solving ILP model (timeLimit={max_seconds}s, gap={gap_rel})...")
-        solver = pulp.PULP_CBC_CMD(msg=True, timeLimit=max_seconds, gapRel=gap_rel)
-        status = self.model.solve(solver)
+        with instrumentation.span("solve"):
+            status = solve_pulp_cbc(self.model, time_limit=max_seconds, gap_rel=gap_rel, seed=seed, deadline=deadline)
         print(f"[DEBUG] ILP Solver status: {pulp.LpStatus[status]}")
 
         # Extract assignments
         self.assignment = self._extract_assignments()
         return status
 
+    @instrumentation.span("extract")
     def _extract_assignments(self):
         """Extract (day, shift, team_id) tuples for each employee."""
         assignment = {}
@@ -112,12 +120,14 @@ class ILPEngine:
                     assignment[emp_id].append((day_idx, t_sel, team_id))
         return assignment
 
-def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None):
+def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None):
     print(f"\n[DEBUG] ===== Starting ILP Engine =====")
     print(f"[DEBUG] Year={year}, Shifts={shifts}, MaxTime={maxTime}, Employees={len(employees)}")
 
-    mins, _ = rows_to_req_dicts(minimuns)       
-    vacs_dict = rows_to_vac_dict(vacations)     
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    mins = inst.mins
+    vacs_dict = inst.vacs
 
     teams = {}
     for idx, e in enumerate(employees):
@@ -134,8 +144,7 @@ def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=No
     num_days = len(dates)
 
     # --- Sundays + PT Holidays
-    feriados_pt = holidays.country_holidays("PT", years=[year])
-    sundays_holidays = [d for d in dates if d.weekday() == 6 or d.date() in feriados_pt]
+    sundays_holidays = [d for day, d in enumerate(dates, start=1) if day in inst.special_days]
 
     # --- Remap mins from (day, shift, team_id) -> (date, team_code, shift)
     from algorithm.utils import TEAM_ID_TO_CODE, get_team_id  # ensure imported
@@ -161,7 +170,7 @@ def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=No
     )
 
     ctx = ilp_engine.build()
-    ilp_engine.solve(max_seconds=int(maxTime) * 60 if maxTime else 1800)
+    ilp_engine.solve(max_seconds=int(maxTime) * 60 if maxTime else None, seed=seed, deadline=deadline)
 
     # --- Export CSV (includes vacations)
     ilp_engine.vacs_1based = {i + 1: vac_0based.get(i, []) for i in ilp_engine.employees}
@@ -5,7 +5,10 @@ from collections import defaultdict
 import numpy as np
 import pandas as pd
 import holidays
-from algorithm.engines.rules_engine import RuleEngine
+from algorithm.engines.rules_engine import RuleEngine, register_default_greedy_handlers
+from algorithm import scoring
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
 
 from algorithm.utils import (
     TEAM_CODE_TO_ID,
@@ -26,8 +29,11 @@ class GreedyClimbing:
     """
 
     def __init__(self, employees, num_days, holidays_set, vacs, mins, ideals, teams,
-                 num_iter=10, maxTime=None, year=2025, shifts=2, rules=None):
+                 num_iter=10, maxTime=None, year=2025, shifts=2, rules=None, seed=None, deadline=None):
         self.employees = employees
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
         self.num_days = num_days
         self.shifts = int(shifts) 
         self.vacs = vacs
@@ -45,10 +51,20 @@ class GreedyClimbing:
         self.fds = np.zeros_like(self.vac_array, dtype=bool)
         for day in self.sunday:
             self.fds[:, day - 1] = True
+        self.special_mask = np.zeros(self.num_days, dtype=bool)
+        for day in set(self.holidays).union(self.sunday):
+            if 1 <= day <= self.num_days:
+                self.special_mask[day - 1] = True
+        team_ids = {t for ids in self.teams.values() for t in ids}
+        team_ids.update(t for (_d, _s, t) in self.mins.keys())
+        self.req_tensor = scoring.requirements_tensor(
+            self.mins, self.num_days, self.shifts, max(team_ids) if team_ids else 0
+        )
         # timing: maxTime in seconds for greedy phase
         self.maxTime = maxTime
         self.maxTime_sec = int(maxTime) * 60 if maxTime is not None else None
         self.start_time = time.time()
+        self.deadline = deadline  # algorithm.deadline.Deadline (task budget / cancellation)
         self.rule_engine = RuleEngine(
             rules_config=(rules or {"rules": []}),
             num_days=self.num_days,
@@ -59,6 +75,7 @@ class GreedyClimbing:
             special_days_1based=set(self.holidays).union(self.sunday),
             target_workdays=223
         )
+        register_default_greedy_handlers(self.rule_engine)
 
     # ---------- helpers ----------
     def _create_vacation_array(self):
@@ -83,11 +100,15 @@ class GreedyClimbing:
     # ---------- greedy construction ----------
     def build_schedule(self):
         all_days = set(range(1, self.num_days + 1))
+        probes = 0
 
         while not self.is_complete():
             if self.maxTime_sec is not None and time.time() - self.start_time >= self.maxTime_sec:
                 print("Maximum time reached, stopping generation.11")
                 break
+            if self.deadline is not None and self.deadline.expired():
+                print("Task deadline reached or cancelled, stopping generation.")
+                break
 
             # Prefer employees with fewer allowed teams (1, then 2, then >=3)
             P = [p for p in self.employees if len(self.assignment[p]) < 223 and len(self.teams[p]) == 1]
@@ -100,7 +121,7 @@ class GreedyClimbing:
             if not P:
                 break
 
-            p = random.choice(P)
+            p = self.rng.choice(P)
             best = None
             best_val = float('inf')
             count = 0
@@ -112,10 +133,11 @@ class GreedyClimbing:
                 continue
 
             while best_val > 0 and count < self.num_iter and available_days:
-                d = random.choice(available_days)
-                s = random.choice(list(range(1, self.shifts + 1)))
+                d = self.rng.choice(available_days)
+                s = self.rng.choice(list(range(1, self.shifts + 1)))
 
                 count += 1
+                probes += 1
 
                 for t in self.teams[p]:
                     if self.f1(p, d, s, t):
@@ -129,6 +151,9 @@ class GreedyClimbing:
                 d, s, t = best
                 self.assignment[p].append((d, s, t))
                 self.schedule_table[(d, s, t)].append(p)
+                self.rule_engine.greedy_assign(p, d, s, t)
+
+        instrumentation.count("greedy_probes", probes)
 
     def is_complete(self):
         return all(len(self.assignment[p]) >= 223 for p in self.employees)
@@ -150,7 +175,20 @@ class GreedyClimbing:
                     if t > 0:
                         self.assignment[emp].append((d + 1, s + 1, t))
                         self.schedule_table[(d + 1, s + 1, t)].append(emp)
-
+        self.rule_engine.greedy_reset(self.assignment)
+
+    def _set_cell(self, emp_idx, d, s, old_t, new_t):
+        """Moves cell (d, s) (0-based) of employee emp_idx from team old_t to new_t (0 = off), indexes included."""
+        emp = self.employees[emp_idx]
+        day, shift, old_t, new_t = int(d) + 1, int(s) + 1, int(old_t), int(new_t)  # numpy ints overflow the bitmaps
+        if old_t > 0:
+            self.assignment[emp].remove((day, shift, old_t))
+            self.schedule_table[(day, shift, old_t)].remove(emp)
+            self.rule_engine.greedy_unassign(emp, day, shift, old_t)
+        if new_t > 0:
+            self.assignment[emp].append((day, shift, new_t))
+            self.schedule_table[(day, shift, new_t)].append(emp)
+            self.rule_engine.greedy_assign(emp, day, shift, new_t)
 
     def hill_climbing(self, max_iterations=400000, maxTime=60):
         max_seconds = maxTime * 60 if maxTime is not None else None
@@ -162,14 +200,18 @@ class GreedyClimbing:
 
         iteration = 0
         steps = 0
+        proposed = accepted = 0
 
         while iteration < max_iterations and best_score > 0:
             steps += 1
             if max_seconds is not None and (time.time() - start_hc) >= max_seconds:
                 print("Maximum time reached, stopping generation.")
                 break
+            if self.deadline is not None and self.deadline.expired():
+                print("Task deadline reached or cancelled, stopping local search.")
+                break
 
-            emp_idx = np.random.randint(len(self.employees))
+            emp_idx = self.np_rng.integers(len(self.employees))
             emp = self.employees[emp_idx]
 
             available_days = [d for d in range(self.num_days) if not self.vac_array[emp_idx, d]]
@@ -177,8 +219,8 @@ class GreedyClimbing:
                 iteration += 1
                 continue
 
-            d1, d2 = np.random.choice(available_days, 2, replace=False)
-            s1, s2 = np.random.choice(list(range(self.shifts)), 2, replace=False)
+            d1, d2 = self.np_rng.choice(available_days, 2, replace=False)
+            s1, s2 = self.np_rng.choice(list(range(self.shifts)), 2, replace=False)
 
             t1 = horario[emp_idx, d1, s1]
             t2 = horario[emp_idx, d2, s2]
@@ -221,11 +263,16 @@ class GreedyClimbing:
 
                 c1, c2, c3, c4, c5 = self.criterios(new_h)
                 new_score = c1 + c2 + c3 + c4 + c5
+                proposed += 1
 
                 if new_score < best_score:
+                    # only the two moved cells change
+                    for d, s in ((d1, s1), (d2, s2)):
+                        if new_h[emp_idx, d, s] != horario[emp_idx, d, s]:
+                            self._set_cell(emp_idx, d, s, horario[emp_idx, d, s], new_h[emp_idx, d, s])
                     horario = new_h
                     best_score = new_score
-                    self.update_from_horario(horario)
+                    accepted += 1
                     print(f"Iteration {steps}: Improved score = {best_score}")
 
                     if best_score == 0:
@@ -234,6 +281,11 @@ class GreedyClimbing:
 
             iteration += 1
 
+        for emp in self.employees:
+            self.assignment[emp].sort()  # day order, as update_from_horario leaves it
+        instrumentation.count("moves_proposed", proposed)
+        instrumentation.count("moves_accepted", accepted)
+        instrumentation.count("scoring_calls", proposed + 1)
         print(f"Local Search Optimization completed after {steps} iterations. Final score = {best_score}")
         print(f"Execution time (hill climbing): {time.time() - start_hc:.2f} seconds")
 
@@ -252,78 +304,26 @@ class GreedyClimbing:
         )
 
     def criterio1(self, horario, max_consec=5):
-        worked = (horario.sum(axis=2) > 0).astype(int)
-        total_violation = 0
-        for i in range(worked.shape[0]):
-            run = 0
-            for d in range(worked.shape[1]):
-                if worked[i, d]:
-                    run += 1
-                else:
-                    if run > max_consec:
-                        total_violation += 1
-                    run = 0
-            if run > max_consec:
-                total_violation += 1
-        return total_violation
+        worked = scoring.worked_days(horario)
+        return int(scoring.consecutive_runs_over(worked, max_consec).sum())
 
     def criterio2(self, horario):
         """
         Sum over employees of excess special days (Sundays+holidays) above 22.
-        (Fixed accumulation: += instead of assignment.)
         """
-        worked = (horario.sum(axis=2) > 0).astype(int)
-        allowed = 22
-        total_violation = 0
-        special_days = set(self.holidays).union(self.sunday)
-        for i in range(worked.shape[0]):
-            num = 0
-            for d in range(worked.shape[1]):
-                if worked[i, d] and (d + 1) in special_days:
-                    num += 1
-            if num > allowed:
-                total_violation += (num - allowed)
-        return total_violation
+        worked = scoring.worked_days(horario)
+        return int(scoring.special_days_excess(worked, self.special_mask, 22).sum())
 
     def criterio3(self, horario):
-        # days x shifts x teams
-        team_ids = set()
-        for ids in self.teams.values():
-            team_ids.update(ids)
-        team_ids.update(t for (_d, _s, t) in self.mins.keys())
-        num_teams = (max(team_ids) if team_ids else 0)
-
-        counts = np.zeros((self.num_days, self.shifts, num_teams), dtype=int)
-
-        n_emps = horario.shape[0]
-        for p in range(n_emps):
-            for d in range(self.num_days):
-                for s in range(self.shifts):
-                    t = horario[p, d, s]  # this stores team_id or 0
-                    if t > 0:
-                        counts[d, s, t - 1] += 1
-
-        shortage = 0
-        for (day, shift, team), required in self.mins.items():
-            assigned = counts[day - 1, shift - 1, team - 1]
-            if assigned < required:
-                shortage += (required - assigned)
-        return int(shortage)
+        # shortage below minimums over days x shifts x teams
+        return scoring.coverage_shortage(horario, self.req_tensor)
 
     def criterio4(self, horario, target_workdays=223):
-        work = (horario.sum(axis=2) > 0).astype(int)
-        diffs = np.abs(np.sum(work & ~self.vac_array, axis=1) - target_workdays)
-        return int(np.sum(diffs))
+        worked = scoring.worked_days(horario)
+        return int(scoring.workday_deviation(worked, self.vac_array, target_workdays).sum())
 
     def criterio5(self, horario):
-        violations = 0
-        for i in range(horario.shape[0]):
-            for d in range(self.num_days - 1):
-                s_today = next((s for s in range(self.shifts) if horario[i, d, s] > 0), None)
-                s_next  = next((s for s in range(self.shifts) if horario[i, d + 1, s] > 0), None)
-                if s_today is not None and s_next is not None and s_next < s_today:
-                    violations += 1
-        return violations
+        return int(scoring.backward_transitions(horario).sum())
 
     def identificar_equipes(self):
         # map team_id -> list of employee indices (0-based) who can work that team
@@ -335,7 +335,8 @@ class GreedyClimbing:
         multi_team = [emp - 1 for emp in self.employees if len(self.teams[emp]) > 1]
         return team_to_emps, multi_team
 
-def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None):
+def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None):
     """
     vacations: rows like ['Employee 1','0','1',...]
     minimuns:  rows like ['Team_A','Minimum','M', ...]
@@ -346,42 +347,34 @@ def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rul
     print(f"{tag} Executando algoritmo")
     print(f"{tag} Número de funcionários: {len(employees)}")
 
-    year = int(year) if year is not None else 2025
-
-    num_days = 365
-    feriados = holidays.country_holidays("PT", years=[year])
-
-    emp_ids = [i + 1 for i in range(len(employees))]
-    vacs = rows_to_vac_dict(vacations)
-    mins, ideals = rows_to_req_dicts(minimuns)
-    teams = {}
-    for idx, e in enumerate(employees):
-        emp_id = idx + 1
-        codes = [get_team_code(t) for t in e.get("teams", [])]
-        ids = [get_team_id(c) for c in codes if c]
-        if not ids:
-            ids = [get_team_id("A")]
-        teams[emp_id] = ids
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    num_days = inst.num_days
+    vacs = inst.vacs
 
     scheduler = GreedyClimbing(
-        employees=emp_ids,
+        employees=list(inst.emp_ids),
         num_days=num_days,
-        holidays_set=feriados,
+        holidays_set=inst.holiday_dates,
         vacs=vacs,
-        mins=mins,
-        ideals=ideals,
-        teams=teams,
+        mins=inst.mins,
+        ideals=inst.ideals,
+        teams=inst.teams,
         num_iter=10,
         maxTime=(int(maxTime) if maxTime else None),
-        year=year,
+        year=inst.year,
         shifts=shifts,
-        rules=rules
+        rules=rules,
+        seed=seed,
+        deadline=deadline,
     )
 
-    scheduler.build_schedule()
+    with instrumentation.span("build"):
+        scheduler.build_schedule()
     initial_score = scheduler.score(scheduler.create_horario())
     print(f"{tag} Initial score: {initial_score}")
-    scheduler.hill_climbing(maxTime=(int(maxTime) if maxTime else None))
+    with instrumentation.span("solve"):
+        scheduler.hill_climbing(maxTime=(int(maxTime) if maxTime else None))
+    instrumentation.count("rule_handler_calls", scheduler.rule_engine.handler_calls)
 
     export_schedule_to_csv(scheduler, "schedule_hybrid.csv", num_days=num_days)
 
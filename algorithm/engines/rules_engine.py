@@ -1,5 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from collections import defaultdict
+from functools import partial
 from typing import Dict, List, Tuple, Any, Set, Callable, Optional
 
 
@@ -15,6 +17,7 @@ class Rule:
 
 CPSatHandler   = Callable[[Rule, "CPSatContext"], None]
 GreedyHandler  = Callable[[Rule, "GreedyContext"], bool]
+GreedyCompiler = Callable[[Rule, "GreedyContext"], Callable[["GreedyContext"], Any]]
 ILPHandler = Callable[[Rule, "ILPContext"], None]
 
 
@@ -53,17 +56,37 @@ class RuleEngine:
         self.has_no_earlier_next = any(r.type == "no_earlier_shift_next_day" for r in self.rules)
         self.has_total_workdays = any(r.type == "total_workdays" for r in self.rules)
         self.soft_min_cov = next((r for r in self.rules if r.type == "min_coverage" and r.kind == "soft"), None)
+        self.has_min_cov = any(r.type == "min_coverage" for r in self.rules)
 
         self._cpsat_handlers: Dict[str, CPSatHandler] = {}
         self._greedy_handlers: Dict[str, GreedyHandler] = {}
+        self._greedy_checks: Dict[str, GreedyCompiler] = {}
+        self._greedy_scores: Dict[str, GreedyCompiler] = {}
         self._ilp_handlers: Dict[str, ILPHandler] = {}
 
+        # persistent greedy state behind greedy_is_feasible / greedy_assign (built on first use)
+        self._greedy_ctx: Optional["GreedyContext"] = None
+        self._greedy_feasible: Optional[Callable[["GreedyContext"], bool]] = None
+        self._greedy_entries: Dict[int, int] = defaultdict(int)  # emp -> entries seen by the indexes
+        self._greedy_source: Dict[int, list] = {}  # emp -> entries list the indexes were built from
+
+        # rule handlers / compiled checks run so far; the solvers report it to algorithm.instrumentation
+        self.handler_calls = 0
+
     def register_cpsat(self, rule_type: str, handler: CPSatHandler):
         self._cpsat_handlers[rule_type] = handler
 
     def register_greedy(self, rule_type: str, handler: GreedyHandler):
         self._greedy_handlers[rule_type] = handler
 
+    def register_greedy_check(self, rule_type: str, compiler: GreedyCompiler):
+        """compiler(rule, ctx) -> check(ctx) returning False to reject the candidate."""
+        self._greedy_checks[rule_type] = compiler
+
+    def register_greedy_score(self, rule_type: str, compiler: GreedyCompiler):
+        """compiler(rule, ctx) -> score(ctx) returning the candidate's contribution (lower is better)."""
+        self._greedy_scores[rule_type] = compiler
+
     def register_ilp(self, rule_type: str, handler: ILPHandler):
         self._ilp_handlers[rule_type] = handler
 
@@ -72,6 +95,7 @@ class RuleEngine:
         for r in self.rules:
             h = self._cpsat_handlers.get(r.type)
             if h:
+                self.handler_calls += 1
                 h(r, ctx)
         return ctx
 
@@ -85,6 +109,7 @@ class RuleEngine:
             h = self._greedy_handlers.get(r.type)
             if not h:
                 continue
+            self.handler_calls += 1
             try:
                 ok = h(r, ctx)
             except Exception as ex:
@@ -101,10 +126,145 @@ class RuleEngine:
 
         return True
 
+    def compile_greedy(self, ctx: "GreedyContext") -> Tuple[Callable[["GreedyContext"], bool], Callable[["GreedyContext"], float]]:
+        """
+        Compiles the active rules once against a persistent context.
+        Returns (feasible, score): both read the candidate from ctx.e/d/s/t,
+        so the caller only updates those fields between probes.
+          - feasible(ctx): False if any hard rule rejects the candidate
+          - score(ctx):    sum of the scoring rules (lower is better)
+        Rules without a compiled variant fall back to their generic handler.
+        """
+        checks = []
+        scorers = []
+        for r in self.rules:
+            if r.type in self._greedy_scores:
+                scorers.append(self._greedy_scores[r.type](r, ctx))
+            elif r.type in self._greedy_checks:
+                if r.kind.lower() == "hard":
+                    checks.append(self._greedy_checks[r.type](r, ctx))
+            elif r.type in self._greedy_handlers:
+                h = self._greedy_handlers[r.type]
+                if r.kind.lower() == "hard":
+                    checks.append(partial(h, r))
+                else:
+                    scorers.append(self._score_from_handler(r, h))
+        checks = tuple(checks)
+        scorers = tuple(scorers)
+
+        def feasible(ctx):
+            for n, check in enumerate(checks, start=1):
+                if not check(ctx):
+                    self.handler_calls += n
+                    return False
+            self.handler_calls += len(checks)
+            return True
+
+        def score(ctx):
+            self.handler_calls += len(scorers)
+            total = 0
+            for scorer in scorers:
+                total += scorer(ctx)
+            return total
+
+        return feasible, score
+
+    @staticmethod
+    def _score_from_handler(r: Rule, h: GreedyHandler):
+        """Soft generic handler as a scorer: returns whatever it adds to ctx.score."""
+        def score(ctx):
+            before = ctx.score
+            h(r, ctx)
+            return ctx.score - before
+        return score
+
+    # Greedy API with persistent per-employee indexes
+    def _greedy_runtime(self) -> "GreedyContext":
+        if self._greedy_ctx is None:
+            from algorithm.contexts.GreedyContext import GreedyContext
+            from algorithm.contexts.EmployeeState import EmployeeState
+
+            self._greedy_ctx = GreedyContext(
+                Employees=self.employees,
+                num_days=self.num_days,
+                shifts=self.shifts,
+                vacations=self.vac_1b,
+                allowed_teams_per_emp=[self.teams_map.get(e, []) for e in self.employees],
+                min_required={},
+                ideal_required={},
+                special_days=self.special,
+                cover_count=defaultdict(int),
+                assignment={},
+                states={e: EmployeeState(self.num_days, self.special) for e in self.employees},
+            )
+            self._greedy_feasible, _score = self.compile_greedy(self._greedy_ctx)
+        return self._greedy_ctx
+
+    def greedy_reset(self, assignment: Optional[Dict[int, List[Tuple[int, int, int]]]] = None):
+        """Rebuilds the indexes from emp -> [(day, shift, team)] (empty schedule if None)."""
+        from algorithm.contexts.EmployeeState import EmployeeState
+
+        ctx = self._greedy_runtime()
+        assignment = assignment or {}
+        ctx.cover_count.clear()
+        for e in self.employees:
+            entries = assignment.get(e, [])
+            ctx.states[e] = EmployeeState.from_assignments(self.num_days, self.special, entries)
+            self._greedy_entries[e] = len(entries)
+            self._greedy_source[e] = entries
+            for (d, s, t) in entries:
+                ctx.cover_count[(d, s, t)] += 1
+
+    def greedy_assign(self, e: int, d: int, s: int, t: int):
+        ctx = self._greedy_runtime()
+        ctx.states[e].assign(d, s)
+        ctx.cover_count[(d, s, t)] += 1
+        self._greedy_entries[e] += 1
+
+    def greedy_unassign(self, e: int, d: int, s: int, t: int):
+        ctx = self._greedy_runtime()
+        ctx.states[e].unassign(d, s)
+        ctx.cover_count[(d, s, t)] -= 1
+        self._greedy_entries[e] -= 1
+
+    def greedy_is_feasible(self, e: int, d: int, s: int, t: int, assignment=None) -> bool:
+        """
+        Hard-rule check for assigning employee e to (day d, shift s, team t), 1-based.
+        Reads the indexes kept by greedy_assign/greedy_unassign; if assignment is
+        given and e's entries are another list than the one indexed, or their count
+        differs, e's index is rebuilt first. In-place edits of the indexed list
+        (swaps, team changes) must go through greedy_assign/greedy_unassign.
+        """
+        ctx = self._greedy_runtime()
+        if assignment is not None:
+            entries = assignment.get(e, [])
+            if entries is not self._greedy_source.get(e) or len(entries) != self._greedy_entries[e]:
+                from algorithm.contexts.EmployeeState import EmployeeState
+                ctx.states[e] = EmployeeState.from_assignments(self.num_days, self.special, entries)
+                self._greedy_entries[e] = len(entries)
+                self._greedy_source[e] = entries
+        ctx.e, ctx.d, ctx.s, ctx.t = e, d, s, t
+        return self._greedy_feasible(ctx)
+
+    def greedy_min_coverage_score(self, d: int, s: int, t: int, counts_func) -> int:
+        """
+        Slot urgency on the GreedyClimbing.f2 scale (lower is better):
+          0 below minimum, 1 between minimum and ideal, 2+k at/above ideal by k.
+        counts_func(d, s, t) -> (current, minimum, ideal). The same scale is used
+        with or without a min_coverage rule, so coverage always steers the search.
+        """
+        current, min_required, ideal_required = counts_func(d, s, t)
+        if current < min_required:
+            return 0
+        if current < ideal_required:
+            return 1
+        return 2 + (current - ideal_required)
+
     def apply_ilp(self, ctx: "ILPContext") -> "ILPContext":
         for r in self.rules:
             h = self._ilp_handlers.get(r.type)
             if h:
+                self.handler_calls += 1
                 h(r, ctx)
         return ctx
 
@@ -113,7 +273,7 @@ class RuleEngine:
 # --------------------------
 def register_default_handlers(engine: RuleEngine):
     """Register built-in CP-SAT rule handlers."""
-    from ..rules.handlers.rules_handlers_cpsat import (
+    from ..handlers.rules_handlers_cpsat import (
         h_no_earlier_shift_next_day,
         h_max_consecutive_days,
         h_max_special_days,
@@ -135,7 +295,7 @@ def register_default_handlers(engine: RuleEngine):
 
 def register_default_greedy_handlers(engine: RuleEngine):
     """Register built-in Greedy rule handlers."""
-    from ..rules.handlers.rules_handlers_greedy import (
+    from ..handlers.rules_handlers_greedy import (
         g_no_earlier_shift_next_day,
         g_max_consecutive_days,
         g_max_special_days,
@@ -144,6 +304,14 @@ def register_default_greedy_handlers(engine: RuleEngine):
         g_team_eligibility,
         g_min_coverage,
         g_target_workdays_balancing,
+        c_no_earlier_shift_next_day,
+        c_max_consecutive_days,
+        c_max_special_days,
+        c_total_workdays,
+        c_vacation_block,
+        c_team_eligibility,
+        c_min_coverage,
+        c_target_workdays_balancing,
     )
     engine.register_greedy("no_earlier_shift_next_day", g_no_earlier_shift_next_day)
     engine.register_greedy("max_consecutive_days", g_max_consecutive_days)
@@ -154,8 +322,17 @@ def register_default_greedy_handlers(engine: RuleEngine):
     engine.register_greedy("min_coverage", g_min_coverage)
     engine.register_greedy("target_workdays_balancing", g_target_workdays_balancing)
 
+    engine.register_greedy_check("no_earlier_shift_next_day", c_no_earlier_shift_next_day)
+    engine.register_greedy_check("max_consecutive_days", c_max_consecutive_days)
+    engine.register_greedy_check("max_special_days", c_max_special_days)
+    engine.register_greedy_check("total_workdays", c_total_workdays)
+    engine.register_greedy_check("vacation_block", c_vacation_block)
+    engine.register_greedy_check("team_eligibility", c_team_eligibility)
+    engine.register_greedy_score("min_coverage", c_min_coverage)
+    engine.register_greedy_score("target_workdays_balancing", c_target_workdays_balancing)
+
 def register_default_ilp_handlers(engine: RuleEngine):
-    from ..rules.handlers.rules_handlers_ilp import (
+    from ..handlers.rules_handlers_ilp import (
         i_one_shift_per_day,
         i_total_workdays,
         i_max_consecutive_days,
@@ -1,6 +1,8 @@
+import heapq
 import random
 import time
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, wait
 
 import numpy as np
 import pandas as pd
@@ -20,6 +22,20 @@ from algorithm.utils import (
     get_team_code,
     schedule_to_table
 )
+from algorithm import scoring
+from algorithm.incrementalScoring import IncrementalScorer
+from algorithm import instrumentation
+from algorithm.moves import CellMove
+from algorithm.contexts.EmployeeState import EmployeeState
+from algorithm.problemInstance import get_instance
+from algorithm.deadline import Deadline, cancellable_pool, worker_token
+from algorithm.cpsatTools import available_workers
+
+# greedy construction of GreedyClimbing.build_schedule:
+#   "random":  random employee, up to num_iter random (day, shift) probes
+#   "urgency": most uncovered (day, shift, team) slot first, best feasible employee for it
+CONSTRUCTIONS = ("random", "urgency")
+
 
 class GreedyClimbing:
     """
@@ -28,8 +44,15 @@ class GreedyClimbing:
     """
 
     def __init__(self, employees, num_days, holidays_set, vacs, mins, ideals, teams,
-                 num_iter=10, maxTime=None, year=2025, shifts=2, rules=None):
+                 num_iter=10, maxTime=None, year=2025, shifts=2, rules=None, seed=None, deadline=None,
+                 construction="random"):
+        if construction not in CONSTRUCTIONS:
+            raise ValueError(f"Unknown greedy construction '{construction}', expected one of {CONSTRUCTIONS}.")
+        self.construction = construction
         self.employees = employees
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
         self.num_days = num_days
         self.shifts = int(shifts) 
         self.vacs = vacs
@@ -47,9 +70,23 @@ class GreedyClimbing:
         self.fds = np.zeros_like(self.vac_array, dtype=bool)
         for day in self.sunday:
             self.fds[:, day - 1] = True
+        self.special_days = set(self.holidays).union(self.sunday)
+        self.states = {p: EmployeeState(self.num_days, self.special_days) for p in self.employees}
+        self.special_mask = np.zeros(self.num_days, dtype=bool)
+        for day in self.special_days:
+            if 1 <= day <= self.num_days:
+                self.special_mask[day - 1] = True
+        team_ids = {t for ids in self.teams.values() for t in ids}
+        team_ids.update(t for (_d, _s, t) in self.mins.keys())
+        self.team_ids = sorted(team_ids)
+        self.req_tensor = scoring.requirements_tensor(
+            self.mins, self.num_days, self.shifts, max(team_ids) if team_ids else 0
+        )
         # timing: maxTime in seconds for greedy phase
         self.maxTime = maxTime
         self.start_time = time.time()
+        # task-wide budget / cancellation (algorithm.deadline.Deadline), checked by both phases
+        self.deadline = deadline
 
     def _create_vacation_array(self):
         vac_array = np.zeros((len(self.employees), self.num_days), dtype=bool)
@@ -66,33 +103,19 @@ class GreedyClimbing:
           - <=22 Sundays+holidays
           - forbid next-day earlier shift (non-decreasing across days)
         """
-        assignments = self.assignment[p]
+        state = self.states[p]
 
         # Max 5 consecutive days
-        days = sorted([day for (day, _, _) in assignments] + [d])
-        run = 1
-        for i in range(1, len(days)):
-            if days[i] == days[i - 1] + 1:
-                run += 1
-                if run > 5:
-                    return False
-            else:
-                run = 1
+        if state.run_length_with(d) > 5:
+            return False
 
         # Sundays & holidays cap (<=22)
-        special_days = set(self.holidays).union(self.sunday)
-        sundays_and_holidays = sum(1 for (day, _, _) in assignments if day in special_days)
-        if d in special_days:
-            sundays_and_holidays += 1
-        if sundays_and_holidays > 22:
+        if state.special_worked_with(d) > 22:
             return False
 
         # No earlier shift the next/previous day (e.g., T->M, N->T/M)
-        for (day, shift, _) in assignments:
-            if day + 1 == d and s < shift:
-                return False
-            if day - 1 == d and shift < s:
-                return False
+        if state.breaks_shift_order(d, s):
+            return False
         return True
 
 
@@ -117,12 +140,29 @@ class GreedyClimbing:
 
     # ---------- greedy construction ----------
 
+    def _stop_construction(self):
+        if self.maxTime is not None and time.time() - self.start_time >= self.maxTime:
+            print("Maximum time reached, stopping generation.")
+            return True
+        if self.deadline is not None and self.deadline.expired():
+            print("Task deadline reached or cancelled, stopping generation.")
+            return True
+        return False
+
+    def _assign(self, p, d, s, t):
+        self.assignment[p].append((d, s, t))
+        self.schedule_table[(d, s, t)].append(p)
+        self.states[p].assign(d, s)
+
     def build_schedule(self):
+        if self.construction == "urgency":
+            return self._build_by_urgency()
+
         all_days = set(range(1, self.num_days + 1))
+        probes = 0
 
         while not self.is_complete():
-            if self.maxTime is not None and time.time() - self.start_time >= self.maxTime:
-                print("Maximum time reached, stopping generation.")
+            if self._stop_construction():
                 break
 
             # Prefer employees with fewer allowed teams (1, then 2, then >=3)
@@ -136,7 +176,7 @@ class GreedyClimbing:
             if not P:
                 break
 
-            p = random.choice(P)
+            p = self.rng.choice(P)
             best = None
             best_val = float('inf')
             count = 0
@@ -148,8 +188,9 @@ class GreedyClimbing:
                 continue
 
             while best_val > 0 and count < self.num_iter and available_days:
-                d = random.choice(available_days)
-                s = random.choice(list(range(1, self.shifts + 1)))
+                d = self.rng.choice(available_days)
+                s = self.rng.choice(list(range(1, self.shifts + 1)))
+                probes += 1
 
                 if self.f1(p, d, s):
                     count += 1
@@ -160,9 +201,77 @@ class GreedyClimbing:
                             best = (d, s, t)
 
             if best:
-                d, s, t = best
-                self.assignment[p].append((d, s, t))
-                self.schedule_table[(d, s, t)].append(p)
+                self._assign(p, *best)
+
+        instrumentation.count("greedy_probes", probes)
+
+    def _slot_key(self, slot):
+        """
+        Urgency of a (day, shift, team) slot, lowest first: (current - min, current - ideal),
+        each relative to the requirement, so Sundays/holidays (lower minimums) are filled
+        at the same pace as weekdays instead of after them.
+        """
+        current = len(self.schedule_table[slot])
+        min_required = self.mins.get(slot, 0)
+        ideal_required = self.ideals.get(slot, min_required)
+        return (current - min_required) / max(min_required, 1), (current - ideal_required) / max(ideal_required, 1)
+
+    def _build_by_urgency(self):
+        """
+        Coverage-driven construction: a heap of (day, shift, team) slots ordered by
+        _slot_key pulls the most uncovered slot, which gets the feasible available
+        employee with the fewest teams, then the most spare capacity for that day:
+        Sunday/holiday budget (22) on special days, workdays beyond it otherwise,
+        so employees who can still cover special days are kept for them. A slot's key
+        only changes when it is filled, so it is pushed back with the new key then;
+        slots nobody can fill are dropped, as assignments only narrow the choice.
+        Stops when every employee has 223 days or no slot can be filled.
+        """
+        # (day, team) -> employees off vacation, not working that day and below 223 days
+        # (only the slot's candidates are scanned, never the whole staff)
+        available = defaultdict(set)
+        for p in self.employees:
+            vacations = set(self.vacs.get(p, []))
+            for d in range(1, self.num_days + 1):
+                if d not in vacations:
+                    for t in self.teams[p]:
+                        available[(d, t)].add(p)
+
+        heap = []
+        for d in range(1, self.num_days + 1):
+            for s in range(1, self.shifts + 1):
+                for t in self.team_ids:
+                    if available[(d, t)]:
+                        heap.append((self._slot_key((d, s, t)), self.rng.random(), (d, s, t)))
+        heapq.heapify(heap)
+
+        probes = 0
+        while heap:
+            if self._stop_construction():
+                break
+            _key, tie, slot = heapq.heappop(heap)
+            d, s, t = slot
+            best, best_key = None, None
+            special = d in self.special_days
+            for p in available[(d, t)]:
+                probes += 1
+                state = self.states[p]
+                spare_special = 22 - state.special_worked
+                spare = spare_special if special else (223 - state.days_worked) - spare_special
+                p_key = (len(self.teams[p]), -spare, p)
+                if (best_key is None or p_key < best_key) and self.f1(p, d, s):
+                    best, best_key = p, p_key
+            if best is None:
+                continue
+
+            self._assign(best, d, s, t)
+            worked = self.states[best].days_worked
+            for day in (range(1, self.num_days + 1) if worked >= 223 else (d,)):
+                for team in self.teams[best]:
+                    available[(day, team)].discard(best)
+            heapq.heappush(heap, (self._slot_key(slot), tie, slot))
+
+        instrumentation.count("greedy_probes", probes)
 
     def is_complete(self):
         return all(len(self.assignment[p]) >= 223 for p in self.employees)
@@ -184,93 +293,150 @@ class GreedyClimbing:
                     if t > 0:
                         self.assignment[emp].append((d + 1, s + 1, t))
                         self.schedule_table[(d + 1, s + 1, t)].append(emp)
+        self._rebuild_states()
+
+    def _rebuild_states(self):
+        self.states = {
+            p: EmployeeState.from_assignments(self.num_days, self.special_days, self.assignment[p])
+            for p in self.employees
+        }
+
+
+    def _breaks_shift_order(self, horario, emp_idx, d, s):
+        """True if shift s on day d starts later than the next day's first shift or earlier than the previous day's."""
+        if d + 1 < self.num_days:
+            next_slots = [x for x in range(self.shifts) if horario[emp_idx, d + 1, x] > 0]
+            if next_slots and next_slots[0] < s:
+                return True
+        if d - 1 >= 0:
+            prev_slots = [x for x in range(self.shifts) if horario[emp_idx, d - 1, x] > 0]
+            if prev_slots and s < prev_slots[0]:
+                return True
+        return False
 
+    def _propose_move(self, horario, available):
+        """
+        Random swap of two (day, shift) cells of one employee, as a CellMove.
+        Returns None when the swap is a no-op or breaks the next-day shift order.
+        """
+        emp_idx = self.np_rng.integers(len(self.employees))
+        emp = self.employees[emp_idx]
+
+        available_days = available[emp_idx]
+        if len(available_days) < 2:
+            return None
+
+        d1, d2 = self.np_rng.choice(available_days, 2, replace=False)
+        s1, s2 = self.np_rng.choice(list(range(self.shifts)), 2, replace=False)
+
+        t1 = horario[emp_idx, d1, s1]
+        t2 = horario[emp_idx, d2, s2]
+        if t1 == t2:
+            return None
 
-    def hill_climbing(self, max_iterations=400000, maxTime=60):
+        allowed = set(self.teams[emp])
+
+        # try swapping if both targets are allowed
+        if (t2 in allowed) and (t1 in allowed):
+            move = CellMove(emp_idx, [(d1, s1, t2), (d2, s2, t1)])
+        else:
+            # fallbacks: keep only allowed teams, drop others to 0 (off)
+            move = CellMove(emp_idx, [(d1, s1, t2 if t2 in allowed else 0),
+                                      (d2, s2, t1 if t1 in allowed else 0)])
+
+        # guard against earlier next-day shift, checked on the moved row
+        move.apply(horario)
+        blocked = (self._breaks_shift_order(horario, emp_idx, d1, s1)
+                   or self._breaks_shift_order(horario, emp_idx, d2, s2))
+        move.undo(horario)
+        return None if blocked else move
+
+    def hill_climbing(self, max_iterations=400000, maxTime=60, batch_size=1, policy="first", progress=None):
+        """
+        Local search over random swaps. Each step samples batch_size candidate
+        moves and scores them against the shared incremental state:
+          - policy="first": apply the first improving candidate of the batch
+          - policy="best":  apply the best improving candidate of the batch
+        max_iterations counts candidates, so budgets are comparable across batch sizes.
+        progress (algorithm.progress.ProgressReporter) gets the best score per step.
+        """
+        if policy not in ("first", "best"):
+            raise ValueError(f"Unknown hill climbing policy '{policy}'.")
         max_seconds = maxTime * 60 if maxTime is not None else None
         start_hc = time.time()
 
         horario = self.create_horario()
-        f1, f2, f3, f4, f5 = self.criterios(horario)
-        best_score = f1 + f2 + f3 + f4 + f5
+        scorer = IncrementalScorer(self, horario)
+        best_score = scorer.score()
+        # from here on assignment/schedule_table are patched per accepted move
+        self.update_from_horario(horario)
+        available = [np.flatnonzero(~self.vac_array[i]) for i in range(len(self.employees))]
+
+        def criteria():
+            return {f"criterio{k}": c for k, c in enumerate(scorer.criterios(), start=1)}
 
         iteration = 0
         steps = 0
+        proposed = accepted = 0
 
         while iteration < max_iterations and best_score > 0:
             steps += 1
             if max_seconds is not None and (time.time() - start_hc) >= max_seconds:
                 print("Maximum time reached, stopping generation.")
                 break
+            if self.deadline is not None and self.deadline.expired():
+                print("Task deadline reached or cancelled, stopping local search.")
+                break
 
-            emp_idx = np.random.randint(len(self.employees))
-            emp = self.employees[emp_idx]
-
-            available_days = [d for d in range(self.num_days) if not self.vac_array[emp_idx, d]]
-            if len(available_days) < 2:
+            best_move, best_delta = None, 0
+            for _ in range(batch_size):
                 iteration += 1
-                continue
-
-            d1, d2 = np.random.choice(available_days, 2, replace=False)
-            s1, s2 = np.random.choice(list(range(self.shifts)), 2, replace=False)
-
-            t1 = horario[emp_idx, d1, s1]
-            t2 = horario[emp_idx, d2, s2]
-
-            if t1 != t2:
-                new_h = horario.copy()
-                allowed = set(self.teams[emp])
-
-                # try swapping if both targets are allowed
-                if (t2 in allowed) and (t1 in allowed):
-                    new_h[emp_idx, d1, s1], new_h[emp_idx, d2, s2] = t2, t1
-                else:
-                    # fallbacks: keep only allowed teams, drop others to 0 (off)
-                    new_h[emp_idx, d1, s1] = t2 if t2 in allowed else 0
-                    new_h[emp_idx, d2, s2] = t1 if t1 in allowed else 0
-
-                # guard against earlier next-day shift
-                if d1 + 1 < self.num_days:
-                    next_slots = [s for s in range(self.shifts) if new_h[emp_idx, d1 + 1, s] > 0]
-                    if next_slots and next_slots[0] < s1:
-                        iteration += 1
-                        continue
-                if d1 - 1 >= 0:
-                    prev_slots = [s for s in range(self.shifts) if new_h[emp_idx, d1 - 1, s] > 0]
-                    if prev_slots and s1 < prev_slots[0]:
-                        iteration += 1
-                        continue
-
-                # same for d2
-                if d2 + 1 < self.num_days:
-                    next_slots = [s for s in range(self.shifts) if new_h[emp_idx, d2 + 1, s] > 0]
-                    if next_slots and next_slots[0] < s2:
-                        iteration += 1
-                        continue
-                if d2 - 1 >= 0:
-                    prev_slots = [s for s in range(self.shifts) if new_h[emp_idx, d2 - 1, s] > 0]
-                    if prev_slots and s2 < prev_slots[0]:
-                        iteration += 1
-                        continue
-
-                c1, c2, c3, c4, c5 = self.criterios(new_h)
-                new_score = c1 + c2 + c3 + c4 + c5
-
-                if new_score < best_score:
-                    horario = new_h
-                    best_score = new_score
-                    self.update_from_horario(horario)
-                    print(f"Iteration {steps}: Improved score = {best_score}")
-
-                    if best_score == 0:
-                        print(f"Iteration {steps}: Perfect solution found with score = 0")
+                move = self._propose_move(horario, available)
+                if move is None:
+                    continue
+                proposed += 1
+
+                # score only the two touched cells against the kept state
+                delta = scorer.delta(move)
+                if delta < best_delta:
+                    best_move, best_delta = move, delta
+                    if policy == "first":
                         break
 
-            iteration += 1
+            if best_move is not None:
+                best_score += scorer.apply(best_move)
+                best_move.sync(self.employees[best_move.emp_idx], self.assignment, self.schedule_table)
+                accepted += 1
+                print(f"Iteration {steps}: Improved score = {best_score}")
 
+                if best_score == 0:
+                    print(f"Iteration {steps}: Perfect solution found with score = 0")
+                    break
+
+            if progress is not None:
+                progress.update(iteration, best_score, criteria, self.to_table)
+
+        if progress is not None:
+            progress.update(iteration, best_score, criteria, force=True)
+
+        instrumentation.count("moves_proposed", proposed)
+        instrumentation.count("moves_accepted", accepted)
+        instrumentation.count("scoring_calls", proposed + 1)  # one delta per candidate, one full score
+
+        # accepted moves only patch assignment/schedule_table
+        self._rebuild_states()
         print(f"Local Search Optimization completed after {steps} iterations. Final score = {best_score}")
         print(f"Execution time (hill climbing): {time.time() - start_hc:.2f} seconds")
 
+    def to_table(self):
+        return schedule_to_table(
+            employees=self.employees,
+            vacs=self.vacs,
+            assignment=self.assignment,
+            num_days=self.num_days,
+            shifts=self.shifts,
+        )
+
     def score(self, horario):
         c1, c2, c3, c4, c5 = self.criterios(horario)
         return c1 + c2 + c3 + c4 + c5
@@ -285,78 +451,26 @@ class GreedyClimbing:
         )
 
     def criterio1(self, horario, max_consec=5):
-        worked = (horario.sum(axis=2) > 0).astype(int)
-        total_violation = 0
-        for i in range(worked.shape[0]):
-            run = 0
-            for d in range(worked.shape[1]):
-                if worked[i, d]:
-                    run += 1
-                else:
-                    if run > max_consec:
-                        total_violation += 1
-                    run = 0
-            if run > max_consec:
-                total_violation += 1
-        return total_violation
+        worked = scoring.worked_days(horario)
+        return int(scoring.consecutive_runs_over(worked, max_consec).sum())
 
     def criterio2(self, horario):
         """
         Sum over employees of excess special days (Sundays+holidays) above 22.
-        (Fixed accumulation: += instead of assignment.)
         """
-        worked = (horario.sum(axis=2) > 0).astype(int)
-        allowed = 22
-        total_violation = 0
-        special_days = set(self.holidays).union(self.sunday)
-        for i in range(worked.shape[0]):
-            num = 0
-            for d in range(worked.shape[1]):
-                if worked[i, d] and (d + 1) in special_days:
-                    num += 1
-            if num > allowed:
-                total_violation += (num - allowed)
-        return total_violation
+        worked = scoring.worked_days(horario)
+        return int(scoring.special_days_excess(worked, self.special_mask, 22).sum())
 
     def criterio3(self, horario):
-        # days x shifts x teams
-        team_ids = set()
-        for ids in self.teams.values():
-            team_ids.update(ids)
-        team_ids.update(t for (_d, _s, t) in self.mins.keys())
-        num_teams = (max(team_ids) if team_ids else 0)
-
-        counts = np.zeros((self.num_days, self.shifts, num_teams), dtype=int)
-
-        n_emps = horario.shape[0]
-        for p in range(n_emps):
-            for d in range(self.num_days):
-                for s in range(self.shifts):
-                    t = horario[p, d, s]  # this stores team_id or 0
-                    if t > 0:
-                        counts[d, s, t - 1] += 1
-
-        shortage = 0
-        for (day, shift, team), required in self.mins.items():
-            assigned = counts[day - 1, shift - 1, team - 1]
-            if assigned < required:
-                shortage += (required - assigned)
-        return int(shortage)
+        # shortage below minimums over days x shifts x teams
+        return scoring.coverage_shortage(horario, self.req_tensor)
 
     def criterio4(self, horario, target_workdays=223):
-        work = (horario.sum(axis=2) > 0).astype(int)
-        diffs = np.abs(np.sum(work & ~self.vac_array, axis=1) - target_workdays)
-        return int(np.sum(diffs))
+        worked = scoring.worked_days(horario)
+        return int(scoring.workday_deviation(worked, self.vac_array, target_workdays).sum())
 
     def criterio5(self, horario):
-        violations = 0
-        for i in range(horario.shape[0]):
-            for d in range(self.num_days - 1):
-                s_today = next((s for s in range(self.shifts) if horario[i, d, s] > 0), None)
-                s_next  = next((s for s in range(self.shifts) if horario[i, d + 1, s] > 0), None)
-                if s_today is not None and s_next is not None and s_next < s_today:
-                    violations += 1
-        return violations
+        return int(scoring.backward_transitions(horario).sum())
 
     def identificar_equipes(self):
         # map team_id -> list of employee indices (0-based) who can work that team
@@ -368,58 +482,117 @@ class GreedyClimbing:
         multi_team = [emp - 1 for emp in self.employees if len(self.teams[emp]) > 1]
         return team_to_emps, multi_team
 
-def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None):
+def _build_scheduler(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, seed=None,
+                     deadline=None, construction="random"):
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+
+    return GreedyClimbing(
+        employees=list(inst.emp_ids),
+        num_days=inst.num_days,
+        holidays_set=inst.holiday_dates,
+        vacs=inst.vacs,
+        mins=inst.mins,
+        ideals=inst.ideals,
+        teams=inst.teams,
+        num_iter=10,
+        maxTime=(int(maxTime) if maxTime else None),
+        year=inst.year,
+        shifts=shifts,
+        seed=seed,
+        deadline=deadline,
+        construction=construction,
+    )
+
+
+def _run_start(seed, vacations, minimuns, employees, year, shifts, batch_size, policy, end,
+               construction="random"):
+    """
+    One independent start (greedy construction + hill climbing). Runs in a cancellable_pool worker;
+    both phases stop at the run's wall-clock `end`, however long the start waited in the queue.
+    """
+    deadline = Deadline.until(end, worker_token())
+    scheduler = _build_scheduler(vacations, minimuns, employees, None, year, shifts, seed, deadline,
+                                 construction)
+    scheduler.build_schedule()
+    scheduler.hill_climbing(maxTime=None, batch_size=batch_size, policy=policy)
+    scheduler.deadline = None  # its token only lives in the pool's processes
+    return seed, scheduler.score(scheduler.create_horario()), scheduler
+
+
+def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None,
+          batch_size=1, policy="first", starts=1, workers=None, seed=None, deadline=None, progress=None,
+          construction=None):
     """
     vacations: rows like ['Employee 1','0','1',...]
     minimuns:  rows like ['Team_A','Minimum','M', ...]
     employees: list of dicts like {'teams': ['Team_A','Team_B']} in order → employee id
+    batch_size/policy: hill climbing neighbourhood, see GreedyClimbing.hill_climbing
+    starts:  number of independent seeds; with starts > 1 they run in a process pool
+             (workers processes, one per core of the task by default) and the best schedule wins
+    seed:    seeds the run; with starts > 1 the per-start seeds are derived from it
+    deadline: optional algorithm.deadline.Deadline; with starts > 1 every start stops at
+              the run's end (maxTime capped by it, see Deadline.budget) and on its
+              cancellation token, a cancel stops the running starts and drops the queued ones
+    progress: optional algorithm.progress.ProgressReporter for the hill climbing
+              phase; with starts > 1 only the per-start results are reported
+    construction: greedy construction, "random" (default) or "urgency", see CONSTRUCTIONS
     """
     tag = "[Greedy Randomized + Hill Climbing]"
     print(f"{tag} Executando algoritmo")
     print(f"{tag} Número de funcionários: {len(employees)}")
 
-    year = int(year) if year is not None else 2025
-
-    num_days = 365
-    feriados = holidays.country_holidays("PT", years=[year])
-
-    emp_ids = [i + 1 for i in range(len(employees))]
-    vacs = rows_to_vac_dict(vacations)
-    mins, ideals = rows_to_req_dicts(minimuns)
-    teams = {}
-    for idx, e in enumerate(employees):
-        emp_id = idx + 1
-        codes = [get_team_code(t) for t in e.get("teams", [])]
-        ids = [get_team_id(c) for c in codes if c]
-        if not ids:
-            ids = [get_team_id("A")]
-        teams[emp_id] = ids
-
-    scheduler = GreedyClimbing(
-        employees=emp_ids,
-        num_days=num_days,
-        holidays_set=feriados,
-        vacs=vacs,
-        mins=mins,
-        ideals=ideals,
-        teams=teams,
-        num_iter=10,
-        maxTime=(int(maxTime) if maxTime else None),
-        year=year,
-        shifts=shifts,
-    )
-
-    scheduler.build_schedule()
-
-    initial_score = scheduler.score(scheduler.create_horario())
-    print(f"{tag} Initial score: {initial_score}")
-    scheduler.hill_climbing(maxTime=(int(maxTime) if maxTime else None))
-
-    export_schedule_to_csv(scheduler, "schedule_hybrid.csv", num_days=num_days)
-    return schedule_to_table(
-        employees=scheduler.employees,   
-        vacs=vacs,                       
-        assignment=scheduler.assignment, 
-        num_days=num_days,
-        shifts=int(shifts),
-    )
+    construction = construction or "random"
+    starts = int(starts) if starts else 1
+    if starts > 1:
+        master = random.Random(seed)
+        seeds = [master.randrange(2**31) for _ in range(starts)]
+        workers = min(starts, int(workers) if workers else available_workers())
+        print(f"{tag} Multi-start: {starts} seeds on {workers} processes")
+
+        # one wall-clock end for all the starts: queued ones only get what is left of it
+        end = time.time() + Deadline.budget(int(maxTime) * 60 if maxTime else None, deadline)
+        results = []
+        cancelled = False
+        # the starts run in worker processes: only the overall time is recorded
+        with instrumentation.span("solve"), cancellable_pool(workers, deadline) as pool:
+            try:
+                pending = {
+                    pool.submit(_run_start, seed, vacations, minimuns, employees, year, shifts,
+                                batch_size, policy, end, construction)
+                    for seed in seeds
+                }
+                while pending and not cancelled:
+                    # poll, so a cancel is seen while every start is still running
+                    done, pending = wait(pending, timeout=Deadline.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        seed, score, _scheduler = result = future.result()
+                        print(f"{tag} Seed {seed}: score = {score}")
+                        results.append(result)
+                        if progress is not None:
+                            best = min(results, key=lambda r: r[1])
+                            progress.update(len(results), best[1], schedule=best[2].to_table, force=True)
+                    cancelled = deadline is not None and deadline.cancelled
+            finally:
+                # running starts stop on the token; queued ones are dropped
+                pool.shutdown(wait=not cancelled, cancel_futures=True)
+
+        if cancelled:
+            print(f"{tag} Task cancelled, dropped the unfinished starts")
+        if not results:
+            raise RuntimeError("Task cancelled before any start finished.")
+        seed, score, scheduler = min(results, key=lambda r: r[1])
+        print(f"{tag} Best seed {seed}: score = {score}")
+    else:
+        with instrumentation.span("build"):
+            scheduler = _build_scheduler(vacations, minimuns, employees, maxTime, year, shifts, seed, deadline,
+                                         construction)
+            scheduler.build_schedule()
+
+        initial_score = scheduler.score(scheduler.create_horario())
+        print(f"{tag} Initial score: {initial_score}")
+        with instrumentation.span("solve"):
+            scheduler.hill_climbing(maxTime=(int(maxTime) if maxTime else None), batch_size=batch_size,
+                                    policy=policy, progress=progress)
+
+    export_schedule_to_csv(scheduler, "schedule_hybrid.csv", num_days=scheduler.num_days)
+    return scheduler.to_table()
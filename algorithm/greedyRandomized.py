@@ -18,6 +18,9 @@ from algorithm.utils import (
     export_schedule_to_csv,
     get_team_code
 )
+from algorithm import instrumentation
+from algorithm.contexts.EmployeeState import EmployeeState
+from algorithm.problemInstance import get_instance
 
 class GreedyRandomized:
     """
@@ -28,8 +31,10 @@ class GreedyRandomized:
       - Time-boxed outer loop (maxTime in seconds, if provided)
     """
     def __init__(self, employees, num_days, holidays_set, vacs, mins, ideals, teams,
-                 num_iter=10, maxTime=None, year=2025, shifts=2):
+                 num_iter=10, maxTime=None, year=2025, shifts=2, seed=None, deadline=None):
         self.employees = employees
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.num_days = num_days
         self.vacs = vacs
         self.mins = mins
@@ -46,10 +51,13 @@ class GreedyRandomized:
         start_date = self.dias_ano[0].date()
         # 'holidays_set' is an iterable of date-like objects from holidays lib
         self.holidays = {(d - start_date).days + 1 for d in holidays_set}
+        self.special_days = set(self.holidays).union(self.sunday)
+        self.states = {p: EmployeeState(self.num_days, self.special_days) for p in self.employees}
 
         # timing
         self.maxTime = maxTime
         self.start_time = time.time()
+        self.deadline = deadline  # algorithm.deadline.Deadline (task budget / cancellation)
 
     # ---------- feasibility ----------
     def f1(self, p, d, s):
@@ -60,34 +68,19 @@ class GreedyRandomized:
           - <=22 Sundays+holidays
           - forbid T (day X) -> M (day X+1) and M (day X) -> T (day X-1)
         """
-        assignments = self.assignment[p]
+        state = self.states[p]
 
         # Consecutive-day window
-        days = sorted([day for (day, _, _) in assignments] + [d])
-        run = 1
-        for i in range(1, len(days)):
-            if days[i] == days[i-1] + 1:
-                run += 1
-                if run > 5:
-                    return False
-            else:
-                run = 1
+        if state.run_length_with(d) > 5:
+            return False
 
         # Sundays & holidays cap (22)
-        special_days = set(self.holidays).union(self.sunday)
-        sund_hol = sum(1 for (day, _, _) in assignments if day in special_days)
-        if d in special_days:
-            sund_hol += 1
-        if sund_hol > 22:
+        if state.special_worked_with(d) > 22:
             return False
 
         # No T -> next-day M (and symmetric check)
-        for (day, shift, _) in assignments:
-            if day + 1 == d and s < shift:  # today is the next day after a worked day
-                return False
-            if day - 1 == d and shift < s:  # today is the previous day before a worked day
-                return False
-
+        if state.breaks_shift_order(d, s):
+            return False
 
         return True
 
@@ -114,8 +107,12 @@ class GreedyRandomized:
     # ---------- main loop ----------
     def build_schedule(self):
         all_days = set(range(1, self.num_days + 1))
+        probes = 0
 
         while (not self.is_complete()) and (self.maxTime is None or time.time() - self.start_time < self.maxTime):
+            if self.deadline is not None and self.deadline.expired():
+                print("Task deadline reached or cancelled, stopping generation.")
+                break
             # Prefer employees constrained to one team first; then two; then ANY (including 3+ teams)
             P = [p for p in self.employees if len(self.assignment[p]) < 223 and len(self.teams[p]) == 1]
             if not P:
@@ -126,7 +123,7 @@ class GreedyRandomized:
             if not P:
                 break  # nobody left who can take more work
 
-            p = random.choice(P)
+            p = self.rng.choice(P)
             f_value = float('inf')
             count = 0
             best = None
@@ -138,8 +135,9 @@ class GreedyRandomized:
                 continue
 
             while f_value > 0 and count < self.num_iter and available_days:
-                d = random.choice(available_days)
-                s = random.choice(list(range(1, self.shifts + 1)))
+                d = self.rng.choice(available_days)
+                s = self.rng.choice(list(range(1, self.shifts + 1)))
+                probes += 1
 
                 if self.f1(p, d, s):
                     count += 1
@@ -153,11 +151,15 @@ class GreedyRandomized:
                 d, s, t = best
                 self.assignment[p].append((d, s, t))
                 self.schedule_table[(d, s, t)].append(p)
+                self.states[p].assign(d, s)
+
+        instrumentation.count("greedy_probes", probes)
 
     def is_complete(self):
         return all(len(self.assignment[p]) >= 223 for p in self.employees)
 
-def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,rules=None):
+def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None):
     """
     Library-style API:
       vacations_rows: list of rows like ['Employee 1', '0','1','0',...]
@@ -166,51 +168,43 @@ def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2,rule
     Returns: table with header + per-employee day values.
     """
 
-    num_days = 365
-    holi = holidays.country_holidays("PT", years=[year])
-
-    emp_ids = [i + 1 for i in range(len(employees))]
-    vacs    = rows_to_vac_dict(vacations)
-    mins, ideals = rows_to_req_dicts(minimuns)
-
-    teams = {}
-    for idx, e in enumerate(employees):
-        emp_id = idx + 1
-        codes = [ get_team_code(t) for t in e.get("teams", []) ]
-        ids = [ get_team_id(c) for c in codes if c ]
-        if not ids:
-            ids = [ get_team_id("A") ]
-        teams[emp_id] = ids
-
-    scheduler = GreedyRandomized(
-        employees=emp_ids,
-        num_days=num_days,
-        holidays_set=holi,
-        vacs=vacs,
-        mins=mins,
-        ideals=ideals,
-        teams=teams,
-        num_iter=10,
-        maxTime=(int(maxTime) if maxTime is not None else None),
-        year=year,
-        shifts=shifts, 
-    )
-    scheduler.build_schedule()
-
-    header = ["funcionario"] + [f"Dia {d}" for d in range(1, num_days + 1)]
-    label = {1: "M_", 2: "T_", 3: "N_"} 
-    output = [header]
-    for p in scheduler.employees:
-        row = [p]
-        assign = {day: (s, t) for (day, s, t) in scheduler.assignment[p]}
-        vacation_days = set(vacs.get(p, []))
-        for d in range(1, num_days + 1):
-            if d in vacation_days:
-                row.append("F")
-            elif d in assign:
-                s, t = assign[d]
-                row.append(label.get(s, "") + TEAM_ID_TO_CODE.get(t, str(t)))
-            else:
-                row.append("0")
-        row and output.append(row)
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    num_days = inst.num_days
+    vacs = inst.vacs
+
+    with instrumentation.span("build"):
+        scheduler = GreedyRandomized(
+            employees=list(inst.emp_ids),
+            num_days=num_days,
+            holidays_set=inst.holiday_dates,
+            vacs=vacs,
+            mins=inst.mins,
+            ideals=inst.ideals,
+            teams=inst.teams,
+            num_iter=10,
+            maxTime=(int(maxTime) if maxTime is not None else None),
+            year=inst.year,
+            shifts=shifts,
+            seed=seed,
+            deadline=deadline,
+        )
+        scheduler.build_schedule()
+
+    with instrumentation.span("schedule_to_table"):
+        header = ["funcionario"] + [f"Dia {d}" for d in range(1, num_days + 1)]
+        label = {1: "M_", 2: "T_", 3: "N_"} 
+        output = [header]
+        for p in scheduler.employees:
+            row = [p]
+            assign = {day: (s, t) for (day, s, t) in scheduler.assignment[p]}
+            vacation_days = set(vacs.get(p, []))
+            for d in range(1, num_days + 1):
+                if d in vacation_days:
+                    row.append("F")
+                elif d in assign:
+                    s, t = assign[d]
+                    row.append(label.get(s, "") + TEAM_ID_TO_CODE.get(t, str(t)))
+                else:
+                    row.append("0")
+            row and output.append(row)
     return output
@@ -1,15 +1,12 @@
 from algorithm.engines.rules_engine import Rule
 from algorithm.contexts.CPSatContext import CPSatContext
+from algorithm.cpsatTools import add_no_earlier_shift
 
 
 def h_no_earlier_shift_next_day(r: Rule, ctx: CPSatContext):
     """Forbid backward transitions: no T->M, N->M, N->T between consecutive days."""
-    m = ctx.m
-    for e in ctx.Employees:
-        for day in range(1, ctx.num_days):
-            m.Add(ctx.shift_id[(e, day + 1)] >= ctx.shift_id[(e, day)]).OnlyEnforceIf(
-                [ctx.off[(e, day)].Not(), ctx.off[(e, day + 1)].Not()]
-            )
+    add_no_earlier_shift(ctx.m, ctx.Employees, ctx.D, ctx.S, ctx.off, ctx.shift_id, ctx.y,
+                         ctx.allowed_teams_per_emp)
 
 
 def h_max_consecutive_days(r: Rule, ctx: CPSatContext):
@@ -50,14 +47,8 @@ def h_total_workdays(r: Rule, ctx: CPSatContext):
     min_days = int(min_days) if min_days is not None else None
 
     for e in ctx.Employees:
-        workdays = []
-        for d in ctx.D:
-            w = m.NewBoolVar(f"work_{e}_{d}")
-            m.Add(w == 1).OnlyEnforceIf(ctx.off[(e, d)].Not())
-            m.Add(w == 0).OnlyEnforceIf(ctx.off[(e, d)])
-            workdays.append(w)
-
-        total_work_expr = sum(workdays)
+        # a worked day is simply "not off"
+        total_work_expr = sum(1 - ctx.off[(e, d)] for d in ctx.D)
 
         if max_days is not None and min_days is not None:
             if max_days == min_days:
@@ -3,13 +3,7 @@ from algorithm.contexts.GreedyContext import GreedyContext
 
 def g_no_earlier_shift_next_day(r: Rule, ctx: GreedyContext):
     e, d, s = ctx.e, ctx.d, ctx.s
-    prev_shift = ctx.get_shift(e, d - 1)
-    next_shift = ctx.get_shift(e, d + 1)
-    if prev_shift and prev_shift > s:
-        return False
-    if next_shift and next_shift < s:
-        return False
-    return True
+    return not ctx.state(e).breaks_shift_order(d, s)
 
 
 
@@ -21,16 +15,7 @@ def g_max_consecutive_days(r: Rule, ctx: GreedyContext):
     window = int(r.params.get("window", 6))
     max_in = int(r.params.get("max_worked", 5))
 
-    worked = sorted(ctx.get_days_worked(e) + [d])
-    consecutive = 1
-    for i in range(1, len(worked)):
-        if worked[i] == worked[i - 1] + 1:
-            consecutive += 1
-            if consecutive > max_in:
-                return False
-        else:
-            consecutive = 1
-    return True
+    return ctx.state(e).run_length_with(d) <= max_in
 
 
 
@@ -40,19 +25,14 @@ def g_max_special_days(r: Rule, ctx: GreedyContext):
     """
     e, d = ctx.e, ctx.d
     cap = int(r.params.get("cap", 22))
-    special_days = ctx.special_days
-
-    worked_special = sum(1 for day in ctx.get_days_worked(e) if day in special_days)
-    if d in special_days:
-        worked_special += 1
-    return worked_special <= cap
+    return ctx.state(e).special_worked_with(d) <= cap
 
 
 def g_total_workdays(r: Rule, ctx: GreedyContext):
     e = ctx.e
     max_days = int(r.params.get("max", 223))
     min_days = int(r.params.get("min", 0))
-    current = len(ctx.get_days_worked(e)) + 1  # +1 for proposed assignment
+    current = ctx.state(e).days_worked + 1  # +1 for proposed assignment
     if current > max_days:
         return False
     if current < min_days:
@@ -101,7 +81,95 @@ def g_target_workdays_balancing(r: Rule, ctx: GreedyContext):
     e = ctx.e
     target = int(r.params.get("target", 223))
     weight = int(r.params.get("penalty", 1))
-    current = len(ctx.get_days_worked(e)) + 1
+    current = ctx.state(e).days_worked + 1
     deviation = abs(current - target)
     ctx.add_score(weight * deviation)
     return True
+
+
+# --------------------------
+# Compiled variants
+# --------------------------
+# Used by RuleEngine.compile_greedy: each factory resolves the rule params and
+# the static parts of the context once and returns a function of the
+# persistent context. Checks return bool, scorers return a number.
+
+def c_no_earlier_shift_next_day(r: Rule, ctx: GreedyContext):
+    state = ctx.state
+
+    def check(ctx):
+        return not state(ctx.e).breaks_shift_order(ctx.d, ctx.s)
+    return check
+
+
+def c_max_consecutive_days(r: Rule, ctx: GreedyContext):
+    max_in = int(r.params.get("max_worked", 5))
+    state = ctx.state
+
+    def check(ctx):
+        return state(ctx.e).run_length_with(ctx.d) <= max_in
+    return check
+
+
+def c_max_special_days(r: Rule, ctx: GreedyContext):
+    cap = int(r.params.get("cap", 22))
+    state = ctx.state
+
+    def check(ctx):
+        return state(ctx.e).special_worked_with(ctx.d) <= cap
+    return check
+
+
+def c_total_workdays(r: Rule, ctx: GreedyContext):
+    max_days = int(r.params.get("max", 223))
+    state = ctx.state
+
+    def check(ctx):
+        return state(ctx.e).days_worked + 1 <= max_days
+    return check
+
+
+def c_vacation_block(r: Rule, ctx: GreedyContext):
+    vac_sets = {e: set(days) for e, days in ctx.vacations.items()}
+    empty = frozenset()
+
+    def check(ctx):
+        return ctx.d not in vac_sets.get(ctx.e, empty)
+    return check
+
+
+def c_team_eligibility(r: Rule, ctx: GreedyContext):
+    allowed = [set(teams) for teams in ctx.allowed_teams_per_emp]
+
+    def check(ctx):
+        return ctx.t in allowed[ctx.e - 1]
+    return check
+
+
+def c_min_coverage(r: Rule, ctx: GreedyContext):
+    below_min = 0 if r.kind.lower() == "hard" else 1
+    min_required = ctx.min_required
+    ideal_required = ctx.ideal_required
+    cover_count = ctx.cover_count
+
+    def score(ctx):
+        key = (ctx.d, ctx.s, ctx.t)
+        minimum = min_required.get(key, 0)
+        ideal = ideal_required.get(key, minimum)
+        current = cover_count.get(key, 0)
+        if current < minimum:
+            return below_min
+        if current < ideal:
+            return 2
+        return 3 + (current - ideal)
+    return score
+
+
+def c_target_workdays_balancing(r: Rule, ctx: GreedyContext):
+    target = int(r.params.get("target", 223))
+    weight = int(r.params.get("penalty", 1))
+    state = ctx.state
+
+    def score(ctx):
+        return weight * abs(state(ctx.e).days_worked + 1 - target)
+    return score
@@ -6,22 +6,26 @@ from collections import defaultdict
 
 from algorithm.utils import (
     build_calendar,
-    rows_to_vac_dict,
-    rows_to_req_dicts,
     export_schedule_to_csv,
     TEAM_ID_TO_CODE,
     get_team_id,
     get_team_code,
     schedule_to_table
 )
+from algorithm import scoring
+from algorithm import instrumentation
+from algorithm.moves import CellMove
+from algorithm.problemInstance import get_instance
 
 class HeuristicSolGabi:
 
     def __init__(
         self,
-        vacations_rows,
-        minimuns_rows,
+        vacs,
+        mins,
         employees,
+        vac_mask=None,
+        ideals=None,
         year=2025,
         nDias=365,
         nDiasTrabalho=223,
@@ -30,9 +34,12 @@ class HeuristicSolGabi:
         nMinTrabs=2,
         nMaxFolga=142,
         feriados=None,
-        shifts=2
+        shifts=2,
+        seed=None
     ):
         self.year = year
+        self.seed = seed
+        self.np_rng = np.random.default_rng(seed)
         self.nDias = nDias
         self.nDiasTrabalho = nDiasTrabalho
         self.nDiasTrabalhoFDS = nDiasTrabalhoFDS
@@ -51,18 +58,24 @@ class HeuristicSolGabi:
         # Number of shifts (2 or 3)
         self.shifts = int(shifts)
 
-        # Vacations: rows -> dict -> boolean matrix
-        vacs_dict = rows_to_vac_dict(vacations_rows)
+        # Vacations: {emp_id: [days]} (rows_to_vac_dict / ProblemInstance.vacs) and the
+        # (employees x days) boolean matrix, built here unless the instance's vac_mask is given
         self.nTrabs = len(employees)
-        self.Ferias = self._vac_dict_to_matrix(vacs_dict, self.nTrabs, self.nDias)
+        self.Ferias = vac_mask if vac_mask is not None else self._vac_dict_to_matrix(vacs, self.nTrabs, self.nDias)
         
         # Shift preferences (independent of team). Default: allow all available shifts.
         # Allowed teams per employee (list of team_ids) derived from labels using utils.
         self.Prefs = self._shift_prefs(employees)
         self.allowed_teams = self._allowed_teams(employees)
 
-        # Minimums and ideals
-        self.mins, self.ideals = rows_to_req_dicts(minimuns_rows)
+        # Minimums and ideals: {(day, shift, team_id): n}
+        self.mins = mins
+        self.ideals = ideals if ideals is not None else {}
+        team_ids = {t for ids in self.allowed_teams for t in ids}
+        team_ids.update(t for (_d, _s, t) in self.mins.keys())
+        self.req_tensor = scoring.requirements_tensor(
+            self.mins, self.nDias, self.shifts, max(team_ids) if team_ids else 0
+        )
 
         # schedule tensor: [emp, day, shift] with team_id or 0
         self.horario = np.zeros((self.nTrabs, self.nDias, 3), dtype=int)
@@ -205,21 +218,8 @@ class HeuristicSolGabi:
 
     def criterio1(self):
         """Excesso de dias seguidos acima do máximo."""
-        f1 = np.zeros(self.nTrabs, dtype=int)
-        for i in range(self.nTrabs):
-            # FIX: self.horario[i] has shape (nDias, 3); sum over axis=1
-            worked = ((self.horario[i] > 0).sum(axis=1) > 0).astype(int)
-            run = 0
-            for d in range(self.nDias):
-                if worked[d]:
-                    run += 1
-                else:
-                    if run > self.nDiasSeguidos:
-                        f1[i] += (run - self.nDiasSeguidos)
-                    run = 0
-            if run > self.nDiasSeguidos:
-                f1[i] += (run - self.nDiasSeguidos)
-        return f1
+        worked = scoring.worked_days(self.horario)
+        return scoring.consecutive_excess(worked, self.nDiasSeguidos)
 
     def criterio2(self):
         mask = self.fds_mask.copy()
@@ -237,39 +237,14 @@ class HeuristicSolGabi:
         return int(np.sum(dias_com_menos))
 
     def criterio4(self):
-        dias_trab = []
-        for i in range(self.nTrabs):
-            worked_day = (self.horario[i] > 0).sum(axis=1) > 0
-            worked_nonvac = np.sum(worked_day & ~self.Ferias[i])
-            dias_trab.append(worked_nonvac)
-        return np.abs(np.array(dias_trab) - self.nDiasTrabalho)
+        worked = scoring.worked_days(self.horario)
+        return scoring.workday_deviation(worked, self.Ferias, self.nDiasTrabalho)
 
     def criterio5(self):
-        f5 = np.zeros(self.nTrabs, dtype=int)
-        for i in range(self.nTrabs):
-            for d in range(self.nDias - 1):
-                td = 0 if self.horario[i, d, 0] > 0 else (1 if self.horario[i, d, 1] > 0 else (2 if self.horario[i, d, 2] > 0 else -1))
-                tn = 0 if self.horario[i, d + 1, 0] > 0 else (1 if self.horario[i, d + 1, 1] > 0 else (2 if self.horario[i, d + 1, 2] > 0 else -1))
-                if td != -1 and tn != -1 and tn < td:
-                    f5[i] += 1
-        return f5
+        return scoring.backward_transitions(self.horario)
 
     def criterio6(self):
-        counts = defaultdict(int)
-        for e in range(self.nTrabs):
-            for d in range(self.nDias):
-                for s in range(self.shifts):
-                    t = int(self.horario[e, d, s])
-                    if t > 0:
-                        counts[(d + 1, s + 1, t)] += 1
-
-        viol = 0
-        for (day, shift, team_id), req in self.mins.items():
-            if 1 <= day <= self.nDias and 1 <= shift <= self.shifts:
-                have = counts.get((day, shift, team_id), 0)
-                if have < req:
-                    viol += (req - have)
-        return int(viol)
+        return scoring.coverage_shortage(self.horario[:, :, :self.shifts], self.req_tensor)
 
     def calcular_criterios(self):
         return (
@@ -282,7 +257,33 @@ class HeuristicSolGabi:
         )
     
     # ---------- hill climbing ----------
-    def optimize(self, maxTime_sec=600, max_iter=400_000):
+    def _propose_move(self):
+        """Random swap of two (day, shift) cells of one employee, or None if it is a no-op."""
+        i = self.np_rng.integers(self.nTrabs)
+        mask = (self.dias_nv[0] == i)
+        if np.sum(mask) < 2:
+            return None
+
+        cand_days = self.dias_nv[1][mask]
+        dia1, dia2 = self.np_rng.choice(cand_days, 2, replace=False)
+        turno1, turno2 = self.np_rng.choice(self.shifts, 2, replace=False)
+
+        if self.horario[i, dia1, turno1] == self.horario[i, dia2, turno2]:
+            return None
+
+        return CellMove(i, [(dia1, turno1, self.horario[i, dia2, turno2]),
+                            (dia2, turno2, self.horario[i, dia1, turno1])])
+
+    def optimize(self, maxTime_sec=600, max_iter=400_000, batch_size=1, policy="first", deadline=None,
+                 progress=None):
+        """
+        Hill climbing over random swaps. Each step samples batch_size candidates;
+        policy="first" applies the first improving one, policy="best" the best of the batch.
+        deadline (algorithm.deadline.Deadline) also stops the search when it expires or is cancelled.
+        progress (algorithm.progress.ProgressReporter) gets the best cost per step.
+        """
+        if policy not in ("first", "best"):
+            raise ValueError(f"Unknown hill climbing policy '{policy}'.")
         start = time.time()
         f1o, f2o, f3o, f4o, f5o, f6o = self.calcular_criterios()
         iters = 0
@@ -291,37 +292,53 @@ class HeuristicSolGabi:
             return 2*np.sum(f1) + 3*np.sum(f2) + 2*f3 + 1*np.sum(f4) + 3*np.sum(f5) + 4*f6
 
         best_cost = peso(f1o, f2o, f3o, f4o, f5o, f6o)
+        proposed = accepted = scored = 0
+
+        def criteria():
+            return {"f1": np.sum(f1o), "f2": np.sum(f2o), "f3": f3o,
+                    "f4": np.sum(f4o), "f5": np.sum(f5o), "f6": f6o}
 
         while iters < max_iter and best_cost > 0:
             if time.time() - start > maxTime_sec:
                 print("Tempo máximo atingido, parando a otimização.")
                 break
+            if deadline is not None and deadline.expired():
+                print("Prazo da tarefa atingido ou tarefa cancelada, parando a otimização.")
+                break
 
-            iters += 1
-            i = np.random.randint(self.nTrabs)
-            mask = (self.dias_nv[0] == i)
-            if np.sum(mask) < 2:
-                continue
-
-            cand_days = self.dias_nv[1][mask]
-            dia1, dia2 = np.random.choice(cand_days, 2, replace=False)
-            turno1, turno2 = np.random.choice(self.shifts, 2, replace=False)
-
-            if self.horario[i, dia1, turno1] == self.horario[i, dia2, turno2]:
-                continue
-
-            hor = self.horario.copy()
-            hor[i, dia1, turno1], hor[i, dia2, turno2] = hor[i, dia2, turno2], hor[i, dia1, turno1]
-
-            old = self.horario
-            self.horario = hor
-            f1, f2, f3, f4, f5, f6 = self.calcular_criterios()
-            cost = peso(f1, f2, f3, f4, f5, f6)
-            if cost < best_cost:
-                best_cost = cost
-                f1o, f2o, f3o, f4o, f5o, f6o = f1, f2, f3, f4, f5, f6
-            else:
-                self.horario = old
+            best_move, best_crit = None, None
+            for _ in range(batch_size):
+                iters += 1
+                move = self._propose_move()
+                if move is None:
+                    continue
+                proposed += 1
+
+                # score in place, then undo; the winner is re-applied below
+                move.apply(self.horario)
+                crit = self.calcular_criterios()
+                scored += 1
+                cost = peso(*crit)
+                move.undo(self.horario)
+                if cost < best_cost:
+                    best_cost = cost
+                    best_move, best_crit = move, crit
+                    if policy == "first":
+                        break
+
+            if best_move is not None:
+                best_move.apply(self.horario)
+                f1o, f2o, f3o, f4o, f5o, f6o = best_crit
+                accepted += 1
+
+            if progress is not None:
+                progress.update(iters, best_cost, criteria, self.to_table)
+
+        if progress is not None:
+            progress.update(iters, best_cost, criteria, force=True)
+        instrumentation.count("moves_proposed", proposed)
+        instrumentation.count("moves_accepted", accepted)
+        instrumentation.count("scoring_calls", scored + 1)
 
         return {
             "time_sec": round(time.time() - start, 2),
@@ -349,29 +366,41 @@ class HeuristicSolGabi:
         sv.assignment = assignment
         return sv
 
+    def to_table(self):
+        sv = self.to_scheduler_like()
+        return schedule_to_table(
+            employees=sv.employees,
+            vacs=sv.vacs,
+            assignment=sv.assignment,
+            num_days=self.nDias,
+            shifts=self.shifts,
+        )
+
     def export_csv(self, filename="calendario.csv"):
         sv = self.to_scheduler_like()
         export_schedule_to_csv(sv, filename=filename, num_days=self.nDias)
 
-def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None):
-    scheduler = HeuristicSolGabi(
-        vacations_rows=vacations,
-        minimuns_rows=minimuns,
-        employees=employees,
-        year=year,
-        feriados=[1, 108, 110, 115, 121, 161, 170, 227, 278, 305, 335, 342, 359],
-        shifts=shifts
-    )
-
-    scheduler.atribuir_turnos_eficiente()
-    scheduler.optimize(maxTime_sec=int(maxTime) * 60)
-
-    sv = scheduler.to_scheduler_like()  
-    return schedule_to_table(
-        employees=sv.employees,
-        vacs=sv.vacs,
-        assignment=sv.assignment,
-        num_days=scheduler.nDias,
-        shifts=int(shifts),
-    )
+def solve(vacations, minimuns, employees, maxTime, year=2025, shifts=2, rules=None,
+          batch_size=1, policy="first", seed=None, deadline=None, progress=None):
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    with instrumentation.span("build"):
+        scheduler = HeuristicSolGabi(
+            vacs=inst.vacs,
+            mins=inst.mins,
+            employees=employees,
+            vac_mask=inst.vac_mask,
+            ideals=inst.ideals,
+            year=inst.year,
+            nDias=inst.num_days,
+            feriados=sorted(inst.holidays),
+            shifts=shifts,
+            seed=seed
+        )
+
+        scheduler.atribuir_turnos_eficiente()
+    with instrumentation.span("solve"):
+        scheduler.optimize(maxTime_sec=int(maxTime) * 60, batch_size=batch_size, policy=policy,
+                           deadline=deadline, progress=progress)
+
+    return scheduler.to_table()
 
@@ -0,0 +1,265 @@
+import os
+import subprocess
+
+import numpy as np
+import pulp
+
+
+SENSES = {"<=": "L", ">=": "G", "==": "E"}
+
+
+class MatrixModel:
+    """
+    Minimization MILP kept as arrays instead of pulp objects.
+
+    Columns and rows are plain integer indices: add_vars() returns an array of
+    column indices shaped like the variable family, add_rows() takes a 2-D array
+    of column indices (one row per line) and appends the coefficients in COO form.
+    Names are only generated when the model is written (C<j> / R<i>), so building
+    a model is a handful of numpy operations per constraint family.
+    The model goes to CBC as an MPS file (solve_cbc), the same binary PuLP uses;
+    pulp models can be run the same way with solve_pulp_cbc.
+    """
+
+    def __init__(self, name="model"):
+        self.name = name
+        self.lb = np.zeros(0)
+        self.ub = np.zeros(0)
+        self.cost = np.zeros(0)
+        self.integer = np.zeros(0, dtype=bool)
+        self._coo = []  # [(rows, cols, coefs)]
+        self.sense = []  # chunks of "L" / "G" / "E"
+        self.rhs = []    # chunks of floats
+        self.num_rows = 0
+        self.objective_value = None
+
+    @property
+    def num_cols(self):
+        return len(self.cost)
+
+    @property
+    def nnz(self):
+        return sum(len(r) for r, _c, _v in self._coo)
+
+    # ---------- building ----------
+
+    def add_vars(self, shape, lb=0.0, ub=1.0, integer=True, cost=0.0):
+        """New columns; returns their indices as an array of the given shape."""
+        n = int(np.prod(shape))
+        cols = np.arange(self.num_cols, self.num_cols + n).reshape(shape)
+        self.lb = np.concatenate([self.lb, np.full(n, lb, dtype=float)])
+        self.ub = np.concatenate([self.ub, np.full(n, np.inf if ub is None else ub, dtype=float)])
+        self.cost = np.concatenate([self.cost, np.broadcast_to(np.asarray(cost, dtype=float), shape).ravel()])
+        self.integer = np.concatenate([self.integer, np.full(n, integer, dtype=bool)])
+        return cols
+
+    def add_rows(self, cols, sense, rhs, coefs=1.0):
+        """
+        One row per line of cols (n_rows x n_terms column indices):
+        sum(coefs * x[cols]) <sense> rhs. coefs and rhs broadcast to cols / n_rows.
+        Returns the row indices.
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        if cols.ndim == 1:
+            cols = cols[None, :]
+        n, k = cols.shape
+        rows = np.arange(self.num_rows, self.num_rows + n)
+        coefs = np.broadcast_to(np.asarray(coefs, dtype=float), cols.shape)
+        self._coo.append((np.repeat(rows, k), cols.ravel(), coefs.ravel()))
+        self.sense.append(np.full(n, SENSES[sense]))
+        self.rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (n,)).copy())
+        self.num_rows += n
+        return rows
+
+    def set_cost(self, cols, cost=1.0):
+        """Objective coefficients of the given columns (others unchanged)."""
+        self.cost[np.asarray(cols).ravel()] = cost
+
+    def clear_objective(self):
+        self.cost[:] = 0.0
+
+    def matrix(self):
+        """(rows, cols, coefs) of all constraints, sorted by column then row."""
+        if not self._coo:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows = np.concatenate([r for r, _c, _v in self._coo])
+        cols = np.concatenate([c for _r, c, _v in self._coo])
+        vals = np.concatenate([v for _r, _c, v in self._coo])
+        order = np.lexsort((rows, cols))
+        return rows[order], cols[order], vals[order]
+
+    # ---------- MPS ----------
+
+    def write_mps(self, path):
+        rows, cols, vals = self.matrix()
+        sense = np.concatenate(self.sense) if self.sense else np.zeros(0, dtype="<U1")
+        rhs = np.concatenate(self.rhs) if self.rhs else np.zeros(0)
+
+        # objective entries go with the column's constraint entries; every column
+        # gets at least one line so its bounds are valid
+        obj_cols = np.flatnonzero(self.cost)
+        missing = np.setdiff1d(np.arange(self.num_cols), np.concatenate([cols, obj_cols]))
+        entry_cols = np.concatenate([cols, obj_cols, missing])
+        entry_rows = np.concatenate([rows, np.full(len(obj_cols) + len(missing), -1)])
+        entry_vals = np.concatenate([vals, self.cost[obj_cols], np.zeros(len(missing))])
+        order = np.lexsort((entry_rows, entry_cols))
+        entry_cols, entry_rows, entry_vals = entry_cols[order], entry_rows[order], entry_vals[order]
+
+        lines = [f"NAME          {self.name}\n", "ROWS\n", " N  OBJ\n"]
+        lines += [f" {s}  R{i}\n" for i, s in enumerate(sense.tolist())]
+        lines.append("COLUMNS\n")
+        in_int = False
+        prev = -1
+        for j, i, v in zip(entry_cols.tolist(), entry_rows.tolist(), entry_vals.tolist()):
+            if j != prev:
+                if self.integer[j] != in_int:
+                    in_int = not in_int
+                    lines.append(f"    MARK      'MARKER'                 '{'INTORG' if in_int else 'INTEND'}'\n")
+                prev = j
+            lines.append(f"    C{j}  {'OBJ' if i < 0 else f'R{i}'}  {v:.12g}\n")
+        if in_int:
+            lines.append("    MARK      'MARKER'                 'INTEND'\n")
+
+        lines.append("RHS\n")
+        lines += [f"    RHS       R{i}  {rhs[i]:.12g}\n" for i in np.flatnonzero(rhs).tolist()]
+
+        lines.append("BOUNDS\n")
+        for j in range(self.num_cols):
+            lo, up = self.lb[j], self.ub[j]
+            if self.integer[j] and lo == 0 and up == 1:
+                lines.append(f" BV BND       C{j}\n")
+                continue
+            if lo != 0 or (self.integer[j] and np.isinf(up)):
+                lines.append(f" LO BND       C{j}  {lo:.12g}\n")
+            if not np.isinf(up):
+                lines.append(f" UP BND       C{j}  {up:.12g}\n")
+        lines.append("ENDATA\n")
+
+        with open(path, "w") as f:
+            f.writelines(lines)
+
+    # ---------- CBC ----------
+
+    def write_solution(self, path, values):
+        """CBC solution file (as read by -mips) with one value per column."""
+        lines = ["Stopped on time - objective value 0\n"]
+        lines += [f"{j:>7} C{j} {v:>15.12g} {0:>23}\n" for j, v in enumerate(np.asarray(values, dtype=float).tolist())]
+        with open(path, "w") as f:
+            f.writelines(lines)
+
+    def read_solution(self, path):
+        """(pulp status, column values) from a CBC solution file."""
+        values = np.zeros(self.num_cols)
+        status, _sol_status = pulp.PULP_CBC_CMD().get_status(path)
+        with open(path) as f:
+            header = f.readline().split()
+            if "value" in header:
+                self.objective_value = float(header[header.index("value") + 1])
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    break
+                if parts[0] == "**":
+                    parts = parts[1:]
+                if parts[1].startswith("C"):
+                    values[int(parts[1][1:])] = float(parts[2])
+        return status, values
+
+    def solve_cbc(self, time_limit=None, gap_rel=None, seed=None, mip_start=None, msg=True, deadline=None,
+                  preprocess=True):
+        """
+        Writes the model as MPS and runs the CBC binary bundled with PuLP.
+        mip_start: optional column values passed to CBC as a MIP start (-mips).
+        preprocess: CBC preprocessing. CBC only keeps a MIP start with it off; with it on
+            the start is checked on the preprocessed model and usually rejected. Phase 2 of
+            the two-phase ILP (60 s, seed 1) reached the same or a better objective with it on:
+              17 employees, 3 teams:           on 166 in 18.7 s, off (start kept) 166 in 11.8 s
+              30 employees, 3 shifts, 3 teams: on 352 in 48.5 s, off (start kept) 1095, the start
+            so it stays on unless the model is small enough for the start to pay off.
+        deadline: a cancellation of the task terminates CBC (see run_cbc).
+        Returns (pulp status, column values); (LpStatusNotSolved, zeros) when cancelled.
+        """
+        solver = pulp.PULP_CBC_CMD(msg=msg)
+        if not solver.available():
+            raise pulp.PulpSolverError(f"CBC not available at {solver.path}")
+        mps, sol, mst = solver.create_tmp_files(self.name, "mps", "sol", "mst")
+        self.write_mps(mps)
+
+        args = [solver.path, mps]
+        if mip_start is not None:
+            self.write_solution(mst, mip_start)
+            args += ["-mips", mst]
+        if not preprocess:
+            args += ["-preprocess", "off"]
+        args += cbc_limits(time_limit, gap_rel, seed) + ["-solve", "-solution", sol]
+
+        try:
+            if not run_cbc(args, deadline, msg):
+                return pulp.LpStatusNotSolved, np.zeros(self.num_cols)
+            if not os.path.exists(sol):
+                raise pulp.PulpSolverError(f"No solution file from {solver.path}")
+            return self.read_solution(sol)
+        finally:
+            solver.delete_tmp_files(mps, sol, mst)
+
+
+# ---------- CBC runs ----------
+
+def cbc_limits(time_limit=None, gap_rel=None, seed=None):
+    """CBC command-line options for a time limit (s), relative gap and random seed."""
+    args = []
+    if time_limit is not None:
+        args += ["-sec", str(time_limit), "-timeMode", "elapsed"]
+    if gap_rel is not None:
+        args += ["-ratio", str(gap_rel)]
+    if seed is not None:
+        args += ["-randomCbcSeed", str(int(seed) % 2**31)]
+    return args
+
+
+def run_cbc(args, deadline=None, msg=True):
+    """
+    Runs the CBC binary ([path, *options]). A cancellation of the task deadline
+    terminates it: returns False in that case, True once CBC finished.
+    """
+    out = None if msg else subprocess.DEVNULL
+    proc = subprocess.Popen(args, stdout=out, stderr=out, stdin=subprocess.DEVNULL)
+    if deadline is None:
+        returncode = proc.wait()
+    else:
+        with deadline.watch(proc.terminate):
+            returncode = proc.wait()
+        if deadline.cancelled:
+            print("[CBC] Task cancelled, solver terminated.")
+            return False
+    if returncode != 0:
+        raise pulp.PulpSolverError(f"Error while executing {args[0]}")
+    return True
+
+
+def solve_pulp_cbc(lp, time_limit=None, gap_rel=None, seed=None, msg=True, deadline=None):
+    """
+    pulp LpProblem.solve(PULP_CBC_CMD(...)) through run_cbc, so the task deadline
+    can stop it. Sets the variable values and status on lp; returns the status
+    (LpStatusNotSolved when cancelled).
+    """
+    solver = pulp.PULP_CBC_CMD(msg=msg)
+    if not solver.available():
+        raise pulp.PulpSolverError(f"CBC not available at {solver.path}")
+    mps, sol = solver.create_tmp_files(lp.name, "mps", "sol")
+    vs, variables_names, constraints_names, _objective = lp.writeMPS(mps, rename=1)
+    args = [solver.path, mps] + (["-max"] if lp.sense == pulp.LpMaximize else [])
+    args += cbc_limits(time_limit, gap_rel, seed) + ["-solve", "-printingOptions", "all", "-solution", sol]
+    try:
+        if not run_cbc(args, deadline, msg):
+            lp.assignStatus(pulp.LpStatusNotSolved)
+            return pulp.LpStatusNotSolved
+        if not os.path.exists(sol):
+            raise pulp.PulpSolverError(f"No solution file from {solver.path}")
+        status, values, _dj, _pi, _slacks, sol_status = solver.readsol_MPS(
+            sol, lp, vs, variables_names, constraints_names)
+        lp.assignVarsVals(values)
+        lp.assignStatus(status, sol_status)
+        return status
+    finally:
+        solver.delete_tmp_files(mps, sol)
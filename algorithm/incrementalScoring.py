@@ -0,0 +1,202 @@
+import numpy as np
+
+from algorithm import scoring
+
+
+class IncrementalScorer:
+    """
+    Keeps the GreedyClimbing criteria up to date for a schedule tensor
+    horario[emp, day, shift] -> team_id (0 = off), so that a move touching a
+    few (day, shift) cells of one employee is scored from the affected days
+    only instead of rescanning the whole tensor.
+
+    State kept per employee: number of runs above the consecutive-day limit,
+    worked special days, worked non-vacation days and backward transitions.
+    Coverage is kept per (day, shift, team).
+
+    All indices are 0-based (employee index, day, shift); team ids are the
+    same ids stored in the tensor.
+    """
+
+    def __init__(self, scheduler, horario, max_consec=5, special_cap=22, target_workdays=223):
+        self.h = horario
+        self.num_emps = horario.shape[0]
+        self.num_days = scheduler.num_days
+        self.shifts = scheduler.shifts
+        self.max_consec = max_consec
+        self.special_cap = special_cap
+        self.target_workdays = target_workdays
+
+        self.special_mask = scheduler.special_mask
+        self.vac_array = scheduler.vac_array
+        self.special = self.special_mask.tolist()
+        self.vac = self.vac_array.tolist()
+
+        # dense minimum requirements, indexed by the raw team id
+        self.req_tensor = scheduler.req_tensor
+        self.req = self.req_tensor.tolist()
+
+        self._rebuild()
+
+    # ---------- full (re)computation ----------
+
+    def _rebuild(self):
+        h = self.h
+        worked = scoring.worked_days(h)
+        self.load = (h > 0).sum(axis=2).tolist()  # shifts worked per (emp, day)
+        self.cover = scoring.coverage_counts(h, self.req_tensor.shape[2] - 1).tolist()
+
+        self.long_runs = scoring.consecutive_runs_over(worked, self.max_consec).tolist()
+        self.special_worked = (worked & self.special_mask).sum(axis=1).tolist()
+        self.days_worked = (worked & ~self.vac_array).sum(axis=1).tolist()
+        self.backward = scoring.backward_transitions(h).tolist()
+
+        self.c1 = sum(self.long_runs)
+        self.c2 = sum(max(0, n - self.special_cap) for n in self.special_worked)
+        self.c3 = scoring.coverage_shortage(h, self.req_tensor)
+        self.c4 = sum(abs(n - self.target_workdays) for n in self.days_worked)
+        self.c5 = sum(self.backward)
+
+    def criterios(self):
+        return self.c1, self.c2, self.c3, self.c4, self.c5
+
+    def score(self):
+        return self.c1 + self.c2 + self.c3 + self.c4 + self.c5
+
+    # ---------- helpers ----------
+
+    def _count_long_runs(self, worked, start, end):
+        runs = 0
+        run = 0
+        for d in range(start, end + 1):
+            if worked(d):
+                run += 1
+            else:
+                if run > self.max_consec:
+                    runs += 1
+                run = 0
+        if run > self.max_consec:
+            runs += 1
+        return runs
+
+    def _first_shift(self, e, d):
+        for s in range(self.shifts):
+            if self.h[e, d, s] > 0:
+                return s
+        return None
+
+    def _is_backward(self, e, d):
+        s_today = self._first_shift(e, d)
+        s_next = self._first_shift(e, d + 1)
+        return s_today is not None and s_next is not None and s_next < s_today
+
+    def _regions(self, e, days, new_load):
+        """
+        Day intervals that contain every run touched by the changed days.
+        Each interval is bounded by days that are off both before and after
+        the move (or by the ends of the year), so no run crosses its edges.
+        """
+        load = self.load[e]
+
+        def busy(d):
+            return load[d] > 0 or new_load.get(d, 0) > 0
+
+        regions = []
+        for d in days:
+            left, right = d, d
+            while left > 0 and busy(left - 1):
+                left -= 1
+            while right < self.num_days - 1 and busy(right + 1):
+                right += 1
+            if regions and left <= regions[-1][1] + 1:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], right))
+            else:
+                regions.append((left, right))
+        return regions
+
+    # ---------- move evaluation ----------
+
+    def _diff(self, move, commit):
+        """
+        Per-criterion change of applying move (a CellMove) to the tensor.
+        The move is undone afterwards unless commit is True, in which case
+        it stays applied and the kept state is updated too.
+        """
+        h = self.h
+        e = move.emp_idx
+        load = self.load[e]
+        old = [(d, s, int(h[e, d, s])) for d, s, _t in move.cells]
+
+        new_load = {}
+        cover_change = {}
+        for (d, s, t_old), (_d, _s, t_new) in zip(old, move.cells):
+            new_load[d] = new_load.get(d, load[d]) + (t_new > 0) - (t_old > 0)
+            if t_old > 0:
+                cover_change[(d, s, t_old)] = cover_change.get((d, s, t_old), 0) - 1
+            if t_new > 0:
+                cover_change[(d, s, t_new)] = cover_change.get((d, s, t_new), 0) + 1
+        days = sorted(new_load)
+        pairs = sorted({p for d in days for p in (d - 1, d) if 0 <= p < self.num_days - 1})
+        regions = self._regions(e, days, new_load)
+
+        # before
+        runs_before = sum(self._count_long_runs(lambda d: load[d] > 0, a, b) for a, b in regions)
+        backward_before = sum(self._is_backward(e, d) for d in pairs)
+        shortage_before = sum(max(0, self.req[d][s][t] - self.cover[d][s][t]) for d, s, t in cover_change)
+
+        # after
+        move.apply(h)
+        runs_after = sum(
+            self._count_long_runs(lambda d: new_load.get(d, load[d]) > 0, a, b) for a, b in regions
+        )
+        backward_after = sum(self._is_backward(e, d) for d in pairs)
+        shortage_after = sum(
+            max(0, self.req[d][s][t] - self.cover[d][s][t] - change)
+            for (d, s, t), change in cover_change.items()
+        )
+
+        special_change = 0
+        worked_change = 0
+        for d in days:
+            was, now = load[d] > 0, new_load[d] > 0
+            if was != now:
+                step = 1 if now else -1
+                if self.special[d]:
+                    special_change += step
+                if not self.vac[e][d]:
+                    worked_change += step
+
+        sp_old = self.special_worked[e]
+        wd_old = self.days_worked[e]
+        d1 = runs_after - runs_before
+        d2 = max(0, sp_old + special_change - self.special_cap) - max(0, sp_old - self.special_cap)
+        d3 = shortage_after - shortage_before
+        d4 = abs(wd_old + worked_change - self.target_workdays) - abs(wd_old - self.target_workdays)
+        d5 = backward_after - backward_before
+
+        if commit:
+            for d, value in new_load.items():
+                load[d] = value
+            for (d, s, t), change in cover_change.items():
+                self.cover[d][s][t] += change
+            self.long_runs[e] += d1
+            self.special_worked[e] += special_change
+            self.days_worked[e] += worked_change
+            self.backward[e] += d5
+            self.c1 += d1
+            self.c2 += d2
+            self.c3 += d3
+            self.c4 += d4
+            self.c5 += d5
+        else:
+            move.undo(h)
+
+        return d1, d2, d3, d4, d5
+
+    def delta(self, move):
+        """Score change of applying move (a CellMove); the tensor is left untouched."""
+        return sum(self._diff(move, commit=False))
+
+    def apply(self, move):
+        """Applies move (a CellMove) in place, updates the kept state and returns the score change."""
+        return sum(self._diff(move, commit=True))
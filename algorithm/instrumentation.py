@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILERS = ("cprofile", "pyinstrument")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/shared_tmp/profiles")
+
+_local = threading.local()
+
+
+class Instrumentation:
+    """
+    Timing spans and counters of one task.
+
+    Used as a context manager around the solver run (TaskManager.run_task): while
+    it is active in a thread, the module-level span() and count() record into it;
+    with no active Instrumentation they do nothing, so solvers call them
+    unconditionally. Spans are flat: every span name accumulates its seconds and
+    calls, nested spans are counted in their parent as well.
+
+    profiler "cprofile" / "pyinstrument" also profiles the run and writes
+    <profile_dir>/<task_id>.prof (pstats) or .html. Only the activating thread is
+    profiled or recorded; solver worker processes are not.
+
+    report() is a plain dict for the schedule metadata:
+      {"spans": {"solve": {"seconds": 12.3, "calls": 1}, ...},
+       "counters": {"moves_proposed": 41000, ...}, "profile": path or None}
+    """
+
+    def __init__(self, task_id=None, profiler=None, profile_dir=None):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}', expected one of {PROFILERS}.")
+        self.task_id = task_id
+        self.profiler = profiler
+        self.profile_dir = profile_dir or PROFILE_DIR
+        self.spans = {}     # name -> [seconds, calls]
+        self.counters = {}  # name -> int
+        self.profile_path = None
+        self._profiler = None
+        self._previous = None
+
+    # ---------- recording ----------
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += time.perf_counter() - start
+            entry[1] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def merge(self, other):
+        """Adds the spans and counters of another Instrumentation (e.g. sent back by a task process)."""
+        for name, (seconds, calls) in other.spans.items():
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+        for name, n in other.counters.items():
+            self.count(name, n)
+        self.profile_path = self.profile_path or other.profile_path
+
+    def report(self):
+        return {
+            "spans": {name: {"seconds": round(s, 4), "calls": c} for name, (s, c) in self.spans.items()},
+            "counters": dict(self.counters),
+            "profile": self.profile_path,
+        }
+
+    # ---------- activation ----------
+
+    def __enter__(self):
+        self._previous = getattr(_local, "current", None)
+        _local.current = self
+        if self.profiler:
+            self._start_profiler()
+        return self
+
+    def __exit__(self, *exc):
+        _local.current = self._previous
+        self._previous = None
+        if self._profiler is not None:
+            self._stop_profiler()
+        return False
+
+    def _start_profiler(self):
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+                self._profiler.start()
+                return
+            except ImportError:
+                print("[Instrumentation] pyinstrument is not installed, using cProfile.")
+        import cProfile
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def _stop_profiler(self):
+        profiler, self._profiler = self._profiler, None
+        name = str(self.task_id or f"task-{os.getpid()}-{int(time.time())}")
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            if hasattr(profiler, "output_html"):
+                profiler.stop()
+                path = os.path.join(self.profile_dir, f"{name}.html")
+                with open(path, "w") as f:
+                    f.write(profiler.output_html())
+            else:
+                profiler.disable()
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+            self.profile_path = path
+            print(f"[Instrumentation] Profile written to {path}")
+        except OSError as e:
+            print(f"[Instrumentation] Could not write the profile: {e}")
+
+    def __getstate__(self):
+        # sent to / from task processes: only the recorded data
+        state = dict(self.__dict__)
+        state["_profiler"] = None
+        state["_previous"] = None
+        return state
+
+
+def current():
+    """The Instrumentation active in this thread, or None."""
+    return getattr(_local, "current", None)
+
+
+@contextmanager
+def span(name):
+    """Times the block under `name` in the active Instrumentation (no-op without one)."""
+    instr = getattr(_local, "current", None)
+    if instr is None:
+        yield
+        return
+    with instr.span(name):
+        yield
+
+
+def count(name, n=1):
+    """Adds n to counter `name` of the active Instrumentation (no-op without one)."""
+    instr = getattr(_local, "current", None)
+    if instr is not None:
+        instr.count(name, n)
@@ -0,0 +1,45 @@
+from bisect import insort
+
+
+class CellMove:
+    """
+    In-place change of a few (day, shift) cells in one employee's row of a
+    schedule tensor horario[emp, day, shift] -> team_id (0 = off).
+    Local search uses it for swaps: apply() writes the new values and keeps
+    the old ones, undo() puts them back, so no copy of the tensor is needed.
+    All indices are 0-based.
+    """
+
+    __slots__ = ("emp_idx", "cells", "old")
+
+    def __init__(self, emp_idx, cells):
+        self.emp_idx = emp_idx
+        self.cells = [(int(d), int(s), int(t)) for d, s, t in cells]  # [(day, shift, new_team)]
+        self.old = None
+
+    def apply(self, horario):
+        e = self.emp_idx
+        self.old = [(d, s, int(horario[e, d, s])) for d, s, _t in self.cells]
+        for d, s, t in self.cells:
+            horario[e, d, s] = t
+
+    def undo(self, horario):
+        e = self.emp_idx
+        for d, s, t in self.old:
+            horario[e, d, s] = t
+
+    def sync(self, emp, assignment, schedule_table):
+        """
+        Patches assignment (emp -> [(day, shift, team)]) and schedule_table
+        ((day, shift, team) -> [emp]) for the changed cells only, after apply().
+        Both use 1-based days/shifts and are kept sorted, like update_from_horario.
+        """
+        for (d, s, t_old), (_d, _s, t_new) in zip(self.old, self.cells):
+            if t_old == t_new:
+                continue
+            if t_old > 0:
+                assignment[emp].remove((d + 1, s + 1, t_old))
+                schedule_table[(d + 1, s + 1, t_old)].remove(emp)
+            if t_new > 0:
+                insort(assignment[emp], (d + 1, s + 1, t_new))
+                insort(schedule_table[(d + 1, s + 1, t_new)], emp)
@@ -0,0 +1,260 @@
+import math
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from algorithm.utils import export_schedule_to_csv, get_team_code
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
+from algorithm.rollingHorizon import RollingHorizon
+from algorithm.greedyClimbing import _build_scheduler
+from algorithm.cpsatTools import MIN_WORKERS, available_workers
+from algorithm.deadline import Deadline, cancellable_pool, worker_token
+
+
+SPLITS = ("team", "quarter")
+
+
+def _emp_codes(employee):
+    codes = [get_team_code(t) for t in employee.get("teams", []) if t]
+    return [c for c in codes if c] or ["A"]
+
+
+def _team_demand(minimuns):
+    """team code -> sum of the minimums over the year"""
+    demand = defaultdict(int)
+    for team_label, kind, _shift, *counts in minimuns:
+        if kind.strip().lower().startswith("min"):
+            demand[team_label.strip().split()[-1].upper()] += sum(int(float(c)) for c in counts if str(c).strip())
+    return demand
+
+
+def team_groups(employees, minimuns):
+    """
+    Splits the employees into team-disjoint groups.
+    Returns ([(employee indices (0-based), team codes)], team codes used per employee).
+    Teams linked by a multi-team employee end up in the same group; when that leaves a
+    single group, multi-team employees are pinned to one of their teams (the one with
+    the most minimum demand per employee so far) so every team becomes its own group.
+    """
+    parent = {}
+
+    def find(c):
+        parent.setdefault(c, c)
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    codes = [_emp_codes(e) for e in employees]
+    for emp_codes in codes:
+        for c in emp_codes[1:]:
+            parent[find(c)] = find(emp_codes[0])
+        find(emp_codes[0])
+
+    roots = {find(c) for c in parent}
+    if len(roots) == 1 and len(parent) > 1:
+        demand = _team_demand(minimuns)
+        staff = defaultdict(int)
+        for emp_codes in codes:
+            if len(emp_codes) == 1:
+                staff[emp_codes[0]] += 1
+        for i, emp_codes in enumerate(codes):
+            if len(emp_codes) > 1:
+                pick = max(emp_codes, key=lambda c: demand.get(c, 0) / (staff[c] + 1))
+                staff[pick] += 1
+                codes[i] = [pick]
+        parent = {c: c for c in parent}
+
+    groups = defaultdict(lambda: ([], set()))
+    for i, emp_codes in enumerate(codes):
+        idx, teams = groups[find(emp_codes[0])]
+        idx.append(i)
+        teams.update(emp_codes)
+    return [(idx, sorted(teams)) for idx, teams in groups.values()], codes
+
+
+def quarter_ranges(num_days, parts=4):
+    """[(first day, last day)] of `parts` consecutive blocks of the year."""
+    size = math.ceil(num_days / parts)
+    return [(a, min(a + size - 1, num_days)) for a in range(1, num_days + 1, size)]
+
+
+def split_cap(total, weights):
+    """
+    Splits a yearly cap over parts by weight: floored shares, the remainder to the
+    heaviest part, so the part caps add up to `total` exactly.
+    """
+    weight = sum(weights)
+    if not weight:
+        weights, weight = [1] * len(weights), len(weights)
+    caps = [total * w // weight for w in weights]
+    caps[max(range(len(weights)), key=lambda k: weights[k])] += total - sum(caps)
+    return caps
+
+
+def quarter_seams(num_days, max_consec=5, parts=4):
+    """[(first day, last day)] of the seam after each quarter: its first max_consec days."""
+    return [(a, min(a + max_consec - 1, num_days)) for a, _b in quarter_ranges(num_days, parts)[1:]]
+
+
+def _solve_part(key, vacations, minimuns, employees, year, shifts, first_day, last_day, target_workdays,
+                special_cap, seconds, seed, formulation, solver_profile, workers):
+    """One sub-problem on the rolling-horizon CP-SAT model. Runs in a cancellable_pool worker."""
+    scheduler = RollingHorizon(
+        vacations, minimuns, employees, year=year, shifts=shifts,
+        window_days=last_day - first_day + 1, overlap_days=0,
+        target_workdays=target_workdays, special_cap=special_cap,
+        formulation=formulation, solver_profile=solver_profile, seed=seed,
+        first_day=first_day, last_day=last_day, workers=workers,
+    )
+    scheduler.solve(max_seconds=seconds, deadline=Deadline(seconds, worker_token()))
+    return key, dict(scheduler.assignment), scheduler.profile
+
+
+def build_parts(vacations, minimuns, employees, year=2025, shifts=2, split="team", target_workdays=223, special_cap=22):
+    """
+    Independent sub-problems as (key, part employee ids (1-based, global), kwargs of _solve_part).
+      "team":    one part per team-disjoint group of employees, whole year
+      "quarter": one part per quarter, all employees, yearly caps split over the quarters
+                 (see split_cap; the quarter seams are solved again by repair_seams)
+    """
+    if split not in SPLITS:
+        raise ValueError(f"Unknown split '{split}', expected one of {SPLITS}.")
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    common = dict(year=year, shifts=shifts)
+
+    parts = []
+    if split == "team":
+        groups, codes = team_groups(employees, minimuns)
+        for idx, teams in groups:
+            # renumber the group's employees 1..n, as the templates expect; vacations by position
+            sub_vacs = [[f"Employee {n}"] + ["1" if off else "0" for off in inst.vac_mask[i]]
+                        for n, i in enumerate(idx, start=1)]
+            sub_emps = [{**employees[i], "teams": [f"Equipa {c}" for c in codes[i]]} for i in idx]
+            sub_mins = [row for row in minimuns if row[0].strip().split()[-1].upper() in teams]
+            parts.append((f"team {'+'.join(teams)}", [i + 1 for i in idx], dict(
+                vacations=sub_vacs, minimuns=sub_mins, employees=sub_emps, first_day=1,
+                last_day=inst.num_days, target_workdays=target_workdays, special_cap=special_cap, **common,
+            )))
+    else:
+        quarters = quarter_ranges(inst.num_days)
+        workday_caps = split_cap(target_workdays, [b - a + 1 for a, b in quarters])
+        special_caps = split_cap(special_cap, [sum(1 for d in inst.special_days if a <= d <= b)
+                                               for a, b in quarters])
+        for k, (a, b) in enumerate(quarters, start=1):
+            parts.append((f"Q{k} ({a}..{b})", list(inst.emp_ids), dict(
+                vacations=vacations, minimuns=minimuns, employees=employees, first_day=a, last_day=b,
+                target_workdays=workday_caps[k - 1], special_cap=special_caps[k - 1], **common,
+            )))
+    return parts
+
+
+def repair_seams(assignment, vacations, minimuns, employees, year=2025, shifts=2, seconds=None, deadline=None,
+                 target_workdays=223, special_cap=22, max_consec=5, **kwargs):
+    """
+    Solves the quarter seams (quarter_seams) again on the stitched schedule with every day
+    outside the seam fixed, so the yearly caps, the shift order and max_consec hold across
+    the quarter boundaries. kwargs go to RollingHorizon (seed, formulation, ...).
+    `assignment` (emp_id -> [(day, shift, team)]) is updated in place; a seam left
+    unsolved (deadline, no solution) keeps its stitched days.
+    """
+    inst = get_instance(vacations, minimuns, employees, year, shifts)
+    seams = quarter_seams(inst.num_days, max_consec)
+    start = time.time()
+    for k, (a, c) in enumerate(seams):
+        if deadline is not None and deadline.expired():
+            break
+        budget = None if seconds is None else max(1.0, (seconds - (time.time() - start)) / (len(seams) - k))
+        scheduler = RollingHorizon(
+            vacations, minimuns, employees, year=year, shifts=shifts, window_days=c - a + 1, overlap_days=0,
+            max_consec=max_consec, special_cap=special_cap, target_workdays=target_workdays,
+            first_day=a, last_day=c, **kwargs,
+        )
+        for emp_id, entries in assignment.items():
+            for (d, s, _t) in entries:
+                if not a <= d <= c:
+                    scheduler.states[emp_id - 1].assign(d, s)
+        scheduler.solve(max_seconds=budget, deadline=deadline)
+        if not scheduler.assignment:
+            continue
+        for emp_id in inst.emp_ids:
+            kept = [entry for entry in assignment.get(emp_id, []) if not a <= entry[0] <= c]
+            assignment[emp_id] = sorted(kept + scheduler.assignment.get(emp_id, []))
+    return assignment
+
+
+def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None, progress=None, formulation="compact", solver_profile=None,
+          split="team", workers=None, repair_share=0.3):
+    """
+    Decomposed CP-SAT: independent sub-problems (see build_parts) are solved concurrently
+    in a process pool, then stitched (quarter seams solved again, see repair_seams) and
+    repaired by the GreedyClimbing hill climbing on the whole year (same criteria as
+    "Greedy Randomized + Hill Climbing").
+    maxTime (minutes) is shared: repair_share of it goes to the repair pass.
+    """
+    tag = "[Parallel Decomposition]"
+    total = Deadline.budget(int(maxTime) * 60 if maxTime else None, deadline)
+    start = time.time()
+
+    parts = build_parts(vacations, minimuns, employees, year, shifts, split)
+    cpus = int(workers) if workers else available_workers()
+    procs = max(1, min(len(parts), cpus // MIN_WORKERS or 1))
+    rounds = math.ceil(len(parts) / procs)
+    seconds = max(1.0, total * (1 - repair_share) / rounds)
+    print(f"{tag} {len(parts)} sub-problems ({split}) on {procs} processes, {seconds:.0f}s each")
+
+    assignment = defaultdict(list)
+    finished = 0
+    cancelled = False
+    # the parts run in worker processes: only their overall time is recorded
+    with instrumentation.span("solve"), cancellable_pool(procs, deadline) as pool:
+        try:
+            futures = {
+                pool.submit(_solve_part, key, seed=seed, seconds=seconds, formulation=formulation,
+                            solver_profile=solver_profile, workers=max(MIN_WORKERS, cpus // procs), **kwargs): ids
+                for key, ids, kwargs in parts
+            }
+            pending = set(futures)
+            while pending and not cancelled:
+                # poll, so a cancel is seen while every part is still running
+                done, pending = wait(pending, timeout=Deadline.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, part_assignment, profile = future.result()
+                    if progress is not None and finished == 0 and profile is not None:
+                        # every part runs the same profile; num_workers is per process
+                        progress.solver_profile({**profile, "processes": procs})
+                    ids = futures[future]
+                    for local_id, entries in part_assignment.items():
+                        assignment[ids[local_id - 1]].extend(entries)
+                    finished += 1
+                    print(f"{tag} Sub-problem {key} done ({finished}/{len(parts)}, {time.time() - start:.1f}s)")
+                cancelled = deadline is not None and deadline.cancelled
+        finally:
+            # running parts stop on the token; queued ones are dropped
+            pool.shutdown(wait=not cancelled, cancel_futures=True)
+    if cancelled:
+        print(f"{tag} Task cancelled, dropped the unfinished sub-problems")
+
+    if split == "quarter" and not cancelled:
+        with instrumentation.span("seams"):
+            repair_seams(assignment, vacations, minimuns, employees, year, shifts,
+                         seconds=max(1.0, total - (time.time() - start)) / 2, deadline=deadline, seed=seed,
+                         formulation=formulation, solver_profile=solver_profile, workers=workers)
+
+    # repair: stitch the parts and run the hill climbing on the whole year
+    scheduler = _build_scheduler(vacations, minimuns, employees, None, year, shifts, seed, deadline)
+    for emp in scheduler.employees:
+        scheduler.assignment[emp] = sorted(assignment.get(emp, []))
+    stitched = scheduler.score(scheduler.create_horario())
+    repair_seconds = max(0.0, total - (time.time() - start))
+    print(f"{tag} Stitched score: {stitched}, repairing for {repair_seconds:.0f}s")
+    with instrumentation.span("repair"):
+        if repair_seconds > 0:
+            scheduler.hill_climbing(maxTime=repair_seconds / 60, progress=progress)
+        else:
+            scheduler.update_from_horario(scheduler.create_horario())
+
+    export_schedule_to_csv(scheduler, "schedule_decomposed.csv", num_days=scheduler.num_days)
+    return scheduler.to_table()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import holidays
+import numpy as np
+
+from algorithm import scoring
+from algorithm import instrumentation
+from algorithm.utils import (
+    build_calendar,
+    rows_to_vac_dict,
+    rows_to_req_dicts,
+    get_team_code,
+    get_team_id,
+)
+
+
+class FrozenDict(dict):
+    """Read-only dict for the shared instance data; still picklable (solvers ship it to worker processes)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("ProblemInstance data is shared between tasks and read-only; copy it first.")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class ProblemInstance:
+    """
+    Parsed scheduling problem shared by the solvers, built once per task.
+
+    Days, shifts and employee ids are 1-based in the dicts (same keys as
+    rows_to_vac_dict / rows_to_req_dicts); the arrays are 0-based:
+      vac_mask[emp, day]            True on vacation
+      special_mask[day]             Sunday or PT holiday
+      min_tensor/ideal_tensor[day, shift, team_id]
+      eligibility[emp, team_id]     employee may work for the team
+
+    Instances are shared through get_instance(), so they are read-only:
+    the arrays are flagged non-writeable, the dicts are FrozenDicts with
+    tuple values.
+    """
+
+    def __init__(self, vacations, minimuns, employees, year=2025, shifts=2):
+        self.year = int(year) if year is not None else 2025
+        self.shifts = int(shifts)
+
+        # Calendar
+        self.dates, self.sundays = build_calendar(self.year)
+        self.num_days = len(self.dates)
+        start_date = self.dates[0].date()
+        self.holiday_dates = holidays.country_holidays("PT", years=[self.year])
+        self.holidays = {(d - start_date).days + 1 for d in self.holiday_dates}
+        self.special_days = self.holidays | set(self.sundays)
+
+        # Employees and teams (team 'A' when none is given)
+        self.emp_ids = [i + 1 for i in range(len(employees))]
+        self.teams = {}
+        for emp_id, e in zip(self.emp_ids, employees):
+            codes = [get_team_code(t) for t in e.get("teams", []) if t]
+            ids = [get_team_id(c) for c in codes if c]
+            if not ids:
+                ids = [get_team_id("A")]
+            self.teams[emp_id] = ids
+
+        # Vacations and requirements
+        self.vacs = rows_to_vac_dict(vacations)
+        self.mins, self.ideals = rows_to_req_dicts(minimuns)
+
+        team_ids = {t for ids in self.teams.values() for t in ids}
+        team_ids.update(t for (_d, _s, t) in self.mins.keys())
+        team_ids.update(t for (_d, _s, t) in self.ideals.keys())
+        self.num_teams = max(team_ids) if team_ids else 0
+
+        # Arrays
+        n = len(self.emp_ids)
+        self.vac_mask = np.zeros((n, self.num_days), dtype=bool)
+        for emp_id, days in self.vacs.items():
+            if 1 <= emp_id <= n:
+                idx = np.array(days, dtype=int) - 1
+                self.vac_mask[emp_id - 1, idx[(idx >= 0) & (idx < self.num_days)]] = True
+
+        self.special_mask = np.zeros(self.num_days, dtype=bool)
+        self.special_mask[[d - 1 for d in self.special_days if 1 <= d <= self.num_days]] = True
+
+        self.min_tensor = scoring.requirements_tensor(self.mins, self.num_days, self.shifts, self.num_teams)
+        self.ideal_tensor = scoring.requirements_tensor(self.ideals, self.num_days, self.shifts, self.num_teams)
+
+        self.eligibility = np.zeros((n, self.num_teams + 1), dtype=bool)
+        for emp_id, ids in self.teams.items():
+            self.eligibility[emp_id - 1, ids] = True
+
+        for arr in (self.vac_mask, self.special_mask, self.min_tensor, self.ideal_tensor, self.eligibility):
+            arr.flags.writeable = False
+        self.teams = FrozenDict((e, tuple(ids)) for e, ids in self.teams.items())
+        self.vacs = FrozenDict((e, tuple(days)) for e, days in self.vacs.items())
+        self.mins = FrozenDict(self.mins)
+        self.ideals = FrozenDict(self.ideals)
+        self.holidays = frozenset(self.holidays)
+        self.special_days = frozenset(self.special_days)
+        self.sundays = tuple(self.sundays)
+        self.emp_ids = tuple(self.emp_ids)
+
+    @property
+    def allowed_teams(self):
+        """(team_ids) per employee, in employee order."""
+        return [self.teams[e] for e in self.emp_ids]
+
+
+# --------------------------
+# Memoization
+# --------------------------
+_CACHE_SIZE = 8
+_cache = OrderedDict()
+_cache_lock = threading.Lock()  # tasks run on a thread pool
+
+
+def instance_key(vacations, minimuns, employees, year, shifts):
+    """Content hash of the task templates."""
+    payload = json.dumps([vacations, minimuns, employees, year, shifts], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_instance(vacations, minimuns, employees, year=2025, shifts=2):
+    """ProblemInstance for the given templates, reused while the same content keeps coming in."""
+    year = int(year) if year is not None else 2025
+    shifts = int(shifts)
+    with instrumentation.span("parse"):
+        key = instance_key(vacations, minimuns, employees, year, shifts)
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+        instance = ProblemInstance(vacations, minimuns, employees, year, shifts)
+    with _cache_lock:
+        _cache[key] = instance
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return instance
@@ -0,0 +1,85 @@
+import time
+
+
+class ProgressReporter:
+    """
+    Progress channel of one solver run.
+
+    Solvers call update() from their search loop (or CP-SAT solution callback);
+    at most every `interval` seconds a progress event is put on `sink`, and when
+    snapshot_interval is set, at most that often a best-so-far schedule table:
+      {"type": "progress", "iteration", "score", "criteria", "elapsed"}
+      {"type": "snapshot", "iteration", "score", "elapsed", "schedule"}
+    The first update also puts one {"type": "first_solution", "iteration", "score", "elapsed"},
+    finish() one {"type": "final", ...} with the last recorded score, and
+    solver_profile() one {"type": "solver_profile", "profile"} with the CP-SAT
+    parameters the solver applied.
+    `sink` only needs put(), e.g. a queue.Queue or a multiprocessing Manager queue
+    when the solver runs in another process. Events are plain dicts.
+    """
+
+    def __init__(self, sink, interval=10.0, snapshot_interval=None):
+        self.sink = sink
+        self.interval = float(interval)
+        self.snapshot_interval = float(snapshot_interval) if snapshot_interval else None
+        self.start = time.time()
+        self.iteration = 0
+        self.score = None
+        self._next_status = self.start + self.interval
+        self._next_snapshot = self.start + self.snapshot_interval if self.snapshot_interval else None
+        self._snapshot_score = None
+        self._first = True
+
+    def update(self, iteration, score, criteria=None, schedule=None, force=False):
+        """
+        Records the current best score. criteria ({name: value}) and schedule (table)
+        may be given as callables; they are only evaluated when an event is due.
+        """
+        self.iteration = iteration
+        self.score = score
+        now = time.time()
+        if self._first:
+            self._first = False
+            self.sink.put({
+                "type": "first_solution",
+                "iteration": int(iteration),
+                "score": float(score),
+                "elapsed": round(now - self.start, 2),
+            })
+        if force or now >= self._next_status:
+            self._next_status = now + self.interval
+            if callable(criteria):
+                criteria = criteria()
+            self.sink.put({
+                "type": "progress",
+                "iteration": int(iteration),
+                "score": float(score),
+                "criteria": {k: float(v) for k, v in (criteria or {}).items()},
+                "elapsed": round(now - self.start, 2),
+            })
+        if (schedule is not None and self._next_snapshot is not None and now >= self._next_snapshot
+                and (self._snapshot_score is None or score < self._snapshot_score)):
+            self._next_snapshot = now + self.snapshot_interval
+            self._snapshot_score = score
+            self.sink.put({
+                "type": "snapshot",
+                "iteration": int(iteration),
+                "score": float(score),
+                "elapsed": round(now - self.start, 2),
+                "schedule": schedule() if callable(schedule) else schedule,
+            })
+
+    def solver_profile(self, profile):
+        """Puts the CP-SAT profile the solver applied (see algorithm.cpsatTools.apply_profile)."""
+        self.sink.put({"type": "solver_profile", "profile": dict(profile)})
+
+    def finish(self):
+        """Puts the last recorded score as a "final" event (nothing if the solver never reported one)."""
+        if self.score is None:
+            return
+        self.sink.put({
+            "type": "final",
+            "iteration": int(self.iteration),
+            "score": float(self.score),
+            "elapsed": round(time.time() - self.start, 2),
+        })
@@ -0,0 +1,238 @@
+import math
+import time
+from collections import defaultdict
+
+from ortools.sat.python import cp_model
+
+from algorithm.utils import export_schedule_to_csv, schedule_to_table
+from algorithm import instrumentation
+from algorithm.problemInstance import get_instance
+from algorithm.contexts.EmployeeState import EmployeeState
+from algorithm.cpsatTools import (
+    add_assignment_vars,
+    add_no_earlier_shift,
+    apply_profile,
+    extract_assignment,
+    solve_model,
+)
+
+
+class RollingHorizon:
+    """
+    Solves the yearly schedule as a sequence of overlapping CP-SAT windows.
+
+    Each window covers window_days committed days plus overlap_days of look-ahead;
+    only the committed days are kept, the look-ahead is solved again by the next
+    window. Boundary state comes from the days already committed (EmployeeState):
+      - worked days just before the window, so "max 5 worked in any 6 days"
+        holds across the boundary
+      - last shift before the window (no earlier shift on its first day)
+      - the same two rules at the window end, for days after it already in the
+        states (the seam windows of parallelDecomposition.repair_seams)
+      - worked Sundays/holidays: hard cap on what is left of the 22, soft
+        pro-rated share for the window
+      - worked days: hard cap on what is left of the 223, pro-rated target for
+        the window (by workable days) penalized like the yearly target
+    Objective per window, as in CSP.py: 1000 * unmet minimum + workday deviation.
+    first_day/last_day restrict the run to part of the year (target_workdays and
+    special_cap then apply to that part).
+    """
+
+    W_UNMET_MIN = 1000
+    W_WORKDAY_DEV = 1
+    W_SPECIAL_OVER = 10
+
+    def __init__(self, vacations, minimuns, employees, year=2025, shifts=2, window_days=31, overlap_days=7,
+                 max_consec=5, special_cap=22, target_workdays=223, formulation="compact",
+                 solver_profile=None, seed=None, first_day=1, last_day=None, workers=None):
+        if window_days < 1 or overlap_days < 0:
+            raise ValueError("window_days must be >= 1 and overlap_days >= 0.")
+        self.inst = get_instance(vacations, minimuns, employees, year, shifts)
+        self.shifts = int(shifts)
+        self.num_days = self.inst.num_days
+        self.first_day = int(first_day)
+        self.last_day = int(last_day) if last_day else self.num_days
+        if not 1 <= self.first_day <= self.last_day <= self.num_days:
+            raise ValueError(f"Invalid day range {first_day}..{last_day}.")
+        self.window_days = int(window_days)
+        self.overlap_days = int(overlap_days)
+        self.max_consec = max_consec
+        self.special_cap = special_cap
+        self.target_workdays = target_workdays
+        self.formulation = formulation
+        self.solver_profile = solver_profile
+        self.seed = seed
+        self.workers = workers
+        self.profile = None  # CP-SAT parameters applied to the windows (apply_profile)
+
+        self.Employees = range(len(self.inst.emp_ids))  # 0-based internal, like the CP-SAT models
+        self.S = range(1, self.shifts + 1)
+        self.allowed_teams_per_emp = self.inst.allowed_teams
+        self.special_days = set(self.inst.special_days)
+
+        self.assignment = defaultdict(list)  # emp_id(1b) -> [(day, shift, team)]
+        self.states = {e: EmployeeState(self.num_days, self.special_days) for e in self.Employees}
+
+    def windows(self):
+        """[(first committed day, last committed day, last look-ahead day)]"""
+        out = []
+        for a in range(self.first_day, self.last_day + 1, self.window_days):
+            b = min(a + self.window_days - 1, self.last_day)
+            out.append((a, b, min(b + self.overlap_days, self.last_day)))
+        return out
+
+    def _workable(self, e, days):
+        return sum(1 for d in days if not self.inst.vac_mask[e, d - 1])
+
+    # ---------- window model ----------
+
+    @instrumentation.span("build")
+    def _build_window(self, a, c):
+        D = range(a, c + 1)
+        m = cp_model.CpModel()
+        vac_mask = {(e, d): bool(self.inst.vac_mask[e, d - 1]) for e in self.Employees for d in D}
+        off, shift_id, y = add_assignment_vars(m, self.Employees, D, self.S, vac_mask,
+                                               self.allowed_teams_per_emp, self.formulation)
+        add_no_earlier_shift(m, self.Employees, D, self.S, off, shift_id, y, self.allowed_teams_per_emp)
+
+        obj = []
+        special_left = sum(1 for d in range(a, self.last_day + 1) if d in self.special_days)
+        for e in self.Employees:
+            state = self.states[e]
+            worked = [1 - off[(e, d)] for d in D]
+
+            # boundary: last shift before the window, first shift after it (when already fixed)
+            last = state.get_shift(a - 1)
+            if last:
+                earlier = [y[(e, a, s, t)] for s in self.S if s < last
+                           for t in self.allowed_teams_per_emp[e] if (e, a, s, t) in y]
+                for v in earlier:
+                    m.Add(v == 0)
+            nxt = state.get_shift(c + 1)
+            if nxt:
+                later = [y[(e, c, s, t)] for s in self.S if s > nxt
+                         for t in self.allowed_teams_per_emp[e] if (e, c, s, t) in y]
+                for v in later:
+                    m.Add(v == 0)
+
+            # boundary: max_consec worked days in any (max_consec + 1)-day span, across both window ends
+            span = self.max_consec + 1
+            for start in range(max(1, a - span + 1), min(c, self.num_days - span + 1) + 1):
+                days = range(start, start + span)
+                fixed = sum(1 for d in days if not a <= d <= c and state.is_worked(d))
+                free = [1 - off[(e, d)] for d in days if a <= d <= c]
+                if fixed + len(free) > self.max_consec:
+                    m.Add(fixed + sum(free) <= self.max_consec)
+
+            # Sundays/holidays: what is left of the yearly cap, soft pro-rated share
+            sp_left = max(0, self.special_cap - state.special_worked)
+            sp_terms = [1 - off[(e, d)] for d in D if d in self.special_days]
+            if sp_terms:
+                m.Add(sum(sp_terms) <= sp_left)
+                share = math.ceil(sp_left * len(sp_terms) / max(1, special_left))
+                sp_over = m.NewIntVar(0, len(sp_terms), f"sp_over_{e}")
+                m.Add(sum(sp_terms) - share <= sp_over)
+                obj.append(self.W_SPECIAL_OVER * sp_over)
+
+            # workdays: what is left of the yearly target, pro-rated over the workable days
+            wd_left = max(0, self.target_workdays - state.days_worked)
+            workable = self._workable(e, D)
+            target = min(workable, round(wd_left * workable / max(1, self._workable(e, range(a, self.last_day + 1)))))
+            m.Add(sum(worked) <= wd_left)
+            dev_under = m.NewIntVar(0, len(D), f"dev_under_{e}")
+            dev_over = m.NewIntVar(0, len(D), f"dev_over_{e}")
+            m.Add(sum(worked) + dev_under - dev_over == target)
+            obj.append(self.W_WORKDAY_DEV * (dev_under + dev_over))
+
+        # minimum coverage (soft)
+        for (day, s, t), req in self.inst.mins.items():
+            if a <= day <= c and s in self.S and int(req) > 0:
+                req = int(req)
+                cover = [y[(e, day, s, t)] for e in self.Employees if (e, day, s, t) in y]
+                u = m.NewIntVar(0, req, f"unmet_{day}_{s}_{t}")
+                m.Add(sum(cover) + u >= req)
+                obj.append(self.W_UNMET_MIN * u)
+
+        m.Minimize(sum(obj))
+        return m, y
+
+    # ---------- driver ----------
+
+    def solve(self, max_seconds=None, deadline=None, progress=None):
+        """Solves the windows in order; max_seconds (None = 60 s per window) is split over the windows left."""
+        windows = self.windows()
+        start = time.time()
+        total = max_seconds
+        if deadline is not None:
+            total = deadline.limit(total)
+
+        for k, (a, b, c) in enumerate(windows):
+            if deadline is not None and deadline.expired():
+                print(f"[RollingHorizon] Deadline reached, days {a}..{self.last_day} left unassigned.")
+                break
+            left = len(windows) - k
+            budget = 60.0 if total is None else max(1.0, (total - (time.time() - start)) / left)
+
+            m, y = self._build_window(a, c)
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = float(budget)
+            self.profile = apply_profile(solver, self.solver_profile, self.workers)
+            if progress is not None and k == 0:
+                progress.solver_profile(self.profile)
+            if self.seed is not None:
+                solver.parameters.random_seed = (int(self.seed) + k) % 2**31
+            status = solve_model(solver, m, deadline)
+
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                print(f"[RollingHorizon] Window {a}..{c}: {solver.StatusName(status)}, days {a}..{b} left off.")
+                continue
+            window_assign = extract_assignment(solver.Value, y)
+            for emp_id, entries in window_assign.items():
+                for (d, s, t) in entries:
+                    if d <= b:  # commit; the look-ahead is solved again by the next window
+                        self.assignment[emp_id].append((d, s, t))
+                        self.states[emp_id - 1].assign(d, s)
+            print(f"[RollingHorizon] Window {a}..{b} (+{c - b}): {solver.StatusName(status)}, "
+                  f"obj={solver.ObjectiveValue():.0f}, {solver.WallTime():.1f}s")
+            if progress is not None:
+                progress.update(k + 1, solver.ObjectiveValue(), schedule=self.to_table, force=True)
+
+        for entries in self.assignment.values():
+            entries.sort()
+        return self.assignment
+
+    def to_table(self):
+        return schedule_to_table(
+            employees=list(self.inst.emp_ids),
+            vacs={emp_id: self.inst.vacs.get(emp_id, []) for emp_id in self.inst.emp_ids},
+            assignment=self.assignment,
+            num_days=self.num_days,
+            shifts=self.shifts,
+        )
+
+
+def solve(vacations, minimuns, employees, maxTime=None, year=2025, shifts=2, rules=None, seed=None,
+          deadline=None, progress=None, formulation="compact", solver_profile=None,
+          window_days=31, overlap_days=7):
+    """
+    Rolling-horizon CP-SAT: the year in windows of window_days (+ overlap_days of look-ahead).
+    maxTime (minutes) is shared by all windows.
+    """
+    tag = "[Rolling Horizon CP-SAT]"
+    print(f"{tag} Executando algoritmo ({window_days}-day windows, {overlap_days}-day overlap)")
+
+    scheduler = RollingHorizon(
+        vacations, minimuns, employees, year=year, shifts=shifts,
+        window_days=window_days, overlap_days=overlap_days,
+        formulation=formulation, solver_profile=solver_profile, seed=seed,
+    )
+    scheduler.solve(max_seconds=(int(maxTime) * 60 if maxTime else None), deadline=deadline, progress=progress)
+
+    class View: pass
+    v = View()
+    v.employees = list(scheduler.inst.emp_ids)
+    v.vacs = scheduler.inst.vacs
+    v.assignment = scheduler.assignment
+    v.shifts = scheduler.shifts
+    export_schedule_to_csv(v, "schedule_rolling.csv", num_days=scheduler.num_days)
+    return scheduler.to_table()
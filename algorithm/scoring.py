@@ -0,0 +1,93 @@
+"""
+Array implementations of the schedule criteria shared by the solvers.
+
+All functions work on a schedule tensor horario[emp, day, shift] holding the
+team_id (0 = off) with 0-based days and shifts, and return either a per-employee
+array or a plain int total.
+"""
+
+import numpy as np
+
+
+def worked_days(horario):
+    """(employees x days) bool mask of days with at least one shift."""
+    return (horario > 0).any(axis=2)
+
+
+def run_lengths(worked):
+    """
+    Maximal runs of worked days.
+    Returns (emp, length) arrays with one entry per run.
+    """
+    n_emps, n_days = worked.shape
+    padded = np.zeros((n_emps, n_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = worked
+    edges = np.diff(padded, axis=1)
+    emp_start, start = np.nonzero(edges == 1)
+    _emp_end, end = np.nonzero(edges == -1)  # row-major, so runs line up with starts
+    return emp_start, end - start
+
+
+def consecutive_runs_over(worked, max_consec=5):
+    """Per employee: number of runs longer than max_consec days."""
+    emp, length = run_lengths(worked)
+    return np.bincount(emp[length > max_consec], minlength=worked.shape[0])
+
+
+def consecutive_excess(worked, max_consec=5):
+    """Per employee: days worked beyond max_consec, summed over all runs."""
+    emp, length = run_lengths(worked)
+    over = length > max_consec
+    return np.bincount(emp[over], weights=length[over] - max_consec, minlength=worked.shape[0]).astype(int)
+
+
+def special_days_excess(worked, special_mask, cap=22):
+    """Per employee: worked special days (Sundays/holidays) above cap. special_mask is (days,) or (employees x days)."""
+    return np.maximum((worked & special_mask).sum(axis=1) - cap, 0)
+
+
+def workday_deviation(worked, vac_mask, target=223):
+    """Per employee: |worked non-vacation days - target|."""
+    return np.abs((worked & ~vac_mask).sum(axis=1) - target)
+
+
+def first_shift(horario):
+    """(employees x days) index of the first worked shift, -1 when off."""
+    busy = horario > 0
+    return np.where(busy.any(axis=2), busy.argmax(axis=2), -1)
+
+
+def backward_transitions(horario):
+    """Per employee: consecutive worked days where the next day's first shift is earlier."""
+    first = first_shift(horario)
+    today, nxt = first[:, :-1], first[:, 1:]
+    return ((today >= 0) & (nxt >= 0) & (nxt < today)).sum(axis=1)
+
+
+def requirements_tensor(reqs, num_days, shifts, num_teams):
+    """
+    Dense (days x shifts x teams+1) tensor from {(day, shift, team_id): n}
+    (1-based keys, indexed by the raw team id). Keys outside the horizon are dropped.
+    """
+    tensor = np.zeros((num_days, shifts, num_teams + 1), dtype=int)
+    for (day, shift, team), required in reqs.items():
+        if 1 <= day <= num_days and 1 <= shift <= shifts and 0 < team <= num_teams:
+            tensor[day - 1, shift - 1, team] = int(required)
+    return tensor
+
+
+def coverage_counts(horario, num_teams):
+    """(days x shifts x teams+1) number of employees per (day, shift, team)."""
+    _n_emps, num_days, shifts = horario.shape
+    num_teams = max(num_teams, int(horario.max(initial=0)))
+    _emp, day, shift = np.nonzero(horario)
+    slot = (day * shifts + shift) * (num_teams + 1) + horario[_emp, day, shift]
+    counts = np.bincount(slot, minlength=num_days * shifts * (num_teams + 1))
+    return counts.reshape(num_days, shifts, num_teams + 1)
+
+
+def coverage_shortage(horario, req_tensor):
+    """Total missing employees below req_tensor over all (day, shift, team)."""
+    num_teams = req_tensor.shape[2] - 1
+    counts = coverage_counts(horario, num_teams)[:, :, :num_teams + 1]
+    return int(np.maximum(req_tensor - counts, 0).sum())
@@ -2,6 +2,7 @@ import csv
 import os
 from datetime import date
 import pandas as pd
+from algorithm import instrumentation
 
 TEAM_CODE_TO_ID = {'A': 1, 'B': 2} # will be updated if there are more teams
 TEAM_ID_TO_CODE = {v: k for k, v in TEAM_CODE_TO_ID.items()}
@@ -143,6 +144,7 @@ def rows_to_req_dicts(req_rows):
     return mins, ideals
 
 
+@instrumentation.span("export_csv")
 def export_schedule_to_csv(scheduler, filename="schedule.csv", num_days=365):
     header = ["funcionario"] + [f"Dia {i+1}" for i in range(num_days)]
     label_all = {1: "M_", 2: "T_", 3: "N_"}
@@ -169,6 +171,7 @@ def export_schedule_to_csv(scheduler, filename="schedule.csv", num_days=365):
             writer.writerow(row)
     print(f"Schedule exported to {filename}")
 
+@instrumentation.span("schedule_to_table")
 def schedule_to_table(*, employees: list, vacs: dict, assignment: dict, num_days: int, shifts: int = 2):
     """Builds the schedule table as a list of rows."""
     header = ["funcionario"] + [f"Dia {d}" for d in range(1, num_days + 1)]
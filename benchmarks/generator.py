@@ -0,0 +1,150 @@
+"""
+Synthetic vacation / requirement templates for scaling tests.
+
+Writes files in the formats of data/ (read by rows_to_vac_dict / rows_to_req_dicts):
+  vacations: 'Employee N,0,1,...' one column per day of the year, no header
+  minimuns:  header 'Equipa,Tipo,Turno,1 jan,...', then per team and shift a
+             'Minimo' and an 'Ideal' row ('Equipa A,Minimo,M,2,2,...')
+
+    python -m benchmarks.generator --employees 500 --teams 6 --shifts 3 --out /tmp/instances
+
+Team membership follows template_employees, which the benchmark runner also uses,
+so the requirements match the staff that will be scheduled:
+  tightness = minimum staff-days required / staff-days available (223 per employee)
+"""
+
+import argparse
+import csv
+import math
+import random
+import string
+from pathlib import Path
+
+import holidays as hl
+import pandas as pd
+
+MONTHS = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
+SHIFT_CODES = ["M", "T", "N"]
+TEAM_CODES = string.ascii_uppercase  # the KPI parser reads single-letter team codes
+WORKDAYS = 223
+SPECIAL_DAY_LOAD = 0.6   # Sundays/holidays need fewer people than weekdays
+IDEAL_MARGIN = 0.3       # ideal = minimum + 30%, at least the minimum
+
+
+def template_employees(num_employees, codes):
+    """
+    Employees as the API sends them: {'name': 'Employee N', 'teams': ['Equipa X', ...]}.
+    Employee i works for team i % n; every fourth employee also for the next team.
+    """
+    codes = sorted(codes)
+    employees = []
+    for i in range(num_employees):
+        teams = [codes[i % len(codes)]]
+        if i % 4 == 0 and len(codes) > 1:
+            teams.append(codes[(i + 1) % len(codes)])
+        employees.append({"name": f"Employee {i + 1}", "teams": [f"Equipa {c}" for c in teams]})
+    return employees
+
+
+def _days(year):
+    return list(pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31"))
+
+
+def vacation_rows(num_employees, vacation_density=30 / 365, year=2025, rng=None):
+    """Every employee gets round(density * days) vacation days in 1 to 3 blocks."""
+    rng = rng or random.Random()
+    num_days = len(_days(year))
+    total = round(vacation_density * num_days)
+    if not 0 <= total < num_days:
+        raise ValueError("vacation_density must be in [0, 1).")
+    rows = []
+    for n in range(1, num_employees + 1):
+        blocks = min(total, rng.randint(1, 3)) if total else 0
+        # block lengths and the gaps around them: random compositions of total / free days
+        cuts = sorted(rng.sample(range(1, total), blocks - 1)) if blocks > 1 else []
+        lengths = [b - a for a, b in zip([0] + cuts, cuts + [total])]
+        free = num_days - total
+        inner = sorted(rng.sample(range(1, free), blocks)) if blocks and free > blocks else [0] * blocks
+        gaps = [b - a for a, b in zip([0] + inner[:-1], inner)]
+        bits, day = [0] * num_days, 0
+        for gap, length in zip(gaps, lengths):
+            day += gap
+            bits[day:day + length] = [1] * length
+            day += length
+        rows.append([f"Employee {n}"] + [str(b) for b in bits])
+    return rows
+
+
+def minimuns_rows(employees, shifts=2, tightness=0.9, year=2025, rng=None):
+    """
+    Minimo/Ideal rows per team and shift. Each team's daily minimum is its share of
+    tightness * available staff-days, lower on Sundays/holidays, randomly rounded.
+    """
+    if shifts not in (2, 3):
+        raise ValueError("shifts must be 2 or 3.")
+    if tightness <= 0:
+        raise ValueError("tightness must be > 0.")
+    rng = rng or random.Random()
+    days = _days(year)
+    pt_holidays = hl.country_holidays("PT", years=[year])
+    load = [SPECIAL_DAY_LOAD if d.weekday() == 6 or d.date() in pt_holidays else 1.0 for d in days]
+
+    staff = {}  # team code -> employees (multi-team employees split evenly)
+    for e in employees:
+        codes = [t.split()[-1] for t in e["teams"]]
+        for c in codes:
+            staff[c] = staff.get(c, 0.0) + 1.0 / len(codes)
+
+    rows = [["Equipa", "Tipo", "Turno"] + [f"{d.day} {MONTHS[d.month - 1]}" for d in days]]
+    for code in sorted(staff):
+        per_unit_load = tightness * staff[code] * WORKDAYS / sum(load) / shifts  # people per shift, weekday
+        for s in SHIFT_CODES[:shifts]:
+            mins = [math.floor(x) + (rng.random() < x - math.floor(x)) for x in (per_unit_load * l for l in load)]
+            ideals = [max(m, math.ceil(m * (1 + IDEAL_MARGIN))) for m in mins]
+            rows.append([f"Equipa {code}", "Minimo", s] + [str(m) for m in mins])
+            rows.append([f"Equipa {code}", "Ideal", s] + [str(i) for i in ideals])
+    return rows
+
+
+def write_instance(out_dir, employees=100, teams=2, shifts=2, vacation_density=30 / 365, tightness=0.9,
+                   year=2025, seed=None):
+    """Writes one vacation and one minimuns template; returns their paths."""
+    if not 1 <= teams <= len(TEAM_CODES):
+        raise ValueError(f"teams must be between 1 and {len(TEAM_CODES)}.")
+    if employees < 1:
+        raise ValueError("employees must be >= 1.")
+    rng = random.Random(seed)
+    staff = template_employees(employees, TEAM_CODES[:teams])
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tag = f"e{employees}_t{teams}_s{shifts}_v{vacation_density:.3f}_c{tightness:.2f}_seed{seed}"
+    vac_path = out_dir / f"VacationTemplate_{tag}.csv"
+    mins_path = out_dir / f"minimuns_{tag}.csv"
+    with open(vac_path, "w", newline="", encoding="ISO-8859-1") as f:
+        csv.writer(f).writerows(vacation_rows(employees, vacation_density, year, rng))
+    with open(mins_path, "w", newline="", encoding="ISO-8859-1") as f:
+        csv.writer(f).writerows(minimuns_rows(staff, shifts, tightness, year, rng))
+    return vac_path, mins_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--teams", type=int, default=2)
+    parser.add_argument("--shifts", type=int, default=2, choices=(2, 3))
+    parser.add_argument("--vacation-density", type=float, default=30 / 365, help="share of the year on vacation")
+    parser.add_argument("--tightness", type=float, default=0.9, help="required / available staff-days")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="benchmarks/results/instances")
+    args = parser.parse_args(argv)
+
+    vac_path, mins_path = write_instance(args.out, args.employees, args.teams, args.shifts, args.vacation_density,
+                                         args.tightness, args.year, args.seed)
+    print(vac_path)
+    print(mins_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Benchmark of the registered solvers over the data/ templates.
+
+Runs every algorithm of TaskManager.algorithms on VacationTemplate*.csv x minimuns*.csv
+with 2 and 3 shifts, a fixed seed and a fixed time budget, one fresh process per run,
+and writes one JSON file with per run:
+  wall time, peak RSS (solver process and its children, e.g. CBC), time to the first
+  schedule reported through the progress channel, iterations and iterations/s of the
+  local searches, and the final KPIs of algorithm.kpiVerification.analyze.
+
+    python -m benchmarks.run --seconds 60 --algorithms CSP "hill climbing" --shifts 2
+    python -m benchmarks.run --baseline benchmarks/results/old.json
+
+The templates carry no team information: employee i gets team i % n of the teams in
+the minimuns file, every fourth employee also the next one (see template_employees).
+
+Scaling tests run on generated instances (benchmarks.generator) instead of data/:
+    python -m benchmarks.run --synthetic 100 500 1000 --teams 6 --tightness 0.95 --algorithms CSP
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import generator
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+INSTANCES_DIR = RESULTS_DIR / "instances"
+
+# progress updates count local search steps for these
+LOCAL_SEARCHES = {"hill climbing", "Greedy Randomized + Hill Climbing"}
+
+
+# --------------------------
+# Templates
+# --------------------------
+def read_vacations(path):
+    with open(path, encoding="ISO-8859-1") as f:
+        return [row for row in csv.reader(f) if row and row[0].strip().startswith("Employee")]
+
+
+def read_minimuns(path):
+    with open(path, encoding="ISO-8859-1") as f:
+        text = f.read()
+    rows = [row for row in csv.reader(io.StringIO(text)) if len(row) > 3 and row[0].strip() != "Equipa"]
+    return rows, text
+
+
+def template_employees(num_employees, minimuns):
+    """Employees as the API sends them, over the teams of the minimuns file."""
+    codes = {row[0].strip().split()[-1].upper() for row in minimuns}
+    return generator.template_employees(num_employees, codes)
+
+
+def template_cases(algorithms, shifts, seeds, seconds, vacations_glob="VacationTemplate*.csv",
+                   minimuns_glob="minimuns*.csv"):
+    cases = []
+    for vac in sorted(glob.glob(str(DATA_DIR / vacations_glob))):
+        for mins in sorted(glob.glob(str(DATA_DIR / minimuns_glob))):
+            for s in shifts:
+                for seed in seeds:
+                    for algorithm in algorithms:
+                        cases.append({
+                            "algorithm": algorithm, "vacations": os.path.relpath(vac, ROOT),
+                            "minimuns": os.path.relpath(mins, ROOT), "shifts": s, "seed": seed,
+                            "seconds": seconds,
+                        })
+    return cases
+
+
+def synthetic_cases(algorithms, shifts, seeds, seconds, sizes, teams=2, vacation_density=30 / 365,
+                    tightness=0.9, year=2025):
+    """Writes one generated instance per size x shifts x seed to INSTANCES_DIR (same seed, same files)."""
+    cases = []
+    for n in sizes:
+        for s in shifts:
+            for seed in seeds:
+                vac, mins = generator.write_instance(INSTANCES_DIR, n, teams, s, vacation_density, tightness,
+                                                     year, seed)
+                for algorithm in algorithms:
+                    cases.append({
+                        "algorithm": algorithm, "vacations": os.path.relpath(vac, ROOT),
+                        "minimuns": os.path.relpath(mins, ROOT), "shifts": s, "seed": seed,
+                        "seconds": seconds, "employees": n,
+                    })
+    return cases
+
+
+# --------------------------
+# One run (child process)
+# --------------------------
+class _Probe:
+    """Stands in for a ProgressReporter: only keeps the first and last update."""
+
+    def __init__(self):
+        self.start = time.time()
+        self.first = None
+        self.last = None
+        self.iteration = 0
+        self.score = None
+
+    def update(self, iteration, score, criteria=None, schedule=None, force=False):
+        now = time.time()
+        if self.first is None:
+            self.first = (now, int(iteration))
+        self.last = now
+        self.iteration = int(iteration)
+        self.score = score
+
+    def finish(self):
+        pass
+
+
+def _holidays(year):
+    import holidays as hl
+    import pandas as pd
+    start = pd.Timestamp(f"{year}-01-01").date()
+    return {(d - start).days + 1 for d in hl.country_holidays("PT", years=[year])}
+
+
+def run_case(case, year=2025, log_path=None):
+    """Runs one benchmark case in this process; returns its result dict."""
+    from modules.TaskManager import TaskManager
+    from algorithm.deadline import Deadline
+    from algorithm.kpiVerification import analyze
+
+    result = dict(case)
+    vacations = read_vacations(ROOT / case["vacations"])
+    minimuns, mins_text = read_minimuns(ROOT / case["minimuns"])
+    employees = template_employees(len(vacations), minimuns)
+
+    probe = _Probe()
+    start = time.time()
+    try:
+        table = TaskManager().run_task(
+            task_id="benchmark", title="benchmark", algorithm_name=case["algorithm"],
+            vacations=vacations, minimuns=minimuns, employees=employees,
+            maxTime=max(1, math.ceil(case["seconds"] / 60)), year=year, shifts=case["shifts"],
+            seed=case["seed"], deadline=Deadline(case["seconds"]), progress=probe,
+        )
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+        table = None
+    end = time.time()
+
+    result["wall_time"] = round(end - start, 3)
+    result["time_to_first_feasible"] = round(probe.first[0] - start, 3) if probe.first else None
+    if case["algorithm"] in LOCAL_SEARCHES and probe.first and probe.last > probe.first[0]:
+        result["iterations"] = probe.iteration
+        result["iterations_per_second"] = round((probe.iteration - probe.first[1]) / (probe.last - probe.first[0]), 1)
+    result["final_score"] = float(probe.score) if probe.score is not None else None
+
+    if table:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as f:
+            csv.writer(f).writerows(table)
+        try:
+            result["kpis"] = analyze(f.name, _holidays(year), mins_text, employees, year)
+        except Exception as e:
+            result["kpis_error"] = f"{type(e).__name__}: {e}"
+        finally:
+            os.unlink(f.name)
+
+    # ru_maxrss is in KiB on Linux
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result["peak_rss_children_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    if log_path:
+        result["log"] = str(log_path)
+    return result
+
+
+def _child(case, conn, log_path, workdir):
+    # solver output (including CBC's) goes to the log file, exported CSVs to workdir
+    with open(log_path or os.devnull, "w") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        sys.stdout = os.fdopen(1, "w", buffering=1)
+        sys.stderr = os.fdopen(2, "w", buffering=1)
+        os.chdir(workdir)
+        try:
+            conn.send(run_case(case, log_path=log_path))
+        except Exception as e:
+            conn.send({**case, "status": "error", "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(case, log_path=None, grace=60.0):
+    """run_case in a fresh process (clean RSS); killed after 3x its budget plus grace."""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = ctx.Process(target=_child, args=(case, child, log_path, workdir))
+        proc.start()
+        child.close()
+        timeout = 3 * case["seconds"] + grace
+        result = None
+        if parent.poll(timeout):
+            try:
+                result = parent.recv()
+            except EOFError:
+                pass
+        proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+    if result is None:
+        result = dict(case)
+        result["status"] = "timeout" if proc.exitcode in (None, -9) else f"crashed (exit {proc.exitcode})"
+    return result
+
+
+# --------------------------
+# Report
+# --------------------------
+def case_key(r):
+    return (r["algorithm"], r["vacations"], r["minimuns"], r["shifts"], r["seed"])
+
+
+def compare(results, baseline):
+    """Prints wall time and KPI changes against a previous result file."""
+    old = {case_key(r): r for r in baseline["results"]}
+    print(f"\n{'algorithm':34} {'case':48} {'wall':>16} {'missedTeamMin':>16}")
+    for r in results:
+        b = old.get(case_key(r))
+        if b is None:
+            continue
+        case = f"{Path(r['vacations']).stem}/{Path(r['minimuns']).stem}/{r['shifts']}s"
+        wall = f"{b.get('wall_time', '-')} -> {r.get('wall_time', '-')}"
+        kpi = f"{b.get('kpis', {}).get('missedTeamMin', '-')} -> {r.get('kpis', {}).get('missedTeamMin', '-')}"
+        print(f"{r['algorithm'][:34]:34} {case[:48]:48} {wall:>16} {kpi:>16}")
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    from algorithm.cpsatTools import available_workers
+    return {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": available_workers(),
+    }
+
+
+def run_all(cases, output, log_dir=None):
+    report = {"environment": environment(), "results": []}
+    for n, case in enumerate(cases, start=1):
+        label = f"{case['algorithm']} | {Path(case['vacations']).stem} | {Path(case['minimuns']).stem} | {case['shifts']} shifts | seed {case['seed']}"
+        print(f"[Benchmark] ({n}/{len(cases)}) {label}", flush=True)
+        log_path = None
+        if log_dir:
+            log_path = str(Path(log_dir).resolve() / f"{n:03d}.log")
+        result = run_isolated(case, log_path)
+        kpis = result.get("kpis", {})
+        print(f"[Benchmark]   {result['status']} in {result.get('wall_time', '-')}s, "
+              f"first feasible {result.get('time_to_first_feasible')}s, "
+              f"peak RSS {result.get('peak_rss_mb')} MB, missedTeamMin {kpis.get('missedTeamMin')}", flush=True)
+        report["results"].append(result)
+        # written after every run, so an interrupted suite keeps what it measured
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return report
+
+
+def main(argv=None):
+    from modules.TaskManager import TaskManager
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithms", nargs="+", help="names from TaskManager.algorithms (default: all)")
+    parser.add_argument("--vacations", default="VacationTemplate*.csv", help="glob in data/")
+    parser.add_argument("--minimuns", default="minimuns*.csv", help="glob in data/")
+    parser.add_argument("--shifts", nargs="+", type=int, default=[2, 3])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1])
+    parser.add_argument("--seconds", type=float, default=60.0, help="time budget per run")
+    parser.add_argument("--output", help="JSON file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--log-dir", help="keep the solver output of every run here")
+    parser.add_argument("--baseline", help="previous JSON result to compare against")
+    parser.add_argument("--synthetic", nargs="+", type=int, metavar="EMPLOYEES",
+                        help="run on generated instances of these sizes instead of data/")
+    parser.add_argument("--teams", type=int, default=2, help="teams of the generated instances")
+    parser.add_argument("--vacation-density", type=float, default=30 / 365,
+                        help="share of the year on vacation in the generated instances")
+    parser.add_argument("--tightness", type=float, default=0.9,
+                        help="required / available staff-days in the generated instances")
+    args = parser.parse_args(argv)
+
+    registered = list(TaskManager().algorithms)
+    algorithms = args.algorithms or registered
+    unknown = [a for a in algorithms if a not in registered]
+    if unknown:
+        parser.error(f"unknown algorithms {unknown}, registered: {registered}")
+
+    if args.synthetic:
+        cases = synthetic_cases(algorithms, args.shifts, args.seeds, args.seconds, args.synthetic, args.teams,
+                                args.vacation_density, args.tightness)
+    else:
+        cases = template_cases(algorithms, args.shifts, args.seeds, args.seconds, args.vacations, args.minimuns)
+    if not cases:
+        parser.error("no templates matched")
+    output = args.output or str(RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    if args.log_dir:
+        Path(args.log_dir).mkdir(parents=True, exist_ok=True)
+
+    report = run_all(cases, output, args.log_dir)
+    print(f"[Benchmark] {len(report['results'])} runs written to {output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report["results"], json.load(f))
+
+
+if __name__ == "__main__":
+    main()
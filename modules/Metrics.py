@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(v):
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    """One metric family; a value per combination of label values (passed as keywords)."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines += self._samples(key, value)
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300)):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block in seconds (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = [f"{self.name}_bucket{_labels(self.label_names, key, ('le', _number(b)))} {c}"
+                 for b, c in zip(self.buckets, counts)]
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metric families of the worker, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def start_http_server(port, registry=None, host="0.0.0.0"):
+    """Serves GET /metrics from a daemon thread; returns the server (shutdown() stops it)."""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # one line per scrape would drown the worker log
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[Metrics] Serving http://{host}:{server.server_port}/metrics")
+    return server
+
+
+# --------------------------
+# Worker metrics
+# --------------------------
+REGISTRY = MetricsRegistry()
+
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SCORE_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+MESSAGES_CONSUMED = REGISTRY.counter(
+    "smartask_messages_consumed_total", "Messages taken from the task queue.", ["type"])
+TASKS_IN_FLIGHT = REGISTRY.gauge(
+    "smartask_tasks_in_flight", "Tasks being solved.")
+EXECUTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "smartask_executor_queue_depth", "Tasks accepted from the queue and waiting for a free worker.")
+TASK_DURATION = REGISTRY.histogram(
+    "smartask_task_duration_seconds", "Wall time of a task, from start to its final status.",
+    ["algorithm", "status"], buckets=DURATION_BUCKETS)
+TIME_TO_FIRST_FEASIBLE = REGISTRY.histogram(
+    "smartask_time_to_first_feasible_seconds", "Time until the solver reported its first schedule.",
+    ["algorithm"], buckets=DURATION_BUCKETS)
+FINAL_SCORE = REGISTRY.histogram(
+    "smartask_final_score", "Last score reported through the progress channel (lower is better).",
+    ["algorithm"], buckets=SCORE_BUCKETS)
+MONGO_LATENCY = REGISTRY.histogram(
+    "smartask_mongo_operation_seconds", "Latency of MongoDB calls.", ["operation"], buckets=LATENCY_BUCKETS)
+RABBITMQ_PUBLISH_LATENCY = REGISTRY.histogram(
+    "smartask_rabbitmq_publish_seconds", "Time to publish a status message, retries included.",
+    buckets=LATENCY_BUCKETS)
+RABBITMQ_PUBLISH_ERRORS = REGISTRY.counter(
+    "smartask_rabbitmq_publish_errors_total", "Failed status publish attempts (retried).")
+
+TASKS_IN_FLIGHT.set(0)
+EXECUTOR_QUEUE_DEPTH.set(0)
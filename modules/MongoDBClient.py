@@ -5,11 +5,14 @@ import pytz
 import csv
 from datetime import datetime
 
+from modules.Metrics import MONGO_LATENCY
+
 class MongoDBClient:
     def __init__(self, db_name="mydatabase", employees_collection="employees",
                  schedules_collection="schedules"
                  ,vacations_collection="vacations"
-                 ,reference_collection="reference"):
+                 ,reference_collection="reference"
+                 ,snapshots_collection="schedule_snapshots"):
         """Initialize connection to MongoDB."""
         try:
             # MongoDB connection parameters (change if needed)
@@ -31,6 +34,7 @@ class MongoDBClient:
             self.schedules_collection = self.db[schedules_collection]
             self.vacations_collection = self.db[vacations_collection]
             self.reference_collection = self.db[reference_collection]
+            self.snapshots_collection = self.db[snapshots_collection]
             print(f"Connected to MongoDB database '{db_name}'")
 
         except errors.PyMongoError as e:
@@ -43,13 +47,14 @@ class MongoDBClient:
         Fetch all employees and return a list of dicts with their name and team names.
         """
         try:
-            employees = list(self.employees_collection.find())
+            with MONGO_LATENCY.time(operation="fetch_employees"):
+                employees = list(self.employees_collection.find())
 
-            # Mapeia ID do time (como string) para nome
-            team_id_to_name = {
-                str(team["_id"]): team["name"]
-                for team in self.db["teams"].find({}, {"_id": 1, "name": 1})
-            }
+                # Mapeia ID do time (como string) para nome
+                team_id_to_name = {
+                    str(team["_id"]): team["name"]
+                    for team in self.db["teams"].find({}, {"_id": 1, "name": 1})
+                }
 
             result = []
             for emp in employees:
@@ -94,7 +99,8 @@ class MongoDBClient:
             if metadata:
                 schedule_document["metadata"] = metadata
 
-            result = self.schedules_collection.insert_one(schedule_document)
+            with MONGO_LATENCY.time(operation="insert_schedule"):
+                result = self.schedules_collection.insert_one(schedule_document)
             print(f"Schedule inserted successfully with ID: {result.inserted_id}")
             return result.inserted_id
 
@@ -102,10 +108,43 @@ class MongoDBClient:
             print(f"Failed to insert schedule: {e}")
             return None
 
+    def update_schedule_metadata(self, schedule_id, fields):
+        """Sets metadata.<key> of a stored schedule for every key of fields."""
+        try:
+            with MONGO_LATENCY.time(operation="update_schedule_metadata"):
+                self.schedules_collection.update_one(
+                    {"_id": schedule_id},
+                    {"$set": {f"metadata.{k}": v for k, v in fields.items()}},
+                )
+        except errors.PyMongoError as e:
+            print(f"Failed to update schedule metadata: {e}")
+
+    def upsert_snapshot(self, task_id, data, title, algorithm, score=None, iteration=None):
+        """Stores the best-so-far schedule of a running task (one document per task)."""
+        try:
+            with MONGO_LATENCY.time(operation="upsert_snapshot"):
+                self.snapshots_collection.update_one(
+                    {"taskId": task_id},
+                    {"$set": {
+                        "taskId": task_id,
+                        "data": data,
+                        "title": title,
+                        "algorithm": algorithm,
+                        "score": score,
+                        "iteration": iteration,
+                        "timestamp": datetime.now(tz=pytz.UTC),
+                    }},
+                    upsert=True,
+                )
+            print(f"Snapshot stored for task {task_id} (score={score})")
+        except errors.PyMongoError as e:
+            print(f"Failed to store snapshot: {e}")
+
     def fetch_vacation_by_name(self, name):
         """Fetch a vacation template by its name."""
         try:
-            result = self.vacations_collection.find_one({"name": name})
+            with MONGO_LATENCY.time(operation="fetch_vacation_by_name"):
+                result = self.vacations_collection.find_one({"name": name})
             if result:
                 print(f"Found vacation template: {result}")
             else:
@@ -118,7 +157,8 @@ class MongoDBClient:
     def fetch_reference_by_name(self, name):
         """Fetch a reference template by its name."""
         try:
-            result = self.reference_collection.find_one({"name": name})
+            with MONGO_LATENCY.time(operation="fetch_reference_by_name"):
+                result = self.reference_collection.find_one({"name": name})
             if result:
                 print(f"Found reference template: {result}")
             else:
@@ -1,10 +1,19 @@
 import pika
 import json
+import os
+import random
+import threading
 import time
+from contextlib import nullcontext
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from modules.MongoDBClient import MongoDBClient
 from modules.TaskManager import TaskManager
+from modules.TaskExecutor import TaskExecutor
+from algorithm.deadline import Deadline
+from algorithm.progress import ProgressReporter
+from algorithm.instrumentation import Instrumentation, PROFILERS
+from modules import Metrics
 
 
 class RabbitMQClient:
@@ -16,9 +25,24 @@ class RabbitMQClient:
         self.task_queue = task_queue
         self.task_routing_key = task_routing_key
         self.status_routing_key = status_routing_key
-        self.executor = ThreadPoolExecutor(max_workers=5)
         self.mongodb_client = MongoDBClient()
         self.task_manager = TaskManager()
+        # solver runs go through task_executor (in-thread or one process per task, see TaskExecutor)
+        self.task_executor = TaskExecutor(self.task_manager)
+        self.executor = ThreadPoolExecutor(max_workers=self.task_executor.workers)
+        # cancellation: task_id -> CancellationToken of running tasks, task_id -> time of cancels
+        # received before the task started (dropped after CANCEL_TTL seconds, ids that never arrive)
+        self.cancel_tokens = {}
+        self.cancelled_before_start = {}
+        self.cancel_ttl = float(os.getenv("CANCEL_TTL", 24 * 3600))
+        self.cancel_lock = threading.Lock()
+        # progress events are published from a forwarding thread per task; pika channels are not thread-safe
+        self.publish_lock = threading.Lock()
+        self.progress_interval = float(os.getenv("PROGRESS_INTERVAL", 10))
+        self.snapshot_interval = float(os.getenv("SNAPSHOT_INTERVAL", 0))
+        # Prometheus metrics on http://<host>:METRICS_PORT/metrics (0 = off)
+        metrics_port = int(os.getenv("METRICS_PORT", 8000))
+        self.metrics_server = Metrics.start_http_server(metrics_port) if metrics_port else None
         self.connect_to_rabbitmq()
         self.publisher_connection, self.publisher_channel = self.create_publisher_connection()
 
@@ -67,6 +91,14 @@ class RabbitMQClient:
                 print(f"Type of message: {type(message)}")
                 print(f"Message content: {message}")
 
+                # {"type": "cancel", "taskId": ...} stops a queued or running task
+                if message.get("type") == "cancel":
+                    Metrics.MESSAGES_CONSUMED.inc(type="cancel")
+                    self.cancel_task(message.get("taskId"))
+                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    return
+
+                Metrics.MESSAGES_CONSUMED.inc(type="task")
                 task_id = message.get("taskId", "No Task ID")
                 title = message.get("title")
                 vacation_template_name = message.get("vacationTemplate")
@@ -100,6 +132,33 @@ class RabbitMQClient:
 
                 rules = message.get("rules")
 
+                # fixed seed -> reproducible run; otherwise one is drawn and stored in the metadata
+                seed = message.get("seed")
+                if seed is None:
+                    seed = random.randrange(2**31)
+                print(f"\nseed : {seed}")
+
+                # progress status every progressInterval s, best-so-far snapshot every snapshotInterval s (0 = off)
+                progress_interval = message.get("progressInterval", self.progress_interval)
+                snapshot_interval = message.get("snapshotInterval", self.snapshot_interval)
+                # CP-SAT solvers: hint the model with a "greedy" or "grhc" schedule
+                warm_start = message.get("warmStart")
+                # CP-SAT solvers: "classic" (shift_id channeling) or "compact" model
+                formulation = message.get("formulation")
+                # CP-SAT solvers: "fast-feasible", "balanced" or "optimal", from the task or its rules
+                solver_profile = message.get("solverProfile")
+                if solver_profile is None and isinstance(rules, dict):
+                    solver_profile = rules.get("solverProfile")
+                # Greedy Randomized + Hill Climbing: "random" probing or "urgency" (most uncovered slot first)
+                construction = message.get("construction")
+                # hill climbing: candidates per step and "first"/"best" policy; GRHC: independent seeds
+                batch_size = message.get("batchSize")
+                policy = message.get("policy")
+                starts = message.get("starts")
+                # timing breakdown in the schedule metadata: true, or "cprofile"/"pyinstrument" to also profile
+                instrument = message.get("instrument")
+
+                Metrics.EXECUTOR_QUEUE_DEPTH.inc()
                 self.executor.submit(
                     self.handle_task_processing,
                     task_id,
@@ -113,7 +172,18 @@ class RabbitMQClient:
                     year,
                     maxTime,
                     shifts,
-                    rules
+                    rules,
+                    seed,
+                    progress_interval,
+                    snapshot_interval,
+                    warm_start,
+                    formulation,
+                    solver_profile,
+                    construction,
+                    batch_size,
+                    policy,
+                    starts,
+                    instrument
                 )
 
                 ch.basic_ack(delivery_tag=method.delivery_tag)
@@ -134,6 +204,21 @@ class RabbitMQClient:
                 self.close_connection()
                 break
 
+    def cancel_task(self, task_id):
+        with self.cancel_lock:
+            token = self.cancel_tokens.get(task_id)
+            if token is None:
+                now = time.time()
+                for old_id, cancelled_at in list(self.cancelled_before_start.items()):
+                    if now - cancelled_at > self.cancel_ttl:
+                        del self.cancelled_before_start[old_id]
+                self.cancelled_before_start[task_id] = now
+        if token is None:
+            print(f"[RabbitMQClient] Task {task_id} is not running, it will be skipped when it starts.")
+        else:
+            print(f"[RabbitMQClient] Cancelling task {task_id}...")
+            token.cancel()
+
     def handle_task_processing(
             self,
             task_id,
@@ -147,24 +232,86 @@ class RabbitMQClient:
             year,
             maxTime,
             shifts,
-            rules
+            rules,
+            seed=None,
+            progress_interval=None,
+            snapshot_interval=None,
+            warm_start=None,
+            formulation=None,
+            solver_profile=None,
+            construction=None,
+            batch_size=None,
+            policy=None,
+            starts=None,
+            instrument=None
     ):
 
+        Metrics.EXECUTOR_QUEUE_DEPTH.dec()
+        with self.cancel_lock:
+            if self.cancelled_before_start.pop(task_id, None) is not None:
+                token = None
+            else:
+                token = self.cancel_tokens[task_id] = self.task_executor.new_token()
+        if token is None:
+            print(f"[RabbitMQClient] Task {task_id} was cancelled before it started.")
+            self.send_task_status(task_id, "CANCELLED")
+            return
+
         self.send_task_status(task_id, "IN_PROGRESS")
+        events = self.task_executor.new_queue()
+        progress = ProgressReporter(
+            events,
+            interval=progress_interval if progress_interval is not None else self.progress_interval,
+            snapshot_interval=snapshot_interval if snapshot_interval is not None else self.snapshot_interval,
+        )
+        summary = {}  # filled by the forwarder: first_solution / final events
+        forwarder = threading.Thread(
+            target=self.forward_progress, args=(task_id, title, algorithm_name, events, summary), daemon=True
+        )
+        forwarder.start()
+        instrumentation = None
+        if instrument:
+            instrumentation = Instrumentation(task_id, profiler=instrument if instrument in PROFILERS else None)
+        Metrics.TASKS_IN_FLIGHT.inc()
+        started = time.time()
+        status = "FAILED"
         try:
             print(f"[RabbitMQClient] Delegando execução da task {task_id} para TaskManager...")
-            schedule_data = self.task_manager.run_task(
-                task_id=task_id,
-                title=title,
-                algorithm_name=algorithm_name,
-                vacations=vacations_data,
-                minimuns=minimuns_data,
-                employees=employees_data,
-                maxTime=maxTime,
-                year=year,
-                shifts=shifts,
-                rules=rules
-            )
+            try:
+                schedule_data = self.task_executor.run(
+                    task_id=task_id,
+                    title=title,
+                    algorithm_name=algorithm_name,
+                    vacations=vacations_data,
+                    minimuns=minimuns_data,
+                    employees=employees_data,
+                    maxTime=maxTime,
+                    year=year,
+                    shifts=shifts,
+                    rules=rules,
+                    seed=seed,
+                    deadline=Deadline.from_minutes(maxTime, token),
+                    progress=progress,
+                    warm_start=warm_start,
+                    formulation=formulation,
+                    solver_profile=solver_profile,
+                    construction=construction,
+                    batch_size=int(batch_size) if batch_size else None,
+                    policy=policy,
+                    starts=int(starts) if starts else None,
+                    instrumentation=instrumentation,
+                )
+            finally:
+                # drain the progress events before the final status goes out
+                events.put(None)
+                forwarder.join()
+
+            if token.cancelled:
+                # the solver stopped early, its partial schedule is not stored
+                print(f"[RabbitMQClient] Task {task_id} cancelled.")
+                status = "CANCELLED"
+                self.send_task_status(task_id, status)
+                return
 
             metadata = {
                 "scheduleName": title,
@@ -177,18 +324,40 @@ class RabbitMQClient:
                 "vacationTemplateData": vacations_data,
                 "minimunsTemplateData": minimuns_data,
                 "shifts": shifts,
-                "rules": rules
+                "rules": rules,
+                "seed": seed,
+                "warmStart": warm_start,
+                "formulation": formulation,
+                "construction": construction,
+                "batchSize": batch_size,
+                "policy": policy,
+                "starts": starts
             }
-
-            self.mongodb_client.insert_schedule(
-                data=schedule_data,
-                title=title,
-                algorithm=algorithm_name,
-                metadata=metadata
-            )
+            if "solver_profile" in summary:
+                # as applied by the CP-SAT solver (reported on the progress channel)
+                metadata["solverProfile"] = summary["solver_profile"]
+            if instrumentation is not None:
+                metadata["timing"] = instrumentation.report()
+
+            with instrumentation.span("mongo_insert") if instrumentation is not None else nullcontext():
+                schedule_id = self.mongodb_client.insert_schedule(
+                    data=schedule_data,
+                    title=title,
+                    algorithm=algorithm_name,
+                    metadata=metadata
+                )
+            if instrumentation is not None:
+                # the insert itself can only be added to the stored breakdown afterwards
+                timing = instrumentation.report()
+                print(f"[RabbitMQClient] Timing of task {task_id}: {json.dumps(timing)}")
+                if schedule_id is not None:
+                    self.mongodb_client.update_schedule_metadata(schedule_id, {"timing": timing})
 
             print(f"[RabbitMQClient] Schedule complete for Task ID: {task_id}")
-            self.send_task_status(task_id, "COMPLETED")
+            status = "COMPLETED"
+            self.send_task_status(task_id, status)
+            if "final" in summary:
+                Metrics.FINAL_SCORE.observe(summary["final"]["score"], algorithm=algorithm_name)
 
         except Exception as e:
             import traceback
@@ -196,9 +365,46 @@ class RabbitMQClient:
             traceback.print_exc()
             print("======== END TRACE ========")
             print(f"Error during schedule execution: {e}")
-            self.send_task_status(task_id, "FAILED")
+            status = "CANCELLED" if token.cancelled else "FAILED"
+            self.send_task_status(task_id, status)
+        finally:
+            with self.cancel_lock:
+                self.cancel_tokens.pop(task_id, None)
+            Metrics.TASKS_IN_FLIGHT.dec()
+            Metrics.TASK_DURATION.observe(time.time() - started, algorithm=algorithm_name, status=status)
+
+    def forward_progress(self, task_id, title, algorithm_name, events, summary=None):
+        """
+        Publishes the progress events of one task until the None sentinel.
+        first_solution / final events only go to the metrics and to summary,
+        solver_profile events only to summary.
+        """
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            try:
+                if event["type"] in ("first_solution", "final"):
+                    if summary is not None:
+                        summary[event["type"]] = event
+                    if event["type"] == "first_solution":
+                        Metrics.TIME_TO_FIRST_FEASIBLE.observe(event["elapsed"], algorithm=algorithm_name)
+                elif event["type"] == "solver_profile":
+                    if summary is not None:
+                        summary["solver_profile"] = event["profile"]
+                elif event["type"] == "snapshot":
+                    self.mongodb_client.upsert_snapshot(
+                        task_id, event["schedule"], title, algorithm_name,
+                        score=event["score"], iteration=event["iteration"],
+                    )
+                else:
+                    self.send_task_status(task_id, "IN_PROGRESS", progress={
+                        k: v for k, v in event.items() if k != "type"
+                    })
+            except Exception as e:
+                print(f"[RabbitMQClient] Failed to forward progress of task {task_id}: {e}")
 
-    def send_task_status(self, task_id, status):
+    def send_task_status(self, task_id, status, progress=None):
         updated_at = datetime.now().isoformat()
         print("UpdatedAt:", updated_at)  # Verifica o formato da data
         task_status_message = {
@@ -206,8 +412,19 @@ class RabbitMQClient:
             "status": status,
             "updatedAt": datetime.now().isoformat()
         }
+        if progress is not None:
+            # iteration, score, criteria breakdown and elapsed seconds of the running solver
+            task_status_message["progress"] = progress
         print(json.dumps(task_status_message))
 
+        with self.publish_lock:
+            self._publish_status(task_status_message)
+
+    def _publish_status(self, task_status_message):
+        with Metrics.RABBITMQ_PUBLISH_LATENCY.time():
+            self._publish_with_retries(task_status_message)
+
+    def _publish_with_retries(self, task_status_message):
         while True:
             try:
                 # Confirmação do estado da conexão do publisher
@@ -227,19 +444,24 @@ class RabbitMQClient:
                 break  # Sucesso, então sai do loop
 
             except pika.exceptions.AMQPConnectionError as e:
+                Metrics.RABBITMQ_PUBLISH_ERRORS.inc()
                 print(f"[send_task_status] Connection error while sending status: {e}. Reconnecting and retrying in 5 seconds...")
                 time.sleep(5)
                 # Tentando reconectar
                 self.publisher_connection, self.publisher_channel = self.create_publisher_connection()
 
             except Exception as e:
+                Metrics.RABBITMQ_PUBLISH_ERRORS.inc()
                 print(f"[send_task_status] Unexpected error: {e}. Retrying in 5 seconds...")
                 time.sleep(5)
 
 
 
     def close_connection(self):
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
         self.executor.shutdown(wait=True)
+        self.task_executor.shutdown()
         self.connection.close()
         self.publisher_connection.close()
         print("Connections closed.")
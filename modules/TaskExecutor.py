@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from algorithm.deadline import CancellationToken
+
+
+def _available_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not available on every platform
+        return list(range(os.cpu_count() or 1))
+
+
+def _run_isolated(cpus, memory_limit_mb, task_kwargs):
+    """Entry point of a task process: pins it to its cores, caps its memory and runs the solver."""
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            print(f"[TaskExecutor] Could not set CPU affinity {cpus}: {e}")
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = int(memory_limit_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            print(f"[TaskExecutor] Could not set memory limit {memory_limit_mb} MB: {e}")
+
+    from modules.TaskManager import TaskManager
+    schedule = TaskManager().run_task(**task_kwargs)
+    # the recorded spans/counters live in this process; send them back with the result
+    return schedule, task_kwargs.get("instrumentation")
+
+
+class TaskExecutor:
+    """
+    Runs TaskManager.run_task for the consumer.
+
+    mode "thread":  in the calling thread (previous behaviour, tasks share the GIL)
+    mode "process": each task in its own spawned process (a single-worker pool
+                    per task, so a crashed or OOM-killed child only fails its own
+                    task) pinned to its own slice of the available cores and, if
+                    set, limited to memory_limit_mb of address space. Results and
+                    exceptions come back to the consumer, which keeps sending the
+                    status updates and writing to MongoDB.
+
+    Configured through TASK_EXECUTOR_MODE, TASK_WORKERS and TASK_MEMORY_LIMIT_MB
+    unless given explicitly.
+
+    new_token() hands out the CancellationToken of a task and new_queue() the queue
+    its progress events go through; in process mode both are Manager proxies so
+    they reach the solver process. An Instrumentation passed to run() is filled in
+    both modes (in process mode with what the task process recorded).
+    """
+
+    def __init__(self, task_manager, mode=None, workers=None, memory_limit_mb=None):
+        self.task_manager = task_manager
+        self.mode = (mode or os.getenv("TASK_EXECUTOR_MODE", "thread")).lower()
+        if self.mode not in ("thread", "process"):
+            raise ValueError(f"Unknown task executor mode '{self.mode}'.")
+        self.workers = int(workers or os.getenv("TASK_WORKERS", 5))
+        self.memory_limit_mb = memory_limit_mb or os.getenv("TASK_MEMORY_LIMIT_MB") or None
+
+        self.pools = set()  # one per running task (process mode)
+        self.slots = None
+        self._manager = None
+        self._pool_lock = threading.Lock()
+        if self.mode == "process":
+            # split the cores into one group per worker; a task holds a group while it runs
+            cpus = _available_cpus()
+            groups = [cpus[i::self.workers] for i in range(self.workers)]
+            self.cpu_groups = [g or cpus for g in groups]
+            self.slots = queue.Queue()
+            for i in range(self.workers):
+                self.slots.put(i)
+            print(f"[TaskExecutor] Process mode: {self.workers} workers, cores {self.cpu_groups}, "
+                  f"memory limit {self.memory_limit_mb or 'none'} MB")
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def _get_manager(self):
+        with self._pool_lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager
+
+    def new_token(self):
+        if self.mode == "thread":
+            return CancellationToken()
+        return CancellationToken(self._get_manager().Event())
+
+    def new_queue(self):
+        if self.mode == "thread":
+            return queue.Queue()
+        return self._get_manager().Queue()
+
+    def run(self, **task_kwargs):
+        if self.mode == "thread":
+            return self.task_manager.run_task(**task_kwargs)
+
+        slot = self.slots.get()
+        pool = self._create_pool()
+        with self._pool_lock:
+            self.pools.add(pool)
+        try:
+            future = pool.submit(_run_isolated, self.cpu_groups[slot], self.memory_limit_mb, task_kwargs)
+            schedule, instrumentation = future.result()
+            if instrumentation is not None:
+                task_kwargs["instrumentation"].merge(instrumentation)
+            return schedule
+        except BrokenProcessPool as e:
+            # the child died (e.g. killed for memory); only this task's pool is lost
+            print(f"[TaskExecutor] Task process died: {e}")
+            raise RuntimeError("Task process terminated unexpectedly") from e
+        finally:
+            pool.shutdown(wait=True)
+            with self._pool_lock:
+                self.pools.discard(pool)
+            self.slots.put(slot)
+
+    def shutdown(self):
+        """Waits for the running tasks, then stops the Manager."""
+        with self._pool_lock:
+            pools = list(self.pools)
+        for pool in pools:
+            pool.shutdown(wait=True)
+        if self._manager is not None:
+            self._manager.shutdown()
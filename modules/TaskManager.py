@@ -1,6 +1,7 @@
 # modules/TaskManager.py
 
 import json
+from contextlib import nullcontext
 from algorithm.hillClimbing import solve as hill_clibing_alg_solver
 from algorithm.ILP import solve as ilp_solver
 from algorithm.greedyRandomized import solve as greedy_randomized_solver
@@ -12,6 +13,29 @@ from algorithm.engines.greedyRandomizedEngine import solve as greedy_randomized_
 from algorithm.engines.ILPEngine import solve as ilp_solver_engine
 from algorithm.ILPv2 import solve as ilp_solver_2
 from algorithm.CSPv2 import solve as cspv2_solver
+from algorithm.rollingHorizon import solve as rolling_horizon_solver
+from algorithm.parallelDecomposition import solve as parallel_decomposition_solver
+from algorithm.deadline import Deadline
+from algorithm.instrumentation import span
+
+# optional keyword arguments each solver accepts on top of the common ones:
+#   progress        ProgressReporter (hill climbing loops, CP-SAT solution callbacks)
+#   warm_start      greedy hint for CP-SAT ("greedy" / "grhc")
+#   formulation     CP-SAT model formulation ("classic" / "compact")
+#   solver_profile  CP-SAT parameters (see algorithm.cpsatTools.SOLVER_PROFILES)
+#   construction    greedy construction ("random" / "urgency", see algorithm.greedyClimbing.CONSTRUCTIONS)
+#   batch_size      hill climbing candidates per step, policy "first" / "best" improving one of them
+#   starts          independent seeds run in a process pool, the best schedule wins
+CP_SAT_OPTIONS = {"progress", "warm_start", "formulation", "solver_profile"}
+SOLVER_OPTIONS = {
+    "hill climbing": {"progress", "batch_size", "policy"},
+    "Greedy Randomized + Hill Climbing": {"progress", "construction", "batch_size", "policy", "starts"},
+    "CSP": CP_SAT_OPTIONS,
+    "CSP_ENGINE": CP_SAT_OPTIONS,
+    "CSPv2": CP_SAT_OPTIONS,
+    "CSP Rolling Horizon": {"progress", "formulation", "solver_profile"},
+    "CSP Parallel Decomposition": {"progress", "formulation", "solver_profile"},
+}
 
 class TaskManager:
     def __init__(self):
@@ -29,9 +53,11 @@ class TaskManager:
             "CSP_ENGINE": csp_engine_solver,
             "GRHC_ENGINE": grhc_engine_solver,
             "CSPv2": cspv2_solver,
+            "CSP Rolling Horizon": rolling_horizon_solver,
+            "CSP Parallel Decomposition": parallel_decomposition_solver,
         }
 
-    def run_task(self, task_id, title, algorithm_name="CSP Scheduling", vacations=None, minimuns=None, employees=None, maxTime=10, year=None, shifts=2, rules=None):
+    def run_task(self, task_id, title, algorithm_name="CSP Scheduling", vacations=None, minimuns=None, employees=None, maxTime=10, year=None, shifts=2, rules=None, seed=None, deadline=None, progress=None, warm_start=None, formulation=None, solver_profile=None, construction=None, batch_size=None, policy=None, starts=None, instrumentation=None):
         print(f"\n[DEBUG] Vacations received:\n{vacations}")
         print(f"[DEBUG] Minimuns received:\n{minimuns}")
         print(f"[DEBUG] Rules received:\n{json.dumps(rules, indent=2) if rules else 'None'}")
@@ -39,9 +65,13 @@ class TaskManager:
         if algorithm_name not in self.algorithms:
             raise ValueError(f"Algorithm '{algorithm_name}' not found.")
 
-        print(f"[TaskManager] Executing algorithm '{algorithm_name}' with Task ID: {task_id}")
+        print(f"[TaskManager] Executing algorithm '{algorithm_name}' with Task ID: {task_id} (seed={seed})")
         algorithm = self.algorithms[algorithm_name]
 
+        # one budget for the whole task (maxTime is in minutes); the consumer passes its own to cancel it
+        if deadline is None:
+            deadline = Deadline.from_minutes(maxTime)
+
         if not rules:
             from pathlib import Path
             current_dir = Path(__file__).parent
@@ -54,12 +84,21 @@ class TaskManager:
         else:
             rules_json = {"rules": rules}
 
-        if algorithm_name in ["linear programming", "hill climbing", "Greedy Randomized", "Greedy Randomized + Hill Climbing", "CSP", "GRHC_ENGINE", "CSP_ENGINE", "Greedy Randomized Engine", "ILP Engine", "linear programming 2", "CSPv2"]:
-        
-            schedule_data = algorithm(vacations=vacations, minimuns=minimuns, employees=employees, maxTime=maxTime, year=year, shifts=shifts, rules=rules_json,
-            )
-        else:
-            schedule_data = algorithm()
+        options = {"progress": progress, "warm_start": warm_start, "formulation": formulation, "solver_profile": solver_profile,
+                   "construction": construction, "batch_size": batch_size, "policy": policy, "starts": starts}
+        extra = {k: v for k, v in options.items() if v and k in SOLVER_OPTIONS.get(algorithm_name, ())}
+
+        # instrumentation (algorithm.instrumentation.Instrumentation): per-phase spans and counters of this run
+        with instrumentation or nullcontext(), span("run_task"):
+            if algorithm_name in ["linear programming", "hill climbing", "Greedy Randomized", "Greedy Randomized + Hill Climbing", "CSP", "GRHC_ENGINE", "CSP_ENGINE", "Greedy Randomized Engine", "ILP Engine", "linear programming 2", "CSPv2", "CSP Rolling Horizon", "CSP Parallel Decomposition"]:
+
+                schedule_data = algorithm(vacations=vacations, minimuns=minimuns, employees=employees, maxTime=maxTime, year=year, shifts=shifts, rules=rules_json,
+                    seed=seed, deadline=deadline, **extra,
+                )
+                if "progress" in extra:
+                    progress.finish()
+            else:
+                schedule_data = algorithm()
 
         print(f"[TaskManager] Algorithm '{algorithm_name}' successfully finalized.")
         print(f"[TaskManager] Schedule generated by '{algorithm_name}' algorithm: {schedule_data}")
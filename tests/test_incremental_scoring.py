@@ -0,0 +1,55 @@
+"""
+IncrementalScorer.delta/apply against a full GreedyClimbing.score() after
+every move, on random CellMoves over random 2- and 3-shift schedules.
+"""
+
+import numpy as np
+import pytest
+
+from algorithm.greedyClimbing import _build_scheduler
+from algorithm.incrementalScoring import IncrementalScorer
+from algorithm.moves import CellMove
+from tests.test_scoring import _random_horario, _templates
+
+
+def _random_move(rng, teams, num_days, shifts):
+    """1-3 distinct cells of one employee, mostly on neighbouring days, set to an allowed team or off."""
+    emp_idx = int(rng.integers(len(teams)))
+    first = int(rng.integers(num_days))
+    cells = {}
+    for _ in range(int(rng.integers(1, 4))):
+        d = first + int(rng.integers(-3, 4)) if rng.random() < 0.7 else int(rng.integers(num_days))
+        d = min(max(d, 0), num_days - 1)
+        t = int(rng.choice(teams[emp_idx])) if rng.random() < 0.6 else 0
+        cells[(d, int(rng.integers(shifts)))] = t
+    return CellMove(emp_idx, [(d, s, t) for (d, s), t in cells.items()])
+
+
+@pytest.fixture(scope="module")
+def templates():
+    return _templates()
+
+
+@pytest.mark.parametrize("shifts", [2, 3])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_delta_and_apply_match_full_score(templates, shifts, seed):
+    scheduler = _build_scheduler(*templates, year=2025, shifts=shifts, seed=seed)
+    teams = [scheduler.teams[p] for p in scheduler.employees]
+    # dense enough for runs above the consecutive-day limit and the special-day cap
+    horario = _random_horario(teams, scheduler.num_days, shifts, shifts, seed, density=0.6)
+    scorer = IncrementalScorer(scheduler, horario)
+    assert scorer.criterios() == scheduler.criterios(horario)
+
+    rng = np.random.default_rng(seed)
+    score = scheduler.score(horario)
+    for _ in range(400):
+        move = _random_move(rng, teams, scheduler.num_days, shifts)
+        before = horario.copy()
+        delta = scorer.delta(move)
+        np.testing.assert_array_equal(horario, before)  # delta leaves the tensor untouched
+
+        assert scorer.apply(move) == delta
+        new_score = scheduler.score(horario)
+        assert delta == new_score - score
+        assert scorer.criterios() == scheduler.criterios(horario)
+        score = new_score
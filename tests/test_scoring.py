@@ -0,0 +1,182 @@
+"""
+The array criteria in algorithm.scoring against the loop implementations they
+replaced, on random 2- and 3-shift schedules over the shipped templates
+(several worked shifts per day included).
+"""
+
+import csv
+import io
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from algorithm.engines.greedyClimbingEngine import GreedyClimbing as EngineGreedyClimbing
+from algorithm.greedyClimbing import _build_scheduler
+from algorithm.hillClimbing import HeuristicSolGabi
+from algorithm.problemInstance import get_instance
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def _templates():
+    with open(DATA_DIR / "VacationTemplate.csv", encoding="ISO-8859-1") as f:
+        vacations = [row for row in csv.reader(f) if row and row[0].strip().startswith("Employee")]
+    with open(DATA_DIR / "minimuns.csv", encoding="ISO-8859-1") as f:
+        minimuns = [row for row in csv.reader(io.StringIO(f.read())) if len(row) > 3 and row[0].strip() != "Equipa"]
+    codes = sorted({row[0].strip().split()[-1].upper() for row in minimuns})
+    employees = []
+    for i in range(len(vacations)):
+        # every fourth employee also works for the next team
+        teams = [codes[i % len(codes)]] + ([codes[(i + 1) % len(codes)]] if i % 4 == 0 else [])
+        employees.append({"name": f"Employee {i + 1}", "teams": [f"Equipa {c}" for c in teams]})
+    return vacations, minimuns, employees
+
+
+def _random_horario(teams, num_days, shifts, width, seed, density=0.4):
+    """[emp, day, shift] team ids, about `density` of the cells worked, only the first `shifts` columns."""
+    rng = np.random.default_rng(seed)
+    horario = np.zeros((len(teams), num_days, width), dtype=int)
+    for e, ids in enumerate(teams):
+        cells = horario[e, :, :shifts]
+        cells[...] = rng.choice(ids, size=cells.shape) * (rng.random(cells.shape) < density)
+    return horario
+
+
+# ---------- loop references (the implementations replaced by algorithm.scoring) ----------
+
+def _worked(horario):
+    return (horario.sum(axis=2) > 0).astype(int)
+
+
+def ref_runs_over(horario, max_consec=5):
+    worked = _worked(horario)
+    total = 0
+    for i in range(worked.shape[0]):
+        run = 0
+        for d in range(worked.shape[1]):
+            if worked[i, d]:
+                run += 1
+            else:
+                if run > max_consec:
+                    total += 1
+                run = 0
+        if run > max_consec:
+            total += 1
+    return total
+
+
+def ref_consecutive_excess(horario, max_consec=5):
+    worked = _worked(horario)
+    f1 = np.zeros(worked.shape[0], dtype=int)
+    for i in range(worked.shape[0]):
+        run = 0
+        for d in range(worked.shape[1]):
+            if worked[i, d]:
+                run += 1
+            else:
+                if run > max_consec:
+                    f1[i] += run - max_consec
+                run = 0
+        if run > max_consec:
+            f1[i] += run - max_consec
+    return f1
+
+
+def ref_special_excess(horario, special_days, allowed=22):
+    worked = _worked(horario)
+    total = 0
+    for i in range(worked.shape[0]):
+        num = sum(1 for d in range(worked.shape[1]) if worked[i, d] and (d + 1) in special_days)
+        if num > allowed:
+            total += num - allowed
+    return total
+
+
+def ref_shortage(horario, mins, num_days, shifts):
+    counts = defaultdict(int)
+    for e in range(horario.shape[0]):
+        for d in range(num_days):
+            for s in range(shifts):
+                t = int(horario[e, d, s])
+                if t > 0:
+                    counts[(d + 1, s + 1, t)] += 1
+    shortage = 0
+    for (day, shift, team), required in mins.items():
+        if 1 <= day <= num_days and 1 <= shift <= shifts:
+            shortage += max(required - counts.get((day, shift, team), 0), 0)
+    return shortage
+
+
+def ref_workday_deviation(horario, vac_mask, target=223):
+    worked = _worked(horario).astype(bool)
+    return np.array([abs(int(np.sum(worked[i] & ~vac_mask[i])) - target) for i in range(worked.shape[0])])
+
+
+def ref_backward(horario):
+    f5 = np.zeros(horario.shape[0], dtype=int)
+    for i in range(horario.shape[0]):
+        for d in range(horario.shape[1] - 1):
+            today = next((s for s in range(horario.shape[2]) if horario[i, d, s] > 0), None)
+            nxt = next((s for s in range(horario.shape[2]) if horario[i, d + 1, s] > 0), None)
+            if today is not None and nxt is not None and nxt < today:
+                f5[i] += 1
+    return f5
+
+
+# ---------- tests ----------
+
+@pytest.fixture(scope="module")
+def templates():
+    return _templates()
+
+
+def _greedy_climbing(templates, shifts, seed):
+    """GreedyClimbing of algorithm.greedyClimbing and its special days (1-based)."""
+    scheduler = _build_scheduler(*templates, year=2025, shifts=shifts, seed=seed)
+    return scheduler, scheduler.special_days
+
+
+def _engine_greedy_climbing(templates, shifts, seed):
+    """GreedyClimbing of algorithm.engines.greedyClimbingEngine, built as its solve() does."""
+    inst = get_instance(*templates, 2025, shifts)
+    scheduler = EngineGreedyClimbing(employees=list(inst.emp_ids), num_days=inst.num_days,
+                                     holidays_set=inst.holiday_dates, vacs=inst.vacs, mins=inst.mins,
+                                     ideals=inst.ideals, teams=inst.teams, year=2025, shifts=shifts, seed=seed)
+    return scheduler, set(scheduler.holidays) | set(scheduler.sunday)
+
+
+@pytest.mark.parametrize("build", [_greedy_climbing, _engine_greedy_climbing], ids=["greedyClimbing", "engine"])
+@pytest.mark.parametrize("shifts", [2, 3])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_greedy_climbing_criteria(templates, build, shifts, seed):
+    scheduler, special_days = build(templates, shifts, seed)
+    teams = [scheduler.teams[p] for p in scheduler.employees]
+    horario = _random_horario(teams, scheduler.num_days, shifts, shifts, seed)
+
+    assert scheduler.criterio1(horario) == ref_runs_over(horario)
+    assert scheduler.criterio2(horario) == ref_special_excess(horario, special_days)
+    assert scheduler.criterio3(horario) == ref_shortage(horario, scheduler.mins, scheduler.num_days, shifts)
+    assert scheduler.criterio4(horario) == int(ref_workday_deviation(horario, scheduler.vac_array).sum())
+    assert scheduler.criterio5(horario) == int(ref_backward(horario).sum())
+    assert scheduler.score(horario) == sum(scheduler.criterios(horario))
+
+
+@pytest.mark.parametrize("shifts", [2, 3])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_heuristic_sol_gabi_criteria(templates, shifts, seed):
+    vacations, minimuns, employees = templates
+    inst = get_instance(vacations, minimuns, employees, 2025, shifts)
+    scheduler = HeuristicSolGabi(inst.vacs, inst.mins, employees, vac_mask=inst.vac_mask, ideals=inst.ideals,
+                                 year=2025, nDias=inst.num_days, feriados=sorted(inst.holidays), shifts=shifts,
+                                 seed=seed)
+    # the tensor always has 3 shift columns; only the first `shifts` are used
+    scheduler.horario = _random_horario(scheduler.allowed_teams, scheduler.nDias, shifts, 3, seed)
+    horario = scheduler.horario
+
+    np.testing.assert_array_equal(scheduler.criterio1(), ref_consecutive_excess(horario, scheduler.nDiasSeguidos))
+    np.testing.assert_array_equal(scheduler.criterio4(), ref_workday_deviation(horario, scheduler.Ferias,
+                                                                              scheduler.nDiasTrabalho))
+    np.testing.assert_array_equal(scheduler.criterio5(), ref_backward(horario))
+    assert scheduler.criterio6() == ref_shortage(horario, scheduler.mins, scheduler.nDias, shifts)